@@ -1,2 +1,10 @@
 class AppError(Exception):
     pass
+
+
+class JobCancelled(AppError):
+    pass
+
+
+class TrainingCancelled(JobCancelled):
+    pass
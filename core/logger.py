@@ -1,12 +1,24 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
 from core.config import LOGS_DIR
 
 LOGS_DIR.mkdir(exist_ok=True)
 
-logging.basicConfig(
-    filename=LOGS_DIR / "app.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Callers (the GUI thread included) only enqueue records; the file is
+# written by the listener's own thread, so logging never blocks on disk.
+_file_handler = logging.FileHandler(LOGS_DIR / "app.log")
+_file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+
+_log_queue = queue.SimpleQueue()
+_listener = QueueListener(_log_queue, _file_handler, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)
+
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))  # the file handler adds the rest
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 
 logger = logging.getLogger("cv_annotator")
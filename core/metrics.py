@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from core.logger import logger
+from core.tracing import tracer
+
+# Operations slower than this are logged one by one, not just summarized
+SLOW_SPAN_MS = 500
+
+
+class Timings:
+    """
+    Per-operation latency samples ("image_load", "inference", "save", ...).
+
+    span(name) times a block, timed(name) a function; both are also trace
+    spans when tracing is on (core.tracing). The last `keep`
+    durations of each operation are kept, from any thread, so summary()
+    gives current p50/p95 rather than whole-session averages.
+    """
+
+    def __init__(self, keep=1000):
+        self.keep = keep
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, ms):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.keep)
+            samples.append(ms)
+            self._totals[name] = self._totals.get(name, 0) + 1
+        if ms >= SLOW_SPAN_MS:
+            logger.info(f"Slow {name}: {ms:.0f} ms")
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            with tracer.span(name):
+                yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def timed(self, name):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _percentile(ordered, p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self):
+        """{name: {"count", "p50", "p95", "max"}} over the retained samples (ms)."""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+            totals = dict(self._totals)
+        return {
+            name: {
+                "count": totals[name],
+                "p50": self._percentile(ordered, 50),
+                "p95": self._percentile(ordered, 95),
+                "max": ordered[-1],
+            }
+            for name, ordered in snapshot.items() if ordered
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        lines = [
+            f"  {name:<20} n={s['count']:<7} p50={s['p50']:8.1f} ms  p95={s['p95']:8.1f} ms  max={s['max']:8.1f} ms"
+            for name, s in sorted(summary.items())
+        ]
+        logger.info("Latency summary:\n" + "\n".join(lines))
+
+
+timings = Timings()
@@ -0,0 +1,170 @@
+import os
+import threading
+from contextlib import contextmanager
+
+# Roles:
+#   interactive  inference for the person at the keyboard (GUI process)
+#   background   batch jobs: scoring, caching, validation, import, indexing
+#   training     the training child process
+ROLES = ("interactive", "background", "training")
+
+BACKGROUND_NICE = 10
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def _available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _init_pool_worker(cores, threads, nice):
+    """ProcessPool initializer: pin, lower priority and cap library threads."""
+    _limit_process(cores, threads, nice)
+
+
+def _limit_process(cores, threads, nice):
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError:
+            pass
+    if nice and hasattr(os, "nice"):
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+
+
+class ResourceManager:
+    """
+    Splits the machine's cores between the interactive role and everything
+    else, and owns thread counts for torch, OpenCV and the BLAS/OpenMP
+    runtimes.
+
+    The first `interactive_cores` cores (default: a quarter, 1-4, or
+    CVA_INTERACTIVE_CORES) are kept free of background pools and training,
+    which also run at lower priority. Within the GUI process, background
+    threads call yield_to_interactive() between batches so a keyboard-driven
+    prediction never waits behind a batch job.
+    """
+
+    def __init__(self, interactive_cores=None):
+        self.cores = _available_cores()
+        n = len(self.cores)
+        if interactive_cores is None:
+            interactive_cores = int(os.environ.get("CVA_INTERACTIVE_CORES", 0)) or max(1, min(4, n // 4))
+        interactive_cores = min(interactive_cores, n)
+
+        self.interactive_set = self.cores[:interactive_cores]
+        self.background_set = self.cores[interactive_cores:] or self.cores
+
+        self._lock = threading.Lock()
+        self._interactive_active = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._torch_configured = False
+
+    # -----------------------------
+    # BUDGETS
+    def cores_for(self, role):
+        if role not in ROLES:
+            raise ValueError(f"Unknown role: {role}")
+        return self.interactive_set if role == "interactive" else self.background_set
+
+    def threads_for(self, role):
+        return len(self.cores_for(role))
+
+    def workers(self, role="background", requested=None):
+        """Pool size for a job: `requested`, capped at the role's core budget."""
+        budget = self.threads_for(role)
+        return max(1, min(requested or budget, budget))
+
+    def device_for(self, role):
+        """With several GPUs the interactive role keeps cuda:0 and other roles use the last one."""
+        from core.env import get_device
+
+        device = get_device()
+        if device == "cpu":
+            return device
+        import torch
+
+        count = torch.cuda.device_count()
+        return 0 if role == "interactive" or count < 2 else count - 1
+
+    # -----------------------------
+    # APPLY
+    def configure_gui_process(self):
+        """
+        Thread counts for the GUI process (interactive inference). Affinity is
+        left alone: the GUI thread must never be starved. Safe to call often;
+        torch's inter-op pool can only be sized once, before first use.
+        """
+        threads = self.threads_for("interactive")
+        try:
+            import cv2
+            cv2.setNumThreads(threads)
+        except ImportError:
+            pass
+        self._configure_torch(threads)
+
+    def configure_child_process(self, role):
+        """Pin the calling (child) process to its role's cores and cap its threads."""
+        threads = self.threads_for(role)
+        _limit_process(self.cores_for(role), threads, BACKGROUND_NICE if role != "interactive" else 0)
+        self._configure_torch(threads)
+
+    def _configure_torch(self, threads):
+        try:
+            import torch
+        except ImportError:
+            return
+        torch.set_num_threads(threads)
+        if not self._torch_configured:
+            self._torch_configured = True
+            try:
+                torch.set_num_interop_threads(max(1, min(2, threads)))
+            except RuntimeError:
+                pass  # parallel work already ran; torch keeps its pool
+
+    def pool_kwargs(self, role="background", workers=None):
+        """max_workers / initializer / initargs for a ProcessPoolExecutor of this role."""
+        workers = self.workers(role, workers)
+        threads = max(1, self.threads_for(role) // workers)
+        nice = BACKGROUND_NICE if role != "interactive" else 0
+        return {
+            "max_workers": workers,
+            "initializer": _init_pool_worker,
+            "initargs": (self.cores_for(role), threads, nice),
+        }
+
+    # -----------------------------
+    # PRIORITY
+    @contextmanager
+    def interactive(self):
+        """Mark interactive work; background threads pause at their next yield point."""
+        with self._lock:
+            self._interactive_active += 1
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._interactive_active -= 1
+                if not self._interactive_active:
+                    self._idle.set()
+
+    def yield_to_interactive(self, timeout=None):
+        """Block a background thread while interactive work is running."""
+        return self._idle.wait(timeout)
+
+
+resources = ResourceManager()
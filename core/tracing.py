@@ -0,0 +1,219 @@
+"""
+Opt-in tracing, for attaching to performance tickets.
+
+    CVA_TRACE=1                  trace to logs/traces/trace-<time>-<pid>.json
+    CVA_TRACE=/tmp/slow.json     trace to that file
+    CVA_PROFILE=cprofile         also cProfile the GUI thread (.prof next to the trace)
+    CVA_PROFILE=sample           also sample all threads' stacks every 5 ms (.folded)
+
+The trace is Chrome trace-event JSON: open it in chrome://tracing or
+https://ui.perfetto.dev. Every timings span (core.metrics) is a trace span,
+plus the ones opened with tracer.span() / @tracer.traced(). Files are
+written at exit.
+
+Disabled (the default), tracer.span() returns a shared no-op context
+manager and @tracer.traced returns the function itself.
+"""
+import atexit
+import cProfile
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from core.config import LOGS_DIR
+from core.logger import logger
+
+TRACE_DIR = LOGS_DIR / "traces"
+MAX_EVENTS = 2_000_000      # ~0.5 GB of JSON; later spans are counted, not stored
+SAMPLE_INTERVAL = 0.005
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._complete(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class _StackSampler(threading.Thread):
+    """Counts every thread's Python stack each SAMPLE_INTERVAL (flamegraph "folded" output)."""
+
+    def __init__(self):
+        super().__init__(name="trace-sampler", daemon=True)
+        self.stacks = Counter()
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(SAMPLE_INTERVAL):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._halt.set()
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Tracer:
+    def __init__(self, path=None, profile=None):
+        self.enabled = path is not None
+        self.path = path
+        self.profile = profile
+        self.events = []
+        self.dropped = 0
+        self._origin = time.perf_counter_ns()
+        self._threads = {}
+        self._profiler = None
+        self._sampler = None
+
+    @classmethod
+    def from_env(cls):
+        value = os.environ.get("CVA_TRACE", "").strip()
+        if not value or value == "0":
+            return cls()
+        if value == "1":
+            path = TRACE_DIR / f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json"
+        else:
+            path = value
+            # Spawned children (training, pools) inherit the variable: one file each
+            if multiprocessing.parent_process() is not None:
+                root, ext = os.path.splitext(value)
+                path = f"{root}.{os.getpid()}{ext or '.json'}"
+        tracer = cls(str(path), os.environ.get("CVA_PROFILE", "").strip().lower() or None)
+        tracer.start()
+        return tracer
+
+    # -----------------------------
+    # RECORDING
+    def span(self, name, **args):
+        """Context manager recording `name` (with `args`) as one complete event."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def traced(self, name=None):
+        """Decorator form of span(); a no-op when tracing is off."""
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+            label = name or fn.__qualname__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Span(self, label, {}):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def instant(self, name, **args):
+        if self.enabled:
+            self._append(name, "i", time.perf_counter_ns(), None, args)
+
+    def _complete(self, name, start, end, args):
+        self._append(name, "X", start, end - start, args)
+
+    def _append(self, name, phase, start, duration, args):
+        if len(self.events) >= MAX_EVENTS:
+            self.dropped += 1
+            return
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event = {
+            "name": name, "ph": phase, "pid": os.getpid(), "tid": tid,
+            "ts": (start - self._origin) / 1000,
+        }
+        if duration is not None:
+            event["dur"] = duration / 1000
+        else:
+            event["s"] = "t"
+        if args:
+            event["args"] = {k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in args.items()}
+        self.events.append(event)   # list.append is atomic: safe from any thread
+
+    # -----------------------------
+    # SESSION
+    def start(self):
+        if self.profile == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == "sample":
+            self._sampler = _StackSampler()
+            self._sampler.start()
+        atexit.register(self.stop)
+        logger.info(f"Tracing to {self.path}" + (f" with {self.profile}" if self.profile else ""))
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        root = os.path.splitext(self.path)[0]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(f"{root}.prof")
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler.dump(f"{root}.folded")
+        self.dump(self.path)
+
+    def dump(self, path):
+        """Write the Chrome trace-event JSON collected so far."""
+        pid = os.getpid()
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+             "args": {"name": f"cv_annotator ({multiprocessing.current_process().name})"}}
+        ] + [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._threads.items())
+        ]
+        with open(path, "w") as f:
+            json.dump({
+                "traceEvents": metadata + list(self.events),
+                "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": self.dropped},
+            }, f)
+        logger.info(f"Trace written to {path} ({len(self.events)} events, {self.dropped} dropped)")
+
+
+tracer = Tracer.from_env()
@@ -1,3 +1,182 @@
+import os
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from core.logger import logger
+from core.tracing import tracer
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# One labelled image as read from a YOLO dataset folder.
+# boxes: [(cls_id, x_center, y_center, w, h)] normalized to 0..1
+ImageRecord = namedtuple("ImageRecord", "image_path split width height boxes")
+# An image left out of an export, and why
+SkippedRecord = namedtuple("SkippedRecord", "image_path reason")
+# What run_exporters did: images exported and [SkippedRecord]
+ExportReport = namedtuple("ExportReport", "count skipped")
+
+
 class BaseFormat:
-    def export(self):
+    """
+    An export target.
+
+    Exporters never read the dataset themselves: `run_exporters` makes one pass
+    over the annotation source and hands every ImageRecord to each exporter.
+    finish() is only called when every record was written; on an error or
+    a cancel, abort() is called instead.
+
+    Output goes to a hidden sibling of the target folder (self.out_dir) and
+    commit() renames it into place, so a failed or cancelled run never
+    touches a folder that was there before.
+    """
+
+    name = "base"
+
+    def begin(self, out_dir, classes):
+        self.target_dir = Path(out_dir)
+        self.out_dir = self.target_dir.with_name(f".{self.target_dir.name}.partial-{os.getpid()}")
+        shutil.rmtree(self.out_dir, ignore_errors=True)  # left over by a crashed run
+        self.out_dir.mkdir(parents=True)
+        self.classes = classes
+
+    def write(self, record):
         raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def commit(self):
+        """Move the finished output into place; a folder already there is kept under a dated name."""
+        if self.target_dir.exists():
+            kept = self.target_dir.with_name(f"{self.target_dir.name}-{time.strftime('%Y%m%d-%H%M%S')}")
+            os.replace(self.target_dir, kept)
+            logger.info(f"Export: previous {self.target_dir} kept as {kept}")
+        os.replace(self.out_dir, self.target_dir)
+        self.out_dir = self.target_dir
+
+    def abort(self):
+        """Release open files and delete this run's partial output (never leave a valid-looking export)."""
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+
+def read_label_file(label_path):
+    boxes = []
+    for line in Path(label_path).read_text().splitlines():
+        parts = line.split()
+        if len(parts) != 5:
+            continue
+        boxes.append((int(parts[0]), *map(float, parts[1:])))
+    return boxes
+
+
+def _load_record(image_path, label_path, split):
+    """ImageRecord, or SkippedRecord for an unreadable image or label file."""
+    try:
+        with Image.open(image_path) as img:  # header only, no pixel decode
+            width, height = img.size
+        boxes = read_label_file(label_path) if label_path.exists() else []
+    except (OSError, ValueError) as e:
+        return SkippedRecord(str(image_path), str(e))
+    return ImageRecord(str(image_path), split, width, height, boxes)
+
+
+def _check_record(record, n_classes):
+    """Why `record` cannot be exported, or None."""
+    if isinstance(record, SkippedRecord):
+        return record.reason
+    if not os.path.isfile(record.image_path):
+        return "image file missing"
+    for box in record.boxes:
+        if not isinstance(box[0], int) or not 0 <= box[0] < n_classes:
+            return f"class id {box[0]!r} not in classes.txt"
+    return None
+
+
+def iter_yolo_dataset(dataset_path, workers=8, chunk_size=256):
+    """
+    Yield an ImageRecord (SkippedRecord if unreadable) for every image under images/<split>.
+
+    Label parsing and image-size probing run on a thread pool, a chunk at a
+    time, so memory stays bounded however big the dataset is.
+    """
+    dataset_path = Path(dataset_path)
+    images_root = dataset_path / "images"
+    if not images_root.exists():
+        return
+
+    def jobs():
+        for split_dir in sorted(p for p in images_root.iterdir() if p.is_dir()):
+            labels_dir = dataset_path / "labels" / split_dir.name
+            for image_path in sorted(split_dir.iterdir()):
+                if image_path.suffix.lower() in IMAGE_EXTS:
+                    yield image_path, labels_dir / f"{image_path.stem}.txt", split_dir.name
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        chunk = []
+        for job in jobs():
+            chunk.append(job)
+            if len(chunk) >= chunk_size:
+                yield from pool.map(lambda j: _load_record(*j), chunk)
+                chunk = []
+        if chunk:
+            yield from pool.map(lambda j: _load_record(*j), chunk)
+
+
+def run_exporters(dataset_path, out_dir, exporters, progress=None, index=None):
+    """
+    Feed every exporter from a single pass over the dataset.
+    With a DatasetIndex that is `ready` (reconciled with the folders) the
+    records come from the index and no label file is read at all; otherwise
+    the folders are read.
+
+    A record that cannot be exported (unreadable image or label, missing
+    file, unknown class id) is skipped and reported; any other error, or a
+    cancel from `progress`, aborts every exporter and deletes what this run
+    wrote; existing folders are left alone. Returns an ExportReport.
+    """
+    dataset_path = Path(dataset_path)
+    classes = (dataset_path / "classes.txt").read_text().splitlines()
+
+    started, committed = [], []
+    count, skipped = 0, []
+    try:
+        for exporter in exporters:
+            exporter.begin(Path(out_dir) / exporter.name, classes)
+            started.append(exporter)
+
+        use_index = index is not None and index.ready.is_set()
+        records = index.iter_records() if use_index else iter_yolo_dataset(dataset_path)
+        with tracer.span("export.write", exporters=",".join(e.name for e in exporters)):
+            for n, record in enumerate(records, start=1):
+                reason = _check_record(record, len(classes))
+                if reason is None:
+                    for exporter in exporters:
+                        exporter.write(record)
+                    count += 1
+                else:
+                    logger.warning(f"Export: skipped {record.image_path}: {reason}")
+                    skipped.append(SkippedRecord(record.image_path, reason))
+                if progress:
+                    progress(n)
+
+        for exporter in exporters:
+            with tracer.span(f"export.finish.{exporter.name}"):
+                exporter.finish()
+        for exporter in exporters:
+            exporter.commit()
+            committed.append(exporter)
+    except BaseException:
+        for exporter in started:
+            if exporter in committed:
+                continue
+            try:
+                exporter.abort()
+            except Exception:
+                logger.exception(f"Export: cleaning up {exporter.name} failed")
+        raise
+    return ExportReport(count, skipped)
@@ -0,0 +1,76 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from formats.base_format import BaseFormat
+
+
+class COCOExporter(BaseFormat):
+    """
+    Streaming COCO JSON writer.
+
+    "images" entries go straight to the output file and "annotations" entries
+    to a spill file that is appended at the end, so only one record is ever
+    held in memory. Category ids are class ids + 1 (COCO reserves 0).
+    """
+
+    name = "coco"
+
+    def begin(self, out_dir, classes):
+        super().begin(out_dir, classes)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.json_path = self.out_dir / "annotations.json"
+
+        self._out = open(self.json_path, "w", encoding="utf-8")
+        self._spill = tempfile.TemporaryFile("w+", encoding="utf-8", dir=self.out_dir)
+        self._image_id = 0
+        self._ann_id = 0
+
+        self._out.write('{"info": {"description": "CV Annotator export"},\n"images": [\n')
+
+    def write(self, record):
+        self._image_id += 1
+        image = {
+            "id": self._image_id,
+            "file_name": Path(record.image_path).name,
+            "width": record.width,
+            "height": record.height,
+            "split": record.split,
+        }
+        self._out.write((",\n" if self._image_id > 1 else "") + json.dumps(image))
+
+        for cls_id, xc, yc, w, h in record.boxes:
+            bw = w * record.width
+            bh = h * record.height
+            x = xc * record.width - bw / 2
+            y = yc * record.height - bh / 2
+
+            self._ann_id += 1
+            ann = {
+                "id": self._ann_id,
+                "image_id": self._image_id,
+                "category_id": cls_id + 1,
+                "bbox": [round(x, 2), round(y, 2), round(bw, 2), round(bh, 2)],
+                "area": round(bw * bh, 2),
+                "iscrowd": 0,
+            }
+            self._spill.write((",\n" if self._ann_id > 1 else "") + json.dumps(ann))
+
+    def finish(self):
+        self._out.write('\n],\n"annotations": [\n')
+        self._spill.seek(0)
+        shutil.copyfileobj(self._spill, self._out, length=1 << 20)
+        self._spill.close()
+
+        categories = [
+            {"id": i + 1, "name": name, "supercategory": "object"}
+            for i, name in enumerate(self.classes)
+        ]
+        self._out.write('\n],\n"categories": ' + json.dumps(categories) + "\n}\n")
+        self._out.close()
+
+    def abort(self):
+        self._spill.close()
+        self._out.close()
+        super().abort()
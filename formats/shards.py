@@ -0,0 +1,224 @@
+import mmap
+import os
+import tarfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from formats.base_format import BaseFormat
+
+DEFAULT_SHARD_SIZE = 1 << 30  # 1 GiB
+
+# One row per sample; offsets point at the raw member data inside the tar
+INDEX_DTYPE = np.dtype([
+    ("shard", "<u4"),
+    ("image_offset", "<u8"),
+    ("image_size", "<u8"),
+    ("label_offset", "<u8"),
+    ("label_size", "<u8"),
+])
+
+
+class _TarShardWriter:
+    """Plain (uncompressed) tar writer that reports where each member's data starts."""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "wb")
+
+    @property
+    def size(self):
+        return self.f.tell()
+
+    def add(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self.f.write(info.tobuf(tarfile.GNU_FORMAT, "utf-8", "surrogateescape"))
+        offset = self.f.tell()
+        self.f.write(data)
+        pad = -len(data) % tarfile.BLOCKSIZE
+        if pad:
+            self.f.write(b"\0" * pad)
+        return offset
+
+    def close(self):
+        self.f.write(b"\0" * (2 * tarfile.BLOCKSIZE))
+        self.f.close()
+
+
+class ShardExporter(BaseFormat):
+    """
+    Packs images + YOLO labels into fixed-size tar shards per split:
+
+        shards/<split>/shard-000000.tar   <stem>.<ext> and <stem>.txt members
+        shards/<split>/index.npy          INDEX_DTYPE row per sample
+        shards/<split>/keys.txt           sample file names, same order
+
+    The shards are standard tar files; the index allows random access
+    through mmap without parsing tar headers.
+    """
+
+    name = "shards"
+
+    def __init__(self, shard_size=DEFAULT_SHARD_SIZE):
+        self.shard_size = shard_size
+
+    def begin(self, out_dir, classes):
+        super().begin(out_dir, classes)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        (self.out_dir / "classes.txt").write_text("\n".join(classes))
+        self._splits = {}
+
+    def _split_state(self, split):
+        state = self._splits.get(split)
+        if state is None:
+            split_dir = self.out_dir / split
+            split_dir.mkdir(parents=True, exist_ok=True)
+            state = {
+                "dir": split_dir,
+                "shard": -1,
+                "writer": None,
+                "rows": [],
+                "keys": open(split_dir / "keys.txt", "w", encoding="utf-8"),
+            }
+            self._splits[split] = state
+        if state["writer"] is None or state["writer"].size >= self.shard_size:
+            if state["writer"] is not None:
+                state["writer"].close()
+            state["shard"] += 1
+            state["writer"] = _TarShardWriter(state["dir"] / f"shard-{state['shard']:06d}.tar")
+        return state
+
+    def write(self, record):
+        image_path = Path(record.image_path)
+        image_bytes = image_path.read_bytes()
+        label_bytes = "\n".join(
+            f"{cls_id} {xc:.6f} {yc:.6f} {w:.6f} {h:.6f}"
+            for cls_id, xc, yc, w, h in record.boxes
+        ).encode("utf-8")
+
+        state = self._split_state(record.split)
+        writer = state["writer"]
+        image_offset = writer.add(image_path.name, image_bytes)
+        label_offset = writer.add(f"{image_path.stem}.txt", label_bytes)
+
+        state["rows"].append((state["shard"], image_offset, len(image_bytes), label_offset, len(label_bytes)))
+        state["keys"].write(image_path.name + "\n")
+
+    def finish(self):
+        for state in self._splits.values():
+            state["writer"].close()
+            state["keys"].close()
+            np.save(state["dir"] / "index.npy", np.array(state["rows"], dtype=INDEX_DTYPE))
+
+    def abort(self):
+        for state in self._splits.values():
+            if state["writer"] is not None and not state["writer"].f.closed:
+                state["writer"].f.close()
+            state["keys"].close()
+        super().abort()
+
+
+class ShardReader:
+    """
+    Random and sequential access to one split of a shard export.
+    Shards are memory-mapped; a sample read is a slice, no tar parsing.
+    """
+
+    def __init__(self, split_dir):
+        self.split_dir = Path(split_dir)
+        self.index = np.load(self.split_dir / "index.npy", mmap_mode="r")
+        self.keys = (self.split_dir / "keys.txt").read_text(encoding="utf-8").splitlines()
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _shard(self, shard_id):
+        mm = self._maps.get(shard_id)
+        if mm is None:
+            with open(self.split_dir / f"shard-{shard_id:06d}.tar", "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[shard_id] = mm
+        return mm
+
+    def raw(self, i):
+        """(file name, image bytes, label text)"""
+        row = self.index[i]
+        mm = self._shard(int(row["shard"]))
+        img_off, img_size = int(row["image_offset"]), int(row["image_size"])
+        lbl_off, lbl_size = int(row["label_offset"]), int(row["label_size"])
+        return (
+            self.keys[i],
+            mm[img_off:img_off + img_size],
+            mm[lbl_off:lbl_off + lbl_size].decode("utf-8"),
+        )
+
+    def __getitem__(self, i):
+        """(BGR image array, labels array of shape (n, 5))"""
+        import cv2
+
+        _, image_bytes, label_text = self.raw(i)
+        image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        labels = np.array(label_text.split(), dtype=np.float32).reshape(-1, 5)
+        return image, labels
+
+    def iter_raw(self):
+        """All samples in storage order: shard by shard, front to back."""
+        order = np.lexsort((self.index["image_offset"], self.index["shard"]))
+        current = None
+        for i in order:
+            shard_id = int(self.index[i]["shard"])
+            if shard_id != current:
+                if current is not None:
+                    self._release(current)
+                current = shard_id
+                mm = self._shard(shard_id)
+                if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+            yield self.raw(int(i))
+        if current is not None:
+            self._release(current)
+
+    def _release(self, shard_id):
+        mm = self._maps.pop(shard_id, None)
+        if mm is not None:
+            mm.close()
+
+    def close(self):
+        for shard_id in list(self._maps):
+            self._release(shard_id)
+
+
+def stage_shards(shard_root, local_dir):
+    """
+    Unpack a shard export onto local disk (sequential shard reads only) and
+    write a data.yaml for ultralytics. Returns the data.yaml path.
+    """
+    shard_root, local_dir = Path(shard_root), Path(local_dir)
+    classes = (shard_root / "classes.txt").read_text().splitlines()
+
+    splits = []
+    for split_dir in sorted(p for p in shard_root.iterdir() if (p / "index.npy").exists()):
+        images_dir = local_dir / "images" / split_dir.name
+        labels_dir = local_dir / "labels" / split_dir.name
+        images_dir.mkdir(parents=True, exist_ok=True)
+        labels_dir.mkdir(parents=True, exist_ok=True)
+
+        reader = ShardReader(split_dir)
+        for name, image_bytes, label_text in reader.iter_raw():
+            (images_dir / name).write_bytes(image_bytes)
+            (labels_dir / f"{os.path.splitext(name)[0]}.txt").write_text(label_text)
+        reader.close()
+        splits.append(split_dir.name)
+
+    names_yaml = "\n".join(f"  - {c}" for c in classes)
+    split_lines = "\n".join(f"{s}: images/{s}" for s in splits)
+    data_yaml = local_dir / "data.yaml"
+    data_yaml.write_text(
+        f"path: {local_dir.as_posix()}\n{split_lines}\n\nnc: {len(classes)}\nnames:\n{names_yaml}\n"
+    )
+    return data_yaml
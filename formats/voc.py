@@ -0,0 +1,102 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from shutil import copy2
+from xml.sax.saxutils import escape
+
+from formats.base_format import BaseFormat
+
+
+def build_voc_xml(record, classes):
+    filename = Path(record.image_path).name
+    objects = []
+
+    for cls_id, xc, yc, w, h in record.boxes:
+        name = classes[cls_id] if 0 <= cls_id < len(classes) else str(cls_id)
+        xmin = max(0, round((xc - w / 2) * record.width))
+        ymin = max(0, round((yc - h / 2) * record.height))
+        xmax = min(record.width, round((xc + w / 2) * record.width))
+        ymax = min(record.height, round((yc + h / 2) * record.height))
+
+        objects.append(f"""  <object>
+    <name>{escape(name)}</name>
+    <pose>Unspecified</pose>
+    <truncated>0</truncated>
+    <difficult>0</difficult>
+    <bndbox>
+      <xmin>{xmin}</xmin>
+      <ymin>{ymin}</ymin>
+      <xmax>{xmax}</xmax>
+      <ymax>{ymax}</ymax>
+    </bndbox>
+  </object>""")
+
+    return f"""<annotation>
+  <folder>JPEGImages</folder>
+  <filename>{escape(filename)}</filename>
+  <size>
+    <width>{record.width}</width>
+    <height>{record.height}</height>
+    <depth>3</depth>
+  </size>
+  <segmented>0</segmented>
+{chr(10).join(objects)}
+</annotation>
+"""
+
+
+class VOCExporter(BaseFormat):
+    """
+    Pascal VOC writer (Annotations/, JPEGImages/, ImageSets/Main/<split>.txt).
+    XML generation and image copies run on a thread pool; at most
+    `max_pending` images are in flight at once.
+    """
+
+    name = "voc"
+
+    def __init__(self, workers=8, max_pending=512):
+        self.workers = workers
+        self.max_pending = max_pending
+
+    def begin(self, out_dir, classes):
+        super().begin(out_dir, classes)
+        self.ann_dir = self.out_dir / "Annotations"
+        self.img_dir = self.out_dir / "JPEGImages"
+        self.sets_dir = self.out_dir / "ImageSets" / "Main"
+        for d in (self.ann_dir, self.img_dir, self.sets_dir):
+            d.mkdir(parents=True, exist_ok=True)
+
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._pending = deque()
+        self._set_files = {}
+
+    def _write_one(self, record):
+        image_path = Path(record.image_path)
+        xml = build_voc_xml(record, self.classes)
+        (self.ann_dir / f"{image_path.stem}.xml").write_text(xml, encoding="utf-8")
+        copy2(image_path, self.img_dir / image_path.name)
+
+    def write(self, record):
+        if record.split not in self._set_files:
+            self._set_files[record.split] = open(self.sets_dir / f"{record.split}.txt", "w")
+        self._set_files[record.split].write(Path(record.image_path).stem + "\n")
+
+        self._pending.append(self._pool.submit(self._write_one, record))
+        while len(self._pending) > self.max_pending:
+            self._pending.popleft().result()
+
+    def finish(self):
+        try:
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._pool.shutdown()
+            for f in self._set_files.values():
+                f.close()
+
+    def abort(self):
+        self._pending.clear()
+        self._pool.shutdown(cancel_futures=True)
+        for f in self._set_files.values():
+            f.close()
+        super().abort()
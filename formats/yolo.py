@@ -2,7 +2,45 @@ from pathlib import Path
 from shutil import copy2
 from PIL import Image
 
-class YOLOExporter:
+from formats.base_format import BaseFormat
+from services.dataset_service import load_classes
+from services.index_service import DatasetIndex
+from services.io_service import write_queue
+from utils.geometry import rects_to_xywh, xywh_to_yolo
+
+
+class YOLOExporter(BaseFormat):
+    name = "yolo"
+
+    def begin(self, out_dir, classes):
+        super().begin(out_dir, classes)
+        self.splits = set()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        (self.out_dir / "classes.txt").write_text("\n".join(classes))
+
+    def write(self, record):
+        image_path = Path(record.image_path)
+        images_dir = self.out_dir / "images" / record.split
+        labels_dir = self.out_dir / "labels" / record.split
+        if record.split not in self.splits:
+            images_dir.mkdir(parents=True, exist_ok=True)
+            labels_dir.mkdir(parents=True, exist_ok=True)
+            self.splits.add(record.split)
+
+        copy2(image_path, images_dir / image_path.name)
+        lines = [
+            f"{cls_id} {xc:.6f} {yc:.6f} {w:.6f} {h:.6f}"
+            for cls_id, xc, yc, w, h in record.boxes
+        ]
+        (labels_dir / f"{image_path.stem}.txt").write_text("\n".join(lines))
+
+    def finish(self):
+        names_yaml = "\n".join(f"  - {c}" for c in self.classes)
+        split_lines = "\n".join(f"{s}: images/{s}" for s in sorted(self.splits))
+        (self.out_dir / "data.yaml").write_text(
+            f"path: {self.target_dir.resolve().as_posix()}\n{split_lines}\n\nnc: {len(self.classes)}\nnames:\n{names_yaml}\n"
+        )
+
     @staticmethod
     def export(image_path, annotations, dataset_path, split="train"):
         image_path = Path(image_path)
@@ -12,35 +50,33 @@ class YOLOExporter:
         images_dir.mkdir(parents=True, exist_ok=True)
         labels_dir.mkdir(parents=True, exist_ok=True)
 
-        # Copy image
-        copy2(image_path, images_dir / image_path.name)
+        # Copy image (queued, returns immediately)
+        write_queue.copy_file(image_path, images_dir / image_path.name)
 
         # Load image size
         img = Image.open(image_path)
         img_w, img_h = img.size
 
         # 🔒 Load FIXED class order
-        classes = (Path(dataset_path) / "classes.txt").read_text().splitlines()
-
-        lines = []
+        classes = load_classes(dataset_path)
 
-        for label, rect in annotations:
+        class_ids = {c: i for i, c in enumerate(classes)}
+        cls_ids = []
+        for label, _ in annotations:
             label = label.strip().lower()
 
-            if label not in classes:
+            if label not in class_ids:
                 raise ValueError(f"Label '{label}' not in classes.txt")
 
             # ✅ ONLY correct way
-            cls_id = classes.index(label)
+            cls_ids.append(class_ids[label])
 
-            x_center = (rect.x() + rect.width() / 2) / img_w
-            y_center = (rect.y() + rect.height() / 2) / img_h
-            width = rect.width() / img_w
-            height = rect.height() / img_h
-
-            lines.append(
-                f"{cls_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}"
-            )
+        yolo = xywh_to_yolo(rects_to_xywh([rect for _, rect in annotations]), img_w, img_h)
+        boxes = [(cls_id, *row) for cls_id, row in zip(cls_ids, yolo.tolist())]
+        lines = [f"{cls_id} {xc:.6f} {yc:.6f} {w:.6f} {h:.6f}" for cls_id, xc, yc, w, h in boxes]
 
         # Save label file
-        (labels_dir / f"{image_path.stem}.txt").write_text("\n".join(lines))
+        write_queue.write_text(labels_dir / f"{image_path.stem}.txt", "\n".join(lines))
+
+        # Keep the dataset index in step with the label file
+        DatasetIndex.for_dataset(dataset_path).update_image(image_path.name, split, img_w, img_h, boxes)
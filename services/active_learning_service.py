@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from core.config import STORAGE_DIR
+from core.logger import logger
+from core.resources import resources
+from utils.file_utils import atomic_write_bytes
+from utils.geometry import iou_matrix
+
+SCORES_FILE = STORAGE_DIR / "active_learning" / "scores.json"
+STRATEGIES = ("entropy", "margin", "disagreement")
+
+
+# ---------------- SCORING ----------------
+def entropy_score(det):
+    """Highest binary entropy of any box's confidence (peaks at conf 0.5)."""
+    c = np.clip(det["conf"], 1e-6, 1 - 1e-6)
+    if not len(c):
+        return 0.0
+    h = -(c * np.log2(c) + (1 - c) * np.log2(1 - c))
+    return float(h.max())
+
+
+def margin_score(det, iou_threshold=0.7, min_conf=0.1):
+    """
+    1 - smallest margin between a box and its best alternative: the
+    strongest overlapping box of another class (class-aware NMS keeps
+    those) or background (1 - conf), whichever is higher. Boxes below
+    `min_conf` are noise from the low scoring threshold and are ignored.
+    """
+    keep = det["conf"] >= min_conf
+    xyxy, conf, cls = det["xyxyn"][keep], det["conf"][keep], det["cls"][keep]
+    if not len(conf):
+        return 0.0
+    iou = iou_matrix(xyxy, xyxy)
+    rival = (iou > iou_threshold) & (cls[:, None] != cls[None, :])
+    second = np.maximum(np.where(rival, conf[None, :], 0.0).max(axis=1), 1.0 - conf)
+    margin = np.abs(conf - second)
+    return float(1.0 - margin.min())
+
+
+def disagreement_score(det, det_flipped, conf=0.25):
+    """
+    1 - mean IoU between confident boxes on the image and on its mirror
+    image (same class, best match); unmatched boxes count as IoU 0.
+    """
+    keep = det["conf"] >= conf
+    keep_f = det_flipped["conf"] >= conf
+    a, ca = det["xyxyn"][keep], det["cls"][keep]
+    b, cb = det_flipped["xyxyn"][keep_f].copy(), det_flipped["cls"][keep_f]
+    b[:, [0, 2]] = 1.0 - b[:, [2, 0]]  # un-mirror
+    if not len(a) and not len(b):
+        return 0.0
+    if not len(a) or not len(b):
+        return 1.0
+    iou = np.where(ca[:, None] == cb[None, :], iou_matrix(a, b), 0.0)
+    matched = np.concatenate([iou.max(axis=1), iou.max(axis=0)])
+    return float(1.0 - matched.mean())
+
+
+def model_key(model_path):
+    """Scores are only fresh for the exact weights file they were computed with."""
+    try:
+        return f"{os.path.abspath(model_path)}:{os.stat(model_path).st_mtime_ns}"
+    except OSError:
+        return os.path.abspath(model_path)
+
+
+# ---------------- QUEUE ----------------
+class ActiveLearningQueue:
+    """
+    Orders unlabeled images most-informative first, from AutoAnnotateService
+    confidences.
+
+    Scoring runs on a background thread in batches; poll() reports progress
+    and ranked() gives the current order. Scores persist in SCORES_FILE per
+    image, together with the model they came from. After a retrain,
+    set_model() rescores in place: stale scores keep ordering the queue
+    until their replacement arrives, highest first. With a DetectionCache,
+    the raw detections behind each score are kept for re-thresholding.
+    """
+
+    def __init__(self, model_path, strategy="entropy", batch_size=16, store_path=SCORES_FILE, save_every=20,
+                 detection_cache=None, image_cache=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.model_path = model_path
+        self.strategy = strategy
+        self.batch_size = batch_size
+        self.store_path = store_path
+        self.save_every = save_every
+        self.detection_cache = detection_cache
+        # services.cache_service.ImageCache: built over the folder once, then
+        # every (re)scoring pass reads model-resolution copies instead of files
+        self.image_cache = image_cache
+
+        self.scores = {}   # abspath → [score, model key, strategy]
+        if os.path.exists(store_path):
+            with open(store_path, encoding="utf-8") as f:
+                self.scores = json.load(f)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._paths = []
+        self._new = 0
+        self.error = None
+
+    # -----------------------------
+    # STATE
+    def _is_fresh(self, path, key):
+        entry = self.scores.get(path)
+        return entry is not None and entry[1] == key and entry[2] == self.strategy
+
+    def _save(self):
+        with self._lock:
+            data = json.dumps(self.scores).encode("utf-8")
+        os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+        atomic_write_bytes(self.store_path, data)
+
+    def progress(self):
+        """(fresh, total) for the current image list."""
+        key = model_key(self.model_path)
+        with self._lock:
+            fresh = sum(self._is_fresh(p, key) for p in self._paths)
+        return fresh, len(self._paths)
+
+    # -----------------------------
+    # CONTROL
+    def score(self, image_paths):
+        """(Re)start background scoring of `image_paths`; fresh scores are skipped."""
+        self.stop()
+        self._paths = [os.path.abspath(p) for p in image_paths]
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def set_model(self, model_path):
+        """New weights (e.g. after a retrain): every score becomes stale and is recomputed."""
+        self.model_path = model_path
+        if self._paths:
+            self.score(self._paths)
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def poll(self):
+        """Number of images scored since the last call."""
+        with self._lock:
+            n, self._new = self._new, 0
+        return n
+
+    def ranked(self, image_paths, skip=None):
+        """
+        `image_paths` most uncertain first. Unscored images follow in their
+        given order; images for which skip(path) is true (already labeled)
+        go last.
+        """
+        with self._lock:
+            scores = {p: self.scores.get(os.path.abspath(p)) for p in image_paths}
+
+        def sort_key(item):
+            pos, path = item
+            if skip is not None and skip(path):
+                return (2, 0.0, pos)
+            entry = scores[path]
+            if entry is None:
+                return (1, 0.0, pos)
+            return (0, -entry[0], pos)
+
+        return [p for _, p in sorted(enumerate(image_paths), key=sort_key)]
+
+    # -----------------------------
+    # WORKER
+    def _run(self):
+        from services.auto_annotate_service import AutoAnnotateService
+
+        try:
+            service = AutoAnnotateService(self.model_path)
+            key = model_key(self.model_path)
+
+            with self._lock:
+                todo = [p for p in self._paths if not self._is_fresh(p, key)]
+                # Refresh what currently tops the queue first
+                todo.sort(key=lambda p: -self.scores[p][0] if p in self.scores else 1.0)
+
+            if self.image_cache is not None and todo:
+                self.image_cache.build(todo)
+
+            for n, start in enumerate(range(0, len(todo), self.batch_size), start=1):
+                resources.yield_to_interactive()
+                if self._stop.is_set():
+                    break
+                batch = todo[start:start + self.batch_size]
+                results = self._score_batch(service, batch)
+                with self._lock:
+                    for path, value in results:
+                        self.scores[path] = [value, key, self.strategy]
+                    self._new += len(results)
+                if n % self.save_every == 0:
+                    self._save()
+        except Exception as e:
+            logger.exception("Active learning scoring failed")
+            self.error = str(e)
+        finally:
+            self._save()
+
+    def _score_batch(self, service, batch):
+        if self.strategy != "disagreement":
+            dets = service.detections(batch, image_cache=self.image_cache)
+            if self.detection_cache is not None:
+                for path, det in zip(batch, dets):
+                    self.detection_cache.put(self.model_path, path, det)
+            fn = entropy_score if self.strategy == "entropy" else margin_score
+            return [(p, fn(d)) for p, d in zip(batch, dets)]
+
+        import cv2
+
+        paths, images = [], []
+        for path in batch:
+            image = self.image_cache.get(path, letterboxed=False) if self.image_cache is not None else None
+            image = cv2.imread(path) if image is None else np.ascontiguousarray(image)
+            if image is not None:
+                paths.append(path)
+                images.append(image)
+        if not images:
+            return []
+        dets = service.detections(images + [cv2.flip(im, 1) for im in images])
+        n = len(images)
+        return [(p, disagreement_score(dets[i], dets[n + i])) for i, p in enumerate(paths)]
@@ -1,32 +1,95 @@
 class AnnotationService:
+    """
+    Boxes of the current image as [(label, rect)] with undo/redo.
+
+    Observers (e.g. the right panel's list model) are told about each change
+    as it happens: begin_/end_insert(first, last), begin_/end_remove(first,
+    last), relabeled(row, old_label) and begin_/end_reset() for undo, redo
+    and clear, so views update the affected rows instead of rebuilding.
+    """
+
     def __init__(self):
         self.annotations = []
         self.undo_stack = []
         self.redo_stack = []
+        self.observers = []
+
+    def subscribe(self, observer):
+        self.observers.append(observer)
+
+    def _notify(self, event, *args):
+        for observer in self.observers:
+            getattr(observer, event)(*args)
 
     def add(self, label, rect):
+        self.add_many([(label, rect)])
+
+    def add_many(self, items):
+        """Add [(label, rect)] as one undo step."""
+        items = [(label.strip().lower(), rect) for label, rect in items]
+        if not items:
+            return
         self.undo_stack.append(self.annotations.copy())
-        self.annotations.append((label.strip().lower(), rect))
+        first = len(self.annotations)
+        last = first + len(items) - 1
+        self._notify("begin_insert", first, last)
+        self.annotations.extend(items)
+        self._notify("end_insert", first, last)
         self.redo_stack.clear()
 
+    def rows_of(self, rect):
+        return [i for i, (_, r) in enumerate(self.annotations) if r == rect]
+
     def remove(self, rect):
+        rows = self.rows_of(rect)
+        if not rows:
+            return
         self.undo_stack.append(self.annotations.copy())
-        self.annotations = [(l, r) for l, r in self.annotations if r != rect]
+        for row in reversed(rows):
+            self._notify("begin_remove", row, row)
+            del self.annotations[row]
+            self._notify("end_remove", row, row)
         self.redo_stack.clear()
 
+    def relabel(self, rect, label):
+        rows = self.rows_of(rect)
+        if not rows:
+            return
+        self.undo_stack.append(self.annotations.copy())
+        label = label.strip().lower()
+        for row in rows:
+            old_label = self.annotations[row][0]
+            self.annotations[row] = (label, rect)
+            self._notify("relabeled", row, old_label)
+        self.redo_stack.clear()
+
+    def load(self, annotations):
+        """
+        Start over from `annotations` [(label, rect)], e.g. a new image and
+        its saved labels: not an edit, so undo/redo history is dropped.
+        """
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._replace([(label.strip().lower(), rect) for label, rect in annotations])
+
+    def _replace(self, annotations):
+        self._notify("begin_reset")
+        self.annotations = annotations
+        self._notify("end_reset")
+
     def undo(self):
         if not self.undo_stack:
             return
         self.redo_stack.append(self.annotations.copy())
-        self.annotations = self.undo_stack.pop()
+        self._replace(self.undo_stack.pop())
 
     def redo(self):
         if not self.redo_stack:
             return
         self.undo_stack.append(self.annotations.copy())
-        self.annotations = self.redo_stack.pop()
+        self._replace(self.redo_stack.pop())
 
     def clear(self):
         self.undo_stack.append(self.annotations.copy())
-        self.annotations.clear()
+        self._replace([])
         self.redo_stack.clear()
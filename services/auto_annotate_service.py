@@ -17,22 +17,40 @@
 #             y2 - y1,
 #             cls
 #         )
+import os
+import threading
+
+import numpy as np
 from ultralytics import YOLO
 
+from core.metrics import timings
+from core.resources import resources
+
 
 class AutoAnnotateService:
+    """
+    One loaded YOLO model. Inference is serialized: ultralytics predictors
+    are not thread-safe, and the GUI thread and job workers share a service.
+    """
+
     def __init__(self, model_path):
+        resources.configure_gui_process()
         self.model = YOLO(model_path)
+        self._lock = threading.Lock()
         self.class_names = self.model.names  # {0: 'person', 1: 'car', ...}
+        self.device = resources.device_for("interactive")
 
     def predict(self, image_path, conf=0.25):
         """
+        `image_path` may also be a BGR array (e.g. a decoded video frame).
+
         Returns:
         [
           (label, x, y, w, h)   # normalized YOLO format
         ]
         """
-        results = self.model(image_path, conf=conf)[0]
+        with resources.interactive(), self._lock, timings.span("inference"):
+            results = self.model(image_path, conf=conf, device=self.device)[0]
 
         predictions = []
 
@@ -45,3 +63,50 @@ class AutoAnnotateService:
             predictions.append((label, x, y, w, h))
 
         return predictions
+
+    def predict_batch(self, image_paths, conf=0.25, image_cache=None, batch_size=16):
+        """
+        predict() for many images, `batch_size` at a time, reading cached
+        model-resolution copies from `image_cache` where it has them.
+        """
+        from services.detection_cache import filter_detections
+
+        all_predictions = []
+        for start in range(0, len(image_paths), batch_size):
+            resources.yield_to_interactive()
+            batch = image_paths[start:start + batch_size]
+            imgsz = image_cache.size if image_cache is not None else 640
+            for det in self.detections(batch, conf=conf, imgsz=imgsz, image_cache=image_cache):
+                all_predictions.append(filter_detections(det, conf))
+        return all_predictions
+
+    def detections(self, sources, conf=0.01, imgsz=640, image_cache=None):
+        """
+        Raw model output for a batch of sources (paths or BGR arrays):
+        one dict per source with numpy arrays "xyxyn" (n, 4), "conf" (n,),
+        "cls" (n,) and "labels" (n,). Used for scoring and the detection
+        cache, so keep `conf` low.
+
+        With an ImageCache, paths it holds are fed as their cached
+        aspect-preserving resize (no decode); normalized boxes are the same.
+        """
+        if image_cache is not None:
+            cached = []
+            for source in sources:
+                image = None
+                if isinstance(source, (str, os.PathLike)):
+                    image = image_cache.get(source, letterboxed=False)
+                cached.append(source if image is None else np.ascontiguousarray(image))
+            sources = cached
+        with self._lock, timings.span("inference_batch"):
+            results = self.model(list(sources), conf=conf, imgsz=imgsz, device=self.device, verbose=False)
+        detections = []
+        for r in results:
+            cls = r.boxes.cls.cpu().numpy().astype(int)
+            detections.append({
+                "xyxyn": r.boxes.xyxyn.cpu().numpy(),
+                "conf": r.boxes.conf.cpu().numpy(),
+                "cls": cls,
+                "labels": np.array([self.class_names[c].strip().lower() for c in cls], dtype=str),
+            })
+        return detections
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from core.config import STORAGE_DIR
+from core.resources import resources
+from utils.file_utils import atomic_write_bytes
+
+CACHE_DIR = STORAGE_DIR / "cache" / "images"
+TRAINING_CACHE_DIR = STORAGE_DIR / "cache" / "training"
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fill_slot(job):
+    """Worker: decode + letterbox one image straight into its memmap slot."""
+    import cv2
+    from utils.image_utils import letterbox
+
+    path, slot, data_file, capacity, size = job
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        return path, None
+
+    boxed, scale, pad = letterbox(image, size)
+    data = np.memmap(data_file, dtype=np.uint8, mode="r+", shape=(capacity, size, size, 3))
+    data[slot] = boxed
+    data.flush()
+    del data
+
+    stat = os.stat(path)
+    return path, {
+        "slot": slot,
+        "mtime": stat.st_mtime,
+        "bytes": stat.st_size,
+        "hash": file_hash(path),
+        "width": image.shape[1],
+        "height": image.shape[0],
+        "scale": scale,
+        "pad": list(pad),
+    }
+
+
+def _link(src, dst):
+    """Point `dst` at `src`: a symlink, else a hard link, else a copy kept current by mtime."""
+    if os.path.islink(dst):
+        if os.readlink(dst) == str(src):
+            return
+        os.unlink(dst)
+    elif dst.exists():
+        if os.path.samefile(src, dst) or src.stat().st_mtime <= dst.stat().st_mtime:
+            return
+        dst.unlink()
+    try:
+        os.symlink(src, dst)
+    except OSError:
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+
+class ImageCache:
+    """
+    Letterboxed, model-resolution copies of images in one memory-mapped
+    uint8 array (images.u8, N x size x size x 3, BGR) plus index.json.
+
+    An entry is valid while the source's mtime and size match; if they
+    changed but the content hash did not (e.g. a copy), it is kept.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, size=640):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.data_file = self.cache_dir / "images.u8"
+        self.index_file = self.cache_dir / "index.json"
+
+        self.entries = {}
+        self.capacity = 0
+        if self.index_file.exists():
+            meta = json.loads(self.index_file.read_text())
+            if meta.get("size") == size:
+                self.entries = meta["entries"]
+                self.capacity = meta["capacity"]
+        self._data = None
+
+    # -----------------------------
+    # STORAGE
+    def _slot_bytes(self):
+        return self.size * self.size * 3
+
+    def _reserve(self, needed):
+        """Grow the backing file so it holds at least `needed` slots."""
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, int(self.capacity * 1.5) + 64)
+        with open(self.data_file, "ab") as f:
+            f.truncate(capacity * self._slot_bytes())
+        self.capacity = capacity
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None and self.capacity:
+            self._data = np.memmap(
+                self.data_file, dtype=np.uint8, mode="r",
+                shape=(self.capacity, self.size, self.size, 3),
+            )
+        return self._data
+
+    def _save_index(self):
+        meta = {"size": self.size, "capacity": self.capacity, "entries": self.entries}
+        atomic_write_bytes(self.index_file, json.dumps(meta).encode("utf-8"))
+
+    # -----------------------------
+    # VALIDITY
+    def is_valid(self, path):
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_mtime == entry["mtime"] and stat.st_size == entry["bytes"]:
+            return True
+        if stat.st_size == entry["bytes"] and file_hash(path) == entry["hash"]:
+            entry["mtime"] = stat.st_mtime
+            return True
+        return False
+
+    # -----------------------------
+    # BUILD / READ
+    def build(self, paths, workers=None, progress=None):
+        """
+        Cache every path that is missing or stale. Decoding and resizing run
+        on a process pool, each worker writing into its own slot.
+        Returns the number of images (re)cached.
+        """
+        todo = [os.path.abspath(p) for p in paths if not self.is_valid(p)]
+        if not todo:
+            self._save_index()
+            return 0
+
+        free = sorted(set(range(self.capacity)) - {e["slot"] for e in self.entries.values()})
+        jobs_slots = []
+        next_slot = self.capacity
+        for path in todo:
+            if path in self.entries:
+                slot = self.entries[path]["slot"]
+            elif free:
+                slot = free.pop(0)
+            else:
+                slot = next_slot
+                next_slot += 1
+            jobs_slots.append((path, slot))
+        self._reserve(next_slot)
+        self._data = None  # workers write; re-open read-only afterwards
+
+        jobs = [(p, s, str(self.data_file), self.capacity, self.size) for p, s in jobs_slots]
+        done = 0
+        with ProcessPoolExecutor(**resources.pool_kwargs("background", workers)) as pool:
+            for path, entry in pool.map(_fill_slot, jobs, chunksize=16):
+                if entry is None:
+                    self.entries.pop(path, None)
+                else:
+                    self.entries[path] = entry
+                done += 1
+                if progress:
+                    progress(done, len(jobs))
+
+        self._save_index()
+        return done
+
+    def get(self, path, letterboxed=True):
+        """
+        Cached BGR image for `path` (a read-only view into the memmap), or None
+        if it is not cached or the source changed. With letterboxed=False the
+        padding is cropped away (aspect-preserving resize only).
+        """
+        if not self.is_valid(path):
+            return None
+        entry = self.entries[os.path.abspath(path)]
+        image = self.data[entry["slot"]]
+        if letterboxed:
+            return image
+        pad_x, pad_y = entry["pad"]
+        new_w = round(entry["width"] * entry["scale"])
+        new_h = round(entry["height"] * entry["scale"])
+        return image[pad_y:pad_y + new_h, pad_x:pad_x + new_w]
+
+    def meta(self, path):
+        return self.entries.get(os.path.abspath(path))
+
+    def ultralytics_view(self, data_yaml, view_dir=None):
+        """
+        Training view of the dataset behind `data_yaml` for ultralytics, under
+        `view_dir` (default <cache>/ultralytics/<dataset>). Images and labels
+        are links to the originals and every cached image gets <stem>.npy
+        beside its link, which ultralytics' loader reads instead of decoding
+        and resizing the full-size file. Nothing is written into the dataset.
+
+        A .npy older than its image is rewritten; links and .npy files of
+        images that are gone are removed. Returns the view's data.yaml path.
+        """
+        import yaml
+
+        data_yaml = Path(data_yaml)
+        meta = yaml.safe_load(data_yaml.read_text(encoding="utf-8")) or {}
+        # A relative `path` is relative to the working directory (as create_data_yaml
+        # wrote it in older versions); no `path` means the yaml's own folder
+        root = Path(meta["path"]) if meta.get("path") else data_yaml.parent
+        root = root.resolve()
+        if view_dir is None:
+            digest = hashlib.blake2b(str(root).encode("utf-8"), digest_size=8).hexdigest()
+            view_dir = self.cache_dir / "ultralytics" / digest
+        view = Path(view_dir)
+        view.mkdir(parents=True, exist_ok=True)
+
+        linked = []
+        for split in ("train", "val", "test"):
+            rel = meta.get(split)
+            if not isinstance(rel, str) or not (root / rel).is_dir():
+                continue
+            src_images = root / rel
+            src_labels = root / rel.replace("images", "labels", 1)
+            dst_images = view / rel
+            dst_labels = view / rel.replace("images", "labels", 1)
+            dst_images.mkdir(parents=True, exist_ok=True)
+            dst_labels.mkdir(parents=True, exist_ok=True)
+            linked.append(split)
+
+            keep_images, keep_labels = set(), set()
+            for src in src_images.iterdir():
+                if src.suffix.lower() not in IMAGE_EXTS:
+                    continue
+                src = src.resolve()
+                dst = dst_images / src.name
+                _link(src, dst)
+                keep_images.add(dst.name)
+
+                # Older versions wrote the .npy into the dataset itself
+                stray = src_images / f"{src.stem}.npy"
+                if stray.exists():
+                    stray.unlink()
+
+                npy = dst.with_suffix(".npy")
+                image = self.get(src, letterboxed=False)
+                if image is not None:
+                    if not npy.exists() or npy.stat().st_mtime < src.stat().st_mtime:
+                        np.save(npy, np.ascontiguousarray(image))
+                    keep_images.add(npy.name)
+
+                label = src_labels / f"{src.stem}.txt"
+                if label.exists():
+                    _link(label.resolve(), dst_labels / label.name)
+                    keep_labels.add(label.name)
+
+            for folder, keep in ((dst_images, keep_images), (dst_labels, keep_labels)):
+                for entry in folder.iterdir():
+                    if entry.name not in keep:
+                        entry.unlink()
+
+        if not linked:
+            raise FileNotFoundError(f"No split folder of {data_yaml} exists under {root}")
+
+        meta["path"] = str(view.resolve())
+        view_yaml = view / "data.yaml"
+        atomic_write_bytes(view_yaml, yaml.safe_dump(meta, sort_keys=False).encode("utf-8"))
+        return view_yaml
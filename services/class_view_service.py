@@ -0,0 +1,47 @@
+import os
+from pathlib import Path
+
+from services.index_service import DatasetIndex
+from services.io_service import write_queue
+
+
+class ClassView:
+    """
+    Per-class image lists for a dataset, answered by the dataset index
+    instead of copying images into images_by_class/<cls>/. Folders of
+    links can still be materialized on request for external tools.
+    Queries reconcile the index first (a no-op once it is ready).
+    """
+
+    def __init__(self, dataset_path):
+        self.dataset_path = Path(dataset_path)
+        self.index = DatasetIndex.for_dataset(dataset_path)
+
+    def class_counts(self):
+        """[(class_name, n_images)] sorted by name."""
+        self.index.reconcile()
+        return self.index.class_image_counts()
+
+    def images_for(self, class_name):
+        """Paths of the dataset images that contain `class_name`."""
+        self.index.reconcile()
+        return [p for p in self.index.images_with_class(class_name) if write_queue.exists(p)]
+
+    def materialize(self, class_name, dest=None, hardlink=False):
+        """
+        Build images_by_class/<class_name>/ out of links to the real images.
+        Returns the folder.
+        """
+        dest = Path(dest) if dest else self.dataset_path / "images_by_class" / class_name
+        dest.mkdir(parents=True, exist_ok=True)
+        write_queue.flush()  # links need the real files
+
+        for image in self.images_for(class_name):
+            link = dest / Path(image).name
+            if link.exists() or link.is_symlink():
+                continue
+            if hardlink:
+                os.link(image, link)
+            else:
+                os.symlink(os.path.abspath(image), link)
+        return dest
@@ -1,26 +1,85 @@
 from pathlib import Path
 
+from services.io_service import write_queue
+from services.split_service import SPLITS, SplitEngine, active_splits
+
+# Images whose label file was last written from model detections (one name per line)
+AUTO_LABELS_FILE = "auto_labels.txt"
+
+def load_classes(dataset_path):
+    """classes.txt as a list, including a save that is still queued."""
+    classes_file = Path(dataset_path) / "classes.txt"
+    if not write_queue.exists(classes_file):
+        return []
+    return write_queue.read_text(classes_file).splitlines()
+
+
+def load_auto_labeled(dataset_path):
+    """Names of images whose labels came from detections; anything else was saved by hand or imported."""
+    auto_file = Path(dataset_path) / AUTO_LABELS_FILE
+    if not write_queue.exists(auto_file):
+        return set()
+    return set(write_queue.read_text(auto_file).splitlines())
+
+
+def save_auto_labeled(dataset_path, names):
+    write_queue.write_text(Path(dataset_path) / AUTO_LABELS_FILE, "\n".join(sorted(names)))
+
+
+def load_saved_labels(dataset_path, image_name, classes=None):
+    """Saved boxes of an image as [(class name, xc, yc, w, h)]; [] if it has no label file."""
+    dataset_path = Path(dataset_path)
+    stem = Path(image_name).stem
+    if classes is None:
+        classes = load_classes(dataset_path)
+
+    for split in SPLITS:
+        label_file = dataset_path / "labels" / split / f"{stem}.txt"
+        if write_queue.exists(label_file):
+            break
+    else:
+        return []
+
+    boxes = []
+    for line in write_queue.read_text(label_file).splitlines():
+        parts = line.split()
+        if len(parts) != 5:
+            continue
+        cls_id = int(float(parts[0]))
+        name = classes[cls_id] if 0 <= cls_id < len(classes) else str(cls_id)
+        boxes.append((name, *map(float, parts[1:])))
+    return boxes
+
+
 def create_data_yaml(dataset_path):
     dataset_path = Path(dataset_path)
 
     classes_file = dataset_path / "classes.txt"
-    if not classes_file.exists():
+    if not write_queue.exists(classes_file):
         raise FileNotFoundError("classes.txt not found. Save annotations first.")
 
-    classes = classes_file.read_text().splitlines()
+    classes = load_classes(dataset_path)
 
     names_yaml = "\n".join([f"  - {c}" for c in classes])
 
-    content = f"""path: {dataset_path.as_posix()}
-train: images/train
-val: images/val
+    # Splits come from the split engine (split.json); a disabled (empty) test split is
+    # left out, but ultralytics requires train and val, so a disabled one of those points
+    # at a split that does get images
+    active = active_splits(SplitEngine(dataset_path).ratios)
+    folders = {split: split for split in active}
+    for split in ("train", "val"):
+        folders.setdefault(split, active[0] if active else "train")
+    split_lines = "".join(f"{split}: images/{folders[split]}\n" for split in SPLITS if split in folders)
 
+    # Absolute: ultralytics (and the training view) would resolve a relative path elsewhere
+    content = f"""path: {dataset_path.resolve().as_posix()}
+{split_lines}
 nc: {len(classes)}
 names:
 {names_yaml}
 """
 
-    (dataset_path / "data.yaml").write_text(content)
+    write_queue.write_text(dataset_path / "data.yaml", content)
 
 
 
@@ -35,5 +94,5 @@ def save_classes(dataset_path, classes):
             seen.add(c)
             ordered_classes.append(c)
 
-    classes_file.write_text("\n".join(ordered_classes))
+    write_queue.write_text(classes_file, "\n".join(ordered_classes))
 
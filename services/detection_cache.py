@@ -0,0 +1,126 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.config import STORAGE_DIR
+from services.active_learning_service import model_key
+from utils.file_utils import atomic_write_bytes
+from utils.geometry import xyxy_to_cxcywh
+
+DETECTIONS_DIR = STORAGE_DIR / "cache" / "detections"
+# Raw detections are kept down to this score; any threshold above it is a mask
+SCORE_FLOOR = 0.01
+FIELDS = ("xyxyn", "conf", "cls", "labels")
+
+
+def filter_detections(det, conf=0.25, classes=None):
+    """
+    Raw detections → predict()-style [(label, xc, yc, w, h)] (normalized),
+    keeping boxes scoring >= `conf` whose label is in `classes` (None = all).
+    """
+    keep = det["conf"] >= conf
+    if classes is not None:
+        keep &= np.isin(det["labels"], list(classes))
+    boxes = xyxy_to_cxcywh(det["xyxyn"][keep])
+    return [(label, *box) for label, box in zip(det["labels"][keep].tolist(), boxes.tolist())]
+
+
+class DetectionCache:
+    """
+    Raw detections per (weights, image): every box down to SCORE_FLOOR with
+    its score, class and label, so a new confidence threshold or class
+    filter is a numpy mask instead of another inference.
+
+    Entries live in a bounded in-memory LRU and as one .npz per image under
+    DETECTIONS_DIR/<weights>/. They are only valid for the exact weights
+    (model_key) and image mtime they were computed with. Thread-safe.
+    """
+
+    def __init__(self, cache_dir=DETECTIONS_DIR, memory_items=4096):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # KEYS
+    @staticmethod
+    def _digest(text, size):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=size).hexdigest()
+
+    def _key(self, model_path, path):
+        path = os.path.abspath(path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        return model_key(model_path), path, mtime
+
+    def _file(self, key):
+        weights, path, _mtime = key
+        return os.path.join(self.cache_dir, self._digest(weights, 8), f"{self._digest(path, 12)}.npz")
+
+    # -----------------------------
+    # READ / WRITE
+    def get(self, model_path, path):
+        """Raw detections for `path` under `model_path`, or None if missing or stale."""
+        key = self._key(model_path, path)
+        if key is None:
+            return None
+        with self._lock:
+            det = self._memory.get(key)
+            if det is not None:
+                self._memory.move_to_end(key)
+                return det
+
+        try:
+            with np.load(self._file(key)) as data:
+                if int(data["mtime"]) != key[2]:
+                    return None
+                det = {name: data[name] for name in FIELDS}
+        except (OSError, KeyError, ValueError):
+            return None
+        self._remember(key, det)
+        return det
+
+    def put(self, model_path, path, det):
+        key = self._key(model_path, path)
+        if key is None:
+            return
+        det = {name: np.asarray(det[name]) for name in FIELDS}
+        self._remember(key, det)
+
+        buf = io.BytesIO()
+        np.savez(buf, mtime=np.int64(key[2]), **det)
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        atomic_write_bytes(file, buf.getvalue())
+
+    def _remember(self, key, det):
+        with self._lock:
+            self._memory[key] = det
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def detect(self, service, model_path, path):
+        """Cached raw detections, running `service` (an AutoAnnotateService) once on a miss."""
+        det = self.get(model_path, path)
+        if det is None:
+            det = service.detections([str(path)], conf=SCORE_FLOOR)[0]
+            self.put(model_path, path, det)
+        return det
+
+    def filtered(self, model_path, paths, conf=0.25, classes=None):
+        """(path, predictions) for every path with cached detections; never runs a model."""
+        for path in paths:
+            det = self.get(model_path, path)
+            if det is not None:
+                yield path, filter_detections(det, conf, classes)
+
+
+detection_cache = DetectionCache()
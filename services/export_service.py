@@ -1,44 +1,59 @@
 from pathlib import Path
-import shutil
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 
-
-def export_yolo_dataset(parent, dataset_path):
-    """
-    Export YOLO dataset (images + labels + data.yaml)
+from formats.base_format import run_exporters
+from formats.yolo import YOLOExporter
+from formats.coco import COCOExporter
+from formats.voc import VOCExporter
+from formats.shards import ShardExporter
+from services.index_service import DatasetIndex
+from services.io_service import write_queue
+from core.metrics import timings
+from utils.threading import jobs
+
+EXPORT_FORMATS = {
+    "YOLO": YOLOExporter,
+    "COCO JSON": COCOExporter,
+    "Pascal VOC": VOCExporter,
+    "Training shards (tar)": ShardExporter,
+}
+
+
+def export_formats(parent, dataset_path, format_names):
     """
+    Export the dataset to one or more formats in a single pass
+    (each format lands in <export folder>/<format name>).
 
+    Asks for the folder here and returns the background job doing the
+    export (None if nothing was started); its result is an ExportReport.
+    """
     dataset_path = Path(dataset_path)
+    write_queue.flush()
 
-    images_dir = dataset_path / "images"
-    labels_dir = dataset_path / "labels"
-    data_yaml = dataset_path / "data.yaml"
+    if not (dataset_path / "classes.txt").exists():
+        QMessageBox.warning(parent, "Export Failed", "classes.txt not found. Save annotations first.")
+        return None
 
-    if not images_dir.exists() or not labels_dir.exists():
-        QMessageBox.warning(parent, "Export Failed", "No YOLO data found to export.")
-        return
+    export_root = QFileDialog.getExistingDirectory(parent, "Select Export Folder")
+    if not export_root:
+        return None
 
-    # Ask user where to export
-    export_root = QFileDialog.getExistingDirectory(
-        parent,
-        "Select Export Folder"
+    return jobs.submit(
+        run_format_export, dataset_path, export_root, format_names, name=f"Export {', '.join(format_names)}"
     )
-    if not export_root:
-        return
 
-    export_root = Path(export_root) / "yolo_export"
-    export_root.mkdir(parents=True, exist_ok=True)
 
-    # Copy folders
-    shutil.copytree(images_dir, export_root / "images", dirs_exist_ok=True)
-    shutil.copytree(labels_dir, export_root / "labels", dirs_exist_ok=True)
+def run_format_export(job, dataset_path, export_root, format_names):
+    index = DatasetIndex.for_dataset(dataset_path)
+    job.progress.set_message("Checking dataset index")
+    index.reconcile()
+    job.progress.set_message(job.name)
+    job.progress.set_total(sum(index.split_counts().values()))
 
-    # Copy data.yaml
-    if data_yaml.exists():
-        shutil.copy(data_yaml, export_root / "data.yaml")
+    def progress(count):
+        job.check()
+        job.progress.update(count)
 
-    QMessageBox.information(
-        parent,
-        "Export Complete",
-        f"YOLO dataset exported to:\n{export_root}"
-    )
+    exporters = [EXPORT_FORMATS[name]() for name in format_names]
+    with timings.span("export"):
+        return run_exporters(dataset_path, export_root, exporters, progress=progress, index=index)
@@ -0,0 +1,353 @@
+import os
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from core.config import DATASETS_DIR
+from core.resources import resources
+from services.dataset_service import create_data_yaml, load_classes, save_classes
+from services.index_service import DatasetIndex
+from services.io_service import write_queue
+from services.split_service import SPLITS, SplitEngine
+from utils.file_utils import iter_json_array
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def clean_box(x1, y1, x2, y2):
+    """
+    Clip a normalized xyxy box to the image and return YOLO (xc, yc, w, h),
+    or None when nothing with a positive area is left.
+    """
+    x1, x2 = min(max(x1, 0.0), 1.0), min(max(x2, 0.0), 1.0)
+    y1, y2 = min(max(y1, 0.0), 1.0), min(max(y2, 0.0), 1.0)
+    w, h = x2 - x1, y2 - y1
+    if w <= 0 or h <= 0:
+        return None
+    return x1 + w / 2, y1 + h / 2, w, h
+
+
+# ---------------- WORKERS (run in child processes) ----------------
+def _parse_yolo_label(label_path):
+    """[(cls_id, xc, yc, w, h)] plus the number of malformed lines."""
+    if not os.path.exists(label_path):
+        return [], 0
+    boxes, bad = [], 0
+    with open(label_path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                cls_id = int(float(parts[0]))
+                xc, yc, w, h = map(float, parts[1:5])
+            except (ValueError, IndexError):
+                bad += 1
+                continue
+            boxes.append((cls_id, xc, yc, w, h))
+    return boxes, bad
+
+
+def _parse_voc_xml(xml_path):
+    """(filename, width, height, [(name, xmin, ymin, xmax, ymax)])"""
+    root = ET.parse(xml_path).getroot()
+    size = root.find("size")
+    width = int(float(size.findtext("width", "0"))) if size is not None else 0
+    height = int(float(size.findtext("height", "0"))) if size is not None else 0
+
+    objects = []
+    for obj in root.iter("object"):
+        box = obj.find("bndbox")
+        if box is None:
+            continue
+        objects.append((
+            obj.findtext("name", "").strip(),
+            float(box.findtext("xmin", "0")),
+            float(box.findtext("ymin", "0")),
+            float(box.findtext("xmax", "0")),
+            float(box.findtext("ymax", "0")),
+        ))
+    return root.findtext("filename", ""), width, height, objects
+
+
+class ClassMap:
+    """Maps external class names onto the project's classes.txt order."""
+
+    def __init__(self, dataset_path, add_missing=True):
+        self.classes = load_classes(dataset_path)
+        self.index = {c: i for i, c in enumerate(self.classes)}
+        self.add_missing = add_missing
+        self.added = []
+
+    def id_for(self, name):
+        name = str(name).strip().lower()
+        if name in self.index:
+            return self.index[name]
+        if not self.add_missing or not name:
+            return None
+        self.index[name] = len(self.classes)
+        self.classes.append(name)
+        self.added.append(name)
+        return self.index[name]
+
+
+class ImportService:
+    """
+    Bulk import of existing YOLO, COCO and VOC datasets into
+    storage/datasets/<project>.
+
+    Annotation files are parsed on a process pool and COCO JSON is
+    streamed, so memory depends on the number of images and boxes, not the
+    size of the file. Image copies and label writes go through the shared
+    write-behind queue (atomic, and ordered with the app's own saves); the
+    importer waits whenever more than a few batches are queued.
+    """
+
+    def __init__(self, project="default", workers=None, add_missing_classes=True,
+                 link_images=False, batch_size=512, progress=None):
+        self.dataset_path = DATASETS_DIR / project
+        self.workers = resources.workers("background", workers)
+        self.link_images = link_images
+        self.batch_size = batch_size
+        self.progress = progress
+
+        self.class_map = ClassMap(self.dataset_path, add_missing_classes)
+        self.split_engine = SplitEngine(self.dataset_path)
+        self.report = {
+            "images": 0,
+            "boxes": 0,
+            "dropped_boxes": 0,
+            "unknown_classes": 0,
+            "missing_images": 0,
+            "skipped_images": 0,
+            "new_classes": self.class_map.added,
+        }
+        self._made_dirs = set()
+
+    # -----------------------------
+    # FILE OPERATIONS (thread pool)
+    def _dir(self, kind, split):
+        path = self.dataset_path / kind / split
+        if path not in self._made_dirs:
+            path.mkdir(parents=True, exist_ok=True)
+            self._made_dirs.add(path)
+        return path
+
+    def _place_image(self, src, dst):
+        if self.link_images:
+            try:
+                if dst.exists():
+                    dst.unlink()
+                os.link(src, dst)
+                return
+            except OSError:
+                pass  # different filesystem → copy
+        write_queue.copy_file(src, dst)
+
+    def _write_item(self, src_image, split, lines):
+        src_image = Path(src_image)
+        self._place_image(src_image, self._dir("images", split) / src_image.name)
+        write_queue.write_text(self._dir("labels", split) / f"{src_image.stem}.txt", "\n".join(lines))
+        write_queue.wait_below(self.batch_size * 4)
+
+    def _submit(self, pool, pending, fn, *args):
+        pending.append(pool.submit(fn, *args))
+        while len(pending) > self.batch_size * 2:
+            pending.popleft().result()
+
+    @staticmethod
+    def _drain(pending):
+        while pending:
+            pending.popleft().result()
+
+    def _remap(self, names, boxes):
+        """YOLO lines + class ids for (source class, xc, yc, w, h) boxes."""
+        lines, class_ids = [], set()
+        for src_cls, xc, yc, w, h in boxes:
+            name = names(src_cls)
+            cls_id = self.class_map.id_for(name) if name is not None else None
+            if cls_id is None:
+                self.report["unknown_classes"] += 1
+                continue
+
+            box = clean_box(xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2)
+            if box is None:
+                self.report["dropped_boxes"] += 1
+                continue
+
+            lines.append(f"{cls_id} {box[0]:.6f} {box[1]:.6f} {box[2]:.6f} {box[3]:.6f}")
+            class_ids.add(cls_id)
+
+        self.report["boxes"] += len(lines)
+        return lines, class_ids
+
+    def _tick(self):
+        self.report["images"] += 1
+        if self.progress and self.report["images"] % 100 == 0:
+            self.progress(self.report["images"])
+
+    def _finish(self):
+        self.dataset_path.mkdir(parents=True, exist_ok=True)
+        save_classes(self.dataset_path, self.class_map.classes)
+        self.split_engine.save()
+        create_data_yaml(self.dataset_path)
+        write_queue.flush()  # raises if an image or label could not be written
+        DatasetIndex.for_dataset(self.dataset_path).rebuild(workers=self.workers)
+        if self.progress:
+            self.progress(self.report["images"])
+        return self.report
+
+    # -----------------------------
+    # YOLO
+    @staticmethod
+    def _yolo_names(src):
+        data_yaml = src / "data.yaml"
+        if data_yaml.exists():
+            import yaml
+            names = yaml.safe_load(data_yaml.read_text()).get("names", [])
+            if isinstance(names, dict):
+                return {int(k): v for k, v in names.items()}
+            return dict(enumerate(names))
+        classes_file = src / "classes.txt"
+        if classes_file.exists():
+            return dict(enumerate(classes_file.read_text().splitlines()))
+        raise FileNotFoundError("data.yaml or classes.txt not found in YOLO dataset")
+
+    @staticmethod
+    def _yolo_label_for(image_path, src):
+        # ultralytics convention: .../images/... → .../labels/...
+        rel = image_path.relative_to(src)
+        parts = ["labels" if p == "images" else p for p in rel.parts]
+        label = src.joinpath(*parts).with_suffix(".txt")
+        return label if label.exists() else image_path.with_suffix(".txt")
+
+    def import_yolo(self, src, keep_splits=True):
+        src = Path(src)
+        names = self._yolo_names(src)
+        images_root = src / "images" if (src / "images").exists() else src
+
+        def images():
+            for root, _, files in os.walk(images_root):
+                for f in sorted(files):
+                    if f.lower().endswith(IMAGE_EXTS):
+                        yield Path(root) / f
+
+        with ProcessPoolExecutor(**resources.pool_kwargs("background", self.workers)) as parsers, \
+                ThreadPoolExecutor(max_workers=self.workers * 2) as io_pool:
+            pending = deque()
+            batch = []
+
+            def flush():
+                labels = [str(self._yolo_label_for(p, src)) for p in batch]
+                for image_path, (boxes, bad) in zip(batch, parsers.map(_parse_yolo_label, labels, chunksize=32)):
+                    self.report["dropped_boxes"] += bad
+                    lines, class_ids = self._remap(names.get, boxes)
+
+                    split = image_path.parent.name
+                    if not keep_splits or split not in SPLITS:
+                        split = self.split_engine.assign(image_path.name, class_ids, save=False)
+
+                    self._submit(io_pool, pending, self._write_item, image_path, split, lines)
+                    self._tick()
+                batch.clear()
+
+            for image_path in images():
+                batch.append(image_path)
+                if len(batch) >= self.batch_size:
+                    flush()
+            flush()
+            self._drain(pending)
+
+        return self._finish()
+
+    # -----------------------------
+    # PASCAL VOC
+    def import_voc(self, src):
+        src = Path(src)
+        ann_dir = src / "Annotations" if (src / "Annotations").exists() else src
+        img_dir = src / "JPEGImages" if (src / "JPEGImages").exists() else src
+
+        xml_files = sorted(str(p) for p in ann_dir.glob("*.xml"))
+
+        with ProcessPoolExecutor(**resources.pool_kwargs("background", self.workers)) as parsers, \
+                ThreadPoolExecutor(max_workers=self.workers * 2) as io_pool:
+            pending = deque()
+            for xml_path, (filename, width, height, objects) in zip(
+                xml_files, parsers.map(_parse_voc_xml, xml_files, chunksize=64)
+            ):
+                image_path = img_dir / (filename or Path(xml_path).stem + ".jpg")
+                if not image_path.exists():
+                    self.report["missing_images"] += 1
+                    continue
+                if width <= 0 or height <= 0:
+                    from PIL import Image
+                    with Image.open(image_path) as img:
+                        width, height = img.size
+
+                boxes = [
+                    (name, (x1 + x2) / 2 / width, (y1 + y2) / 2 / height,
+                     (x2 - x1) / width, (y2 - y1) / height)
+                    for name, x1, y1, x2, y2 in objects
+                ]
+                lines, class_ids = self._remap(lambda name: name, boxes)
+                split = self.split_engine.assign(image_path.name, class_ids, save=False)
+
+                self._submit(io_pool, pending, self._write_item, image_path, split, lines)
+                self._tick()
+            self._drain(pending)
+
+        return self._finish()
+
+    # -----------------------------
+    # COCO
+    def import_coco(self, json_path, images_dir):
+        """
+        Three streaming passes over the JSON: categories, images, annotations.
+        Annotation lines are grouped per image, then every image is assigned
+        a split from its class ids and written once, like the YOLO/VOC paths.
+        Image entries without a usable width/height are skipped and counted.
+        """
+        images_dir = Path(images_dir)
+        categories = {c["id"]: c["name"] for c in iter_json_array(json_path, "categories")}
+
+        images = {}  # {image_id: (image path, width, height)}
+        for img in iter_json_array(json_path, "images"):
+            image_path = images_dir / Path(img["file_name"]).name
+            if not image_path.exists():
+                self.report["missing_images"] += 1
+                continue
+            width, height = img.get("width") or 0, img.get("height") or 0
+            if width <= 0 or height <= 0:
+                self.report["skipped_images"] += 1
+                continue
+            images[img["id"]] = (image_path, width, height)
+
+        grouped = {}  # {image_id: (lines, class ids)}
+        for ann in iter_json_array(json_path, "annotations"):
+            entry = images.get(ann.get("image_id"))
+            if entry is None or ann.get("iscrowd", 0):
+                continue
+            _, width, height = entry
+            x, y, w, h = ann["bbox"]
+            box = (categories.get(ann["category_id"]),
+                   (x + w / 2) / width, (y + h / 2) / height, w / width, h / height)
+
+            lines, class_ids = self._remap(lambda name: name, [box])
+            if not lines:
+                continue
+            image_lines, image_ids = grouped.setdefault(ann["image_id"], ([], set()))
+            image_lines.extend(lines)
+            image_ids.update(class_ids)
+
+        with ThreadPoolExecutor(max_workers=self.workers * 2) as io_pool:
+            pending = deque()
+            for image_id, (image_path, _, _) in images.items():
+                lines, class_ids = grouped.pop(image_id, ([], set()))
+                split = self.split_engine.assign(image_path.name, class_ids, save=False)
+
+                self._submit(io_pool, pending, self._write_item, image_path, split, lines)
+                self._tick()
+            self._drain(pending)
+
+        return self._finish()
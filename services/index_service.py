@@ -0,0 +1,425 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from core.logger import logger
+from core.resources import resources
+from services.io_service import write_queue
+from services.split_service import SPLITS
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Bumped whenever the tables change; an older index.db is dropped and rebuilt
+SCHEMA_VERSION = 2
+
+
+def _tables_sql(suffix=""):
+    # Two splits may hold images with the same file name: (split, name) is the key
+    return f"""
+CREATE TABLE IF NOT EXISTS images{suffix} (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    split TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    mtime REAL NOT NULL DEFAULT 0,
+    n_boxes INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (split, name)
+);
+CREATE TABLE IF NOT EXISTS boxes{suffix} (
+    image_id INTEGER NOT NULL,
+    class_id INTEGER NOT NULL,
+    xc REAL NOT NULL,
+    yc REAL NOT NULL,
+    w REAL NOT NULL,
+    h REAL NOT NULL,
+    min_side_px REAL NOT NULL
+);
+-- Images rebuild() could not read: counted by reconcile(), never queried
+CREATE TABLE IF NOT EXISTS unreadable{suffix} (
+    name TEXT NOT NULL,
+    split TEXT NOT NULL
+);
+"""
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+""" + _tables_sql() + """
+CREATE INDEX IF NOT EXISTS idx_boxes_image ON boxes(image_id);
+CREATE INDEX IF NOT EXISTS idx_boxes_class_image ON boxes(class_id, image_id);
+CREATE INDEX IF NOT EXISTS idx_boxes_min_side ON boxes(min_side_px);
+CREATE INDEX IF NOT EXISTS idx_images_split ON images(split);
+
+-- Per-class box counts kept up to date by triggers: histograms never scan boxes
+CREATE TABLE IF NOT EXISTS class_stats (
+    class_id INTEGER PRIMARY KEY,
+    n_boxes INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS trg_boxes_insert AFTER INSERT ON boxes BEGIN
+    INSERT OR IGNORE INTO class_stats (class_id, n_boxes) VALUES (NEW.class_id, 0);
+    UPDATE class_stats SET n_boxes = n_boxes + 1 WHERE class_id = NEW.class_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_boxes_delete AFTER DELETE ON boxes BEGIN
+    UPDATE class_stats SET n_boxes = n_boxes - 1 WHERE class_id = OLD.class_id;
+END;
+"""
+
+
+def _scan_label(job):
+    """
+    Worker: (name, split, mtime, width, height, boxes) for one image, or
+    (image path, error) if the image or its label file cannot be read.
+    """
+    image_path, label_path, split = job
+    from PIL import Image
+
+    try:
+        with Image.open(image_path) as img:  # header only
+            width, height = img.size
+
+        boxes = []
+        if os.path.exists(label_path):
+            with open(label_path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 5:
+                        boxes.append((int(parts[0]), *map(float, parts[1:])))
+        mtime = os.path.getmtime(label_path) if os.path.exists(label_path) else 0.0
+    except (OSError, ValueError) as e:
+        return image_path, str(e)
+    return os.path.basename(image_path), split, mtime, width, height, boxes
+
+
+class DatasetIndex:
+    """
+    Persistent sqlite index (<dataset>/index.db) of images, boxes and classes.
+
+    Label writers call update_image() after every save so the index never
+    needs a walk over labels/. rebuild() re-creates it from disk in parallel.
+    Use DatasetIndex.for_dataset() to share one instance per dataset.
+
+    The index is only authoritative once reconcile() has checked it against
+    images/ on disk (rebuilding it if they disagree); `ready` is set from
+    then on. Until then, callers that need every image read the folders.
+    """
+
+    _instances = {}
+
+    @classmethod
+    def for_dataset(cls, dataset_path):
+        key = Path(dataset_path).resolve()
+        if key not in cls._instances:
+            cls._instances[key] = cls(dataset_path)
+        return cls._instances[key]
+
+    def __init__(self, dataset_path):
+        self.dataset_path = Path(dataset_path)
+        self.dataset_path.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.ready = threading.Event()
+        self._reconcile_lock = threading.Lock()
+        self.conn = sqlite3.connect(self.dataset_path / "index.db", check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Older layout: start empty, reconcile() rebuilds it from disk
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS boxes; DROP TABLE IF EXISTS images; DROP TABLE IF EXISTS class_stats;"
+                "DROP TABLE IF EXISTS unreadable;"
+            )
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
+
+    # -----------------------------
+    # WRITES
+    def sync_classes(self, classes):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM classes")
+            self.conn.executemany("INSERT INTO classes (id, name) VALUES (?, ?)", list(enumerate(classes)))
+
+    def _insert_image(self, name, split, width, height, boxes, mtime):
+        self.conn.execute(
+            "DELETE FROM boxes WHERE image_id = (SELECT id FROM images WHERE split = ? AND name = ?)",
+            (split, name),
+        )
+        self.conn.execute(
+            """INSERT INTO images (name, split, width, height, mtime, n_boxes)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(split, name) DO UPDATE SET
+                   width = excluded.width, height = excluded.height,
+                   mtime = excluded.mtime, n_boxes = excluded.n_boxes""",
+            (name, split, width, height, mtime, len(boxes)),
+        )
+        image_id = self.conn.execute(
+            "SELECT id FROM images WHERE split = ? AND name = ?", (split, name)
+        ).fetchone()[0]
+        self.conn.executemany(
+            "INSERT INTO boxes (image_id, class_id, xc, yc, w, h, min_side_px) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (image_id, cls_id, xc, yc, w, h, min(w * width, h * height))
+                for cls_id, xc, yc, w, h in boxes
+            ],
+        )
+
+    def update_image(self, image_name, split, width, height, boxes, mtime=None):
+        """
+        Replace one image's entry.
+        boxes: [(cls_id, xc, yc, w, h)] normalized, as written to the label file.
+        """
+        mtime = mtime if mtime is not None else 0.0
+        with self.lock, self.conn:
+            self._insert_image(Path(image_name).name, split, width, height, boxes, mtime)
+
+    def set_split(self, image_name, old_split, new_split):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE images SET split = ? WHERE split = ? AND name = ?",
+                (new_split, old_split, Path(image_name).name),
+            )
+
+    def remove_image(self, image_name, split=None):
+        """Drop an image from one split, or from every split when `split` is None."""
+        where, params = "name = ?", [Path(image_name).name]
+        if split is not None:
+            where += " AND split = ?"
+            params.append(split)
+        with self.lock, self.conn:
+            self.conn.execute(f"DELETE FROM boxes WHERE image_id IN (SELECT id FROM images WHERE {where})", params)
+            self.conn.execute(f"DELETE FROM images WHERE {where}", params)
+
+    def _bulk_insert(self, image_rows, box_rows, suffix=""):
+        self.conn.executemany(
+            f"INSERT INTO images{suffix} (id, name, split, width, height, mtime, n_boxes) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            image_rows,
+        )
+        self.conn.executemany(
+            f"INSERT INTO boxes{suffix} (image_id, class_id, xc, yc, w, h, min_side_px) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            box_rows,
+        )
+        image_rows.clear()
+        box_rows.clear()
+
+    def _image_jobs(self):
+        """(image path, label path, split) for every image file under images/<split>."""
+        jobs = []
+        for split in SPLITS:
+            images_dir = self.dataset_path / "images" / split
+            if not images_dir.exists():
+                continue
+            labels_dir = self.dataset_path / "labels" / split
+            for entry in os.scandir(images_dir):
+                if entry.name.lower().endswith(IMAGE_EXTS):
+                    stem = os.path.splitext(entry.name)[0]
+                    jobs.append((entry.path, str(labels_dir / f"{stem}.txt"), split))
+        return jobs
+
+    def rebuild(self, workers=None, chunk_size=2048):
+        """
+        Re-index the whole dataset from images/ and labels/.
+
+        Parsing runs on a process pool into fresh tables; an image that cannot
+        be read is logged and left out. The new tables replace the old ones in
+        a single transaction, so a failure leaves the previous index intact.
+        Returns the number of images indexed.
+        """
+        write_queue.flush()
+        jobs = self._image_jobs()
+
+        classes_file = self.dataset_path / "classes.txt"
+        classes = classes_file.read_text().splitlines() if classes_file.exists() else []
+
+        with self.lock:
+            drop_new = (
+                "DROP TABLE IF EXISTS boxes_new; DROP TABLE IF EXISTS images_new;"
+                "DROP TABLE IF EXISTS unreadable_new;"
+            )
+            self.conn.executescript(drop_new + _tables_sql("_new"))
+            indexed, failed = 0, 0
+            try:
+                with self.conn:
+                    image_rows, box_rows = [], []
+                    with ProcessPoolExecutor(**resources.pool_kwargs("background", workers)) as pool:
+                        results = pool.map(_scan_label, jobs, chunksize=max(1, chunk_size // 8))
+                        for (image_path, _, image_split), result in zip(jobs, results):
+                            if len(result) == 2:
+                                failed += 1
+                                logger.warning(f"Index: skipped {image_path}: {result[1]}")
+                                self.conn.execute(
+                                    "INSERT INTO unreadable_new (name, split) VALUES (?, ?)",
+                                    (os.path.basename(image_path), image_split),
+                                )
+                                continue
+                            name, split, mtime, width, height, boxes = result
+                            indexed += 1
+                            image_rows.append((indexed, name, split, width, height, mtime, len(boxes)))
+                            box_rows.extend(
+                                (indexed, cls_id, xc, yc, w, h, min(w * width, h * height))
+                                for cls_id, xc, yc, w, h in boxes
+                            )
+                            if len(image_rows) >= chunk_size:
+                                self._bulk_insert(image_rows, box_rows, "_new")
+                        self._bulk_insert(image_rows, box_rows, "_new")
+
+                # Swap: dropping is much faster than row-by-row deletes (and their triggers)
+                self.conn.executescript(
+                    "BEGIN;"
+                    "DROP TABLE boxes; DROP TABLE images; DROP TABLE class_stats; DROP TABLE unreadable;"
+                    "ALTER TABLE images_new RENAME TO images; ALTER TABLE boxes_new RENAME TO boxes;"
+                    "ALTER TABLE unreadable_new RENAME TO unreadable;"
+                    + SCHEMA +
+                    "INSERT INTO class_stats (class_id, n_boxes) SELECT class_id, COUNT(*) FROM boxes GROUP BY class_id;"
+                    "COMMIT;"
+                )
+            except BaseException:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                self.conn.executescript(drop_new)
+                raise
+            self.sync_classes(classes)
+            self.conn.execute("ANALYZE")
+        if failed:
+            logger.warning(f"Index: {failed} unreadable image(s) left out of {self.dataset_path}")
+        self.ready.set()
+        return indexed
+
+    def reconcile(self, workers=None):
+        """
+        Make the index authoritative: rebuild it unless its per-split image
+        counts match images/ on disk. Cheap once `ready`; concurrent callers
+        wait for the first. Returns True if it rebuilt.
+        """
+        with self._reconcile_lock:
+            if self.ready.is_set():
+                return False
+            write_queue.flush()
+            on_disk = {}
+            for _, _, split in self._image_jobs():
+                on_disk[split] = on_disk.get(split, 0) + 1
+            indexed = self.split_counts()
+            with self.lock:
+                for split, n in self.conn.execute("SELECT split, COUNT(*) FROM unreadable GROUP BY split"):
+                    indexed[split] = indexed.get(split, 0) + n
+            if on_disk == indexed:
+                self.ready.set()
+                return False
+            logger.info(f"Index: {self.dataset_path} out of date, rebuilding")
+            self.rebuild(workers)
+            return True
+
+    # -----------------------------
+    # QUERIES
+    def class_names(self):
+        return dict(self.conn.execute("SELECT id, name FROM classes").fetchall())
+
+    def _class_id(self, class_ref):
+        if isinstance(class_ref, int):
+            return class_ref
+        row = self.conn.execute("SELECT id FROM classes WHERE name = ?", (class_ref,)).fetchone()
+        return row[0] if row else -1
+
+    def image_path(self, name, split):
+        return str(self.dataset_path / "images" / split / name)
+
+    def images_with_class(self, class_ref, split=None):
+        """Paths of images containing a class (id or name)."""
+        query = """SELECT i.name, i.split FROM images i
+                   WHERE i.id IN (SELECT image_id FROM boxes WHERE class_id = ?)"""
+        params = [self._class_id(class_ref)]
+        if split:
+            query += " AND i.split = ?"
+            params.append(split)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY i.name", params).fetchall()
+        return [self.image_path(name, s) for name, s in rows]
+
+    def unlabeled_images(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT name, split FROM images WHERE n_boxes = 0 ORDER BY name").fetchall()
+        return [self.image_path(name, s) for name, s in rows]
+
+    def count_small_boxes(self, max_side_px):
+        """Boxes whose shorter side is below `max_side_px` pixels."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM boxes WHERE min_side_px < ?", (max_side_px,)
+            ).fetchone()[0]
+
+    def class_histogram(self):
+        """{class name: box count}"""
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT COALESCE(c.name, s.class_id), s.n_boxes FROM class_stats s
+                   LEFT JOIN classes c ON c.id = s.class_id
+                   WHERE s.n_boxes > 0 ORDER BY s.class_id"""
+            ).fetchall()
+        return {str(name): n for name, n in rows}
+
+    def class_image_counts(self):
+        """[(class name, n_images)] for classes that appear in at least one image."""
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT COALESCE(c.name, b.class_id), COUNT(DISTINCT b.image_id) FROM boxes b
+                   LEFT JOIN classes c ON c.id = b.class_id
+                   GROUP BY b.class_id ORDER BY 1"""
+            ).fetchall()
+        return [(str(name), n) for name, n in rows]
+
+    def split_counts(self):
+        """{split: n_images}"""
+        with self.lock:
+            return dict(self.conn.execute("SELECT split, COUNT(*) FROM images GROUP BY split").fetchall())
+
+    def image_names(self):
+        """Set of every indexed (i.e. annotated) image file name."""
+        with self.lock:
+            return {name for (name,) in self.conn.execute("SELECT name FROM images")}
+
+    def image_class_ids(self):
+        """Yield (name, split, {class ids}) for every image; used by split rebalancing."""
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT i.name, i.split, GROUP_CONCAT(DISTINCT b.class_id) FROM images i
+                   LEFT JOIN boxes b ON b.image_id = i.id GROUP BY i.id"""
+            ).fetchall()
+        for name, split, ids in rows:
+            yield name, split, {int(c) for c in ids.split(",")} if ids else set()
+
+    def iter_records(self, page_size=1000):
+        """ImageRecords straight from the index (no label files read); used by exporters."""
+        from formats.base_format import ImageRecord
+
+        last_id = 0
+        while True:
+            with self.lock:
+                images = self.conn.execute(
+                    "SELECT id, name, split, width, height FROM images WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, page_size),
+                ).fetchall()
+                if not images:
+                    return
+                boxes = {}
+                for row in self.conn.execute(
+                    "SELECT image_id, class_id, xc, yc, w, h FROM boxes WHERE image_id BETWEEN ? AND ?",
+                    (images[0][0], images[-1][0]),
+                ):
+                    boxes.setdefault(row[0], []).append(row[1:])
+
+            for image_id, name, split, width, height in images:
+                yield ImageRecord(self.image_path(name, split), split, width, height, boxes.get(image_id, []))
+            last_id = images[-1][0]
+
+    def is_empty(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM images LIMIT 1").fetchone() is None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+        self._instances.pop(self.dataset_path.resolve(), None)
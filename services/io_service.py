@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from core.logger import logger
+from utils.file_utils import atomic_copy, atomic_write_bytes, fsync_dir
+
+
+class WriteBehindQueue:
+    """
+    Write-behind queue for small dataset files (labels, classes.txt, data.yaml)
+    and image copies.
+
+    - write_text()/copy_file() return immediately; the latest request for a
+      path replaces any older one that has not been written yet
+    - a background thread writes batches through temp files + atomic rename
+      (fsync'd file, then one fsync per directory), so a crash leaves either
+      the old or the new file, never a truncated one
+    - read_text()/exists() see queued content, so callers can read their own writes
+    - flush() blocks until every path queued before it is on disk
+    - failed writes are reported to error listeners (fn(path, error), called
+      on the writer thread) as well as raised by the next flush()
+    """
+
+    def __init__(self, batch_delay=0.05, max_batch=512, workers=4):
+        self.batch_delay = batch_delay
+        self.max_batch = max_batch
+        self.workers = workers
+
+        self._cond = threading.Condition()
+        self._pending = {}     # path -> (seq, ("bytes", data) | ("copy", src))
+        self._inflight = {}
+        self._queued_seq = 0
+        self._errors = []
+        self._listeners = []
+        self._stopped = False
+        self._thread = None
+
+    # -----------------------------
+    # PUBLIC API
+    def write_text(self, path, text, encoding="utf-8"):
+        self._enqueue(path, ("bytes", text.encode(encoding)))
+
+    def write_bytes(self, path, data):
+        self._enqueue(path, ("bytes", bytes(data)))
+
+    def copy_file(self, src, dst):
+        self._enqueue(dst, ("copy", os.fspath(src)))
+
+    def read_text(self, path, encoding="utf-8"):
+        """Queued content if a write is pending, the file on disk otherwise."""
+        op = self._lookup(path)
+        if op is not None and op[0] == "bytes":
+            return op[1].decode(encoding)
+        if op is not None:
+            return Path(op[1]).read_text(encoding=encoding)
+        return Path(path).read_text(encoding=encoding)
+
+    def exists(self, path):
+        return self._lookup(path) is not None or os.path.exists(path)
+
+    def subscribe_errors(self, listener):
+        self._listeners.append(listener)
+
+    def flush(self, timeout=None):
+        """
+        Wait until every path with a write queued so far is durable on disk.
+        A queued write that is replaced by a newer one for the same path is
+        only done once that newer one is written. Raises OSError if any
+        write failed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            paths = set(self._pending) | set(self._inflight)
+            self._cond.notify_all()
+            while any(p in self._pending or p in self._inflight for p in paths):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for pending writes")
+                self._cond.wait(remaining)
+
+            errors, self._errors = self._errors, []
+        if errors:
+            path, err = errors[0]
+            raise OSError(f"{len(errors)} write(s) failed, first: {path}: {err}") from err
+
+    def wait_below(self, n):
+        """Block while more than `n` writes are queued (back-pressure for bulk writers)."""
+        with self._cond:
+            while len(self._pending) > n:
+                self._cond.wait()
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # -----------------------------
+    # INTERNALS
+    def _enqueue(self, path, op):
+        key = os.path.abspath(path)
+        with self._cond:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            self._queued_seq += 1
+            self._pending.pop(key, None)  # re-insert: keep queue order = last write order
+            self._pending[key] = (self._queued_seq, op)
+            self._cond.notify_all()
+
+    def _lookup(self, path):
+        key = os.path.abspath(path)
+        with self._cond:
+            entry = self._pending.get(key) or self._inflight.get(key)
+            return entry[1] if entry else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if not self._pending and self._stopped:
+                    return
+
+            # Let bursts of saves pile up so repeated writes coalesce
+            time.sleep(self.batch_delay)
+
+            with self._cond:
+                keys = list(self._pending)[: self.max_batch]
+                batch = {k: self._pending.pop(k) for k in keys}
+                self._inflight = batch
+
+            errors = self._write_batch(batch)
+
+            with self._cond:
+                self._inflight = {}
+                self._errors.extend(errors)
+                self._cond.notify_all()
+            for path, error in errors:
+                for listener in self._listeners:
+                    listener(path, error)
+
+    @staticmethod
+    def _write_one(path, kind, payload):
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            if kind == "bytes":
+                atomic_write_bytes(path, payload, sync_dir=False)
+            else:
+                atomic_copy(payload, path, sync_dir=False)
+        except OSError as e:
+            logger.error("Write failed for %s: %s", path, e)
+            return e
+        return None
+
+    def _write_batch(self, batch):
+        # Paths in a batch are distinct, so they can be written in any order
+        items = [(path, kind, payload) for path, (_, (kind, payload)) in batch.items()]
+        if len(items) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(lambda item: self._write_one(*item), items))
+        else:
+            results = [self._write_one(*item) for item in items]
+
+        errors = [(item[0], e) for item, e in zip(items, results) if e is not None]
+        dirs = {os.path.dirname(item[0]) for item, e in zip(items, results) if e is None}
+        for d in dirs:
+            try:
+                fsync_dir(d)
+            except OSError as e:
+                errors.append((d, e))
+        return errors
+
+
+# Shared queue used by the UI and the dataset services
+write_queue = WriteBehindQueue()
@@ -0,0 +1,151 @@
+import os
+import queue
+import threading
+import time
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class DirectoryScanner:
+    """
+    Lists image files on a worker thread with os.scandir and streams them
+    out in batches, so the first images of a huge (or network) folder are
+    usable long before the walk finishes.
+
+    Directories are walked depth-first in sorted order. A directory's files
+    go out in sorted batches while scandir is still listing it, so a folder
+    of a million files shows its first images immediately; the initial
+    walk costs no stat calls. After the walk the thread keeps serving
+    rescan(directory) requests (e.g. from a QFileSystemWatcher): only files
+    not reported before are emitted, and files modified less than `settle`
+    seconds ago (still being copied by a camera or a sync tool) are
+    retried later.
+
+    poll() → (new image paths, new directories), never blocks.
+    """
+
+    def __init__(self, root, recursive=False, exts=IMAGE_EXTS, batch_size=256, settle=1.0):
+        self.root = os.path.abspath(root)
+        self.recursive = recursive
+        self.exts = tuple(e.lower() for e in exts)
+        self.batch_size = batch_size
+        self.settle = settle
+
+        self.walk_done = False
+        self._seen = set()
+        self._dirs = set()
+        self._out = queue.Queue()
+        self._requests = queue.Queue()
+        self._deferred = {}   # directory → time to rescan it
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -----------------------------
+    # CONTROL
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._requests.put(None)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def rescan(self, directory):
+        self._requests.put(os.path.abspath(directory))
+
+    def poll(self):
+        paths, dirs = [], []
+        while True:
+            try:
+                kind, items = self._out.get_nowait()
+            except queue.Empty:
+                break
+            (paths if kind == "files" else dirs).extend(items)
+        return paths, dirs
+
+    # -----------------------------
+    # WORKER
+    def _list_dir(self, directory, settle=True):
+        """
+        Emit the new image paths in `directory`, a batch at a time as scandir
+        yields them, and return its sorted sub-directories. With `settle`,
+        recently modified files are left for a later rescan; that needs a
+        stat per file, so the initial walk goes without.
+        """
+        batch, subdirs = [], []
+        now = time.time()
+        unsettled = False
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if self._stop.is_set():
+                        break
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(self.exts) and entry.path not in self._seen:
+                            if settle and self.settle and now - entry.stat().st_mtime < self.settle:
+                                unsettled = True
+                                continue
+                            batch.append(entry.path)
+                    except OSError:
+                        continue
+                    if len(batch) >= self.batch_size:
+                        self._emit_files(batch)
+                        batch = []
+        except OSError:
+            pass
+        self._emit_files(batch)
+        if unsettled:
+            self._deferred[directory] = now + self.settle
+        subdirs.sort()
+        return subdirs
+
+    def _emit_files(self, files):
+        if files:
+            files.sort()
+            self._seen.update(files)
+            self._out.put(("files", files))
+
+    def _walk(self, root, settle=True):
+        stack = [root]
+        while stack and not self._stop.is_set():
+            directory = stack.pop()
+            self._dirs.add(directory)
+            self._out.put(("dirs", [directory]))
+            subdirs = self._list_dir(directory, settle)
+            if self.recursive:
+                stack.extend(reversed(subdirs))
+
+    def _run(self):
+        self._walk(self.root, settle=False)
+        self.walk_done = True
+
+        while not self._stop.is_set():
+            timeout = None
+            if self._deferred:
+                timeout = max(0.0, min(self._deferred.values()) - time.time())
+            try:
+                directory = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                directory = None
+            if self._stop.is_set():
+                break
+
+            now = time.time()
+            todo = {d for d, due in self._deferred.items() if due <= now}
+            for d in todo:
+                del self._deferred[d]
+            if directory is not None:
+                todo.add(directory)
+
+            for d in sorted(todo):
+                subdirs = self._list_dir(d)
+                if self.recursive:
+                    # A new sub-folder (e.g. a dated camera folder) is walked whole
+                    for sub in subdirs:
+                        if sub not in self._dirs:
+                            self._walk(sub)
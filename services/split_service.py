@@ -0,0 +1,295 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from services.io_service import write_queue
+
+SPLITS = ("train", "val", "test")
+DEFAULT_RATIOS = {"train": 0.8, "val": 0.2, "test": 0.0}
+
+
+def hash_fraction(key, seed=""):
+    """
+    Stable position of `key` in [0, 1).
+    Same name + seed always lands in the same place, on every machine.
+    Keys are file stems, since labels/<split>/<stem>.txt is what identifies an image.
+    """
+    digest = hashlib.blake2b(f"{seed}:{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def split_for_fraction(u, ratios):
+    """
+    Map a hash fraction onto the cumulative ratio intervals (train | val | test).
+    Changing the ratios only moves the images whose fraction falls between
+    the old and new boundaries.
+    """
+    total = sum(ratios.get(s, 0.0) for s in SPLITS) or 1.0
+    edge = 0.0
+    for split in SPLITS:
+        edge += ratios.get(split, 0.0) / total
+        if u < edge:
+            return split
+    # Float rounding at the top edge: the last split that takes images
+    return next((s for s in reversed(SPLITS) if ratios.get(s, 0.0) > 0), "train")
+
+
+def active_splits(ratios):
+    """Splits with a ratio above zero (the only ones images are ever assigned to)."""
+    return [s for s in SPLITS if ratios.get(s, 0.0) > 0]
+
+
+def _label_class_ids(text):
+    return {int(line.split()[0]) for line in text.splitlines() if line.strip()}
+
+
+class SplitEngine:
+    """
+    Deterministic train/val/test assignment for a YOLO dataset folder.
+
+    Settings (ratios, seed, stratify) and per-class counters live in
+    `<dataset>/split.json`. Assigning an image never walks the dataset:
+    it is a hash (or a counter lookup when stratifying) plus a stat() per split.
+    Thread-safe, so background jobs can label images alongside the GUI.
+    """
+
+    def __init__(self, dataset_path):
+        self.dataset_path = Path(dataset_path)
+        self.config_file = self.dataset_path / "split.json"
+        self._lock = threading.RLock()
+        self.reload()
+
+    # -----------------------------
+    # CONFIG
+    def reload(self):
+        """Re-read split.json (e.g. after an import saved it through another SplitEngine)."""
+        with self._lock:
+            self.ratios = dict(DEFAULT_RATIOS)
+            self.seed = ""
+            self.stratify = False
+            self.counts = {}  # {class_id: {split: n}}
+            self._load()
+
+    def _load(self):
+        if not write_queue.exists(self.config_file):
+            return
+        data = json.loads(write_queue.read_text(self.config_file))
+        self.ratios = {s: float(data.get("ratios", {}).get(s, 0.0)) for s in SPLITS}
+        self.seed = data.get("seed", "")
+        self.stratify = bool(data.get("stratify", False))
+        self.counts = {int(k): v for k, v in data.get("counts", {}).items()}
+
+    def save(self):
+        self.dataset_path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = json.dumps({
+                "ratios": self.ratios,
+                "seed": self.seed,
+                "stratify": self.stratify,
+                "counts": {str(k): v for k, v in sorted(self.counts.items())},
+            }, indent=2)
+        write_queue.write_text(self.config_file, data)
+
+    def configure(self, ratios=None, seed=None, stratify=None):
+        if ratios is not None:
+            unknown = set(ratios) - set(SPLITS)
+            if unknown:
+                raise ValueError(f"Unknown split(s): {', '.join(sorted(unknown))}")
+            if any(r < 0 for r in ratios.values()) or sum(ratios.values()) <= 0:
+                raise ValueError("Split ratios must be non-negative and sum to > 0")
+        with self._lock:
+            if ratios is not None:
+                self.ratios = {s: float(ratios.get(s, 0.0)) for s in SPLITS}
+            if seed is not None:
+                self.seed = seed
+            if stratify is not None:
+                self.stratify = stratify
+            self.save()
+
+    # -----------------------------
+    # ASSIGNMENT
+    def locate(self, image_name):
+        """Split that already holds this image's label file, or None."""
+        stem = Path(image_name).stem
+        for split in SPLITS:
+            if write_queue.exists(self.dataset_path / "labels" / split / f"{stem}.txt"):
+                return split
+        return None
+
+    def assign(self, image_name, class_ids=(), save=True):
+        """
+        Split for `image_name`. Images already in the dataset keep their split,
+        so re-saving never moves files (the per-class counts follow the new
+        classes). Bulk callers pass save=False and call save() once at the end.
+        """
+        with self._lock:
+            return self._assign(image_name, class_ids, save)
+
+    def _assign(self, image_name, class_ids, save):
+        class_ids = sorted(set(int(c) for c in class_ids))
+        existing = self.locate(image_name)
+        if existing:
+            if self.stratify:
+                self._recount(image_name, existing, class_ids, save)
+            return existing
+
+        if not self.stratify or not class_ids:
+            return split_for_fraction(hash_fraction(Path(image_name).stem, self.seed), self.ratios)
+
+        # Stratified: balance the image's rarest class first
+        rare = min(class_ids, key=lambda c: sum(self.counts.get(c, {}).values()))
+        split = self._most_needed_split(self.counts.get(rare, {}), image_name)
+
+        for cid in class_ids:
+            per_class = self.counts.setdefault(cid, {})
+            per_class[split] = per_class.get(split, 0) + 1
+        if save:
+            self.save()
+        return split
+
+    def _recount(self, image_name, split, class_ids, save):
+        """Move a re-saved image's counts from its old classes to `class_ids`."""
+        label = self.dataset_path / "labels" / split / f"{Path(image_name).stem}.txt"
+        old = _label_class_ids(write_queue.read_text(label))
+        if old == set(class_ids):
+            return
+        for cid in old - set(class_ids):
+            per_class = self.counts.get(cid, {})
+            if per_class.get(split, 0) > 0:
+                per_class[split] -= 1
+        for cid in set(class_ids) - old:
+            per_class = self.counts.setdefault(cid, {})
+            per_class[split] = per_class.get(split, 0) + 1
+        if save:
+            self.save()
+
+    def _most_needed_split(self, counts, image_name):
+        total = sum(counts.values()) + 1
+        weight = sum(self.ratios.values())
+        preferred = split_for_fraction(hash_fraction(Path(image_name).stem, self.seed), self.ratios)
+
+        def need(split):
+            return round(self.ratios[split] / weight * total - counts.get(split, 0), 9)
+
+        candidates = [s for s in SPLITS if self.ratios.get(s, 0.0) > 0]
+        return max(candidates, key=lambda s: (need(s), s == preferred))
+
+    # -----------------------------
+    # REBALANCE
+    def _scan(self):
+        """[(image_path, label_path, split, class_ids)] for every labelled image."""
+        entries = []
+        for split in SPLITS:
+            labels_dir = self.dataset_path / "labels" / split
+            images_dir = self.dataset_path / "images" / split
+            if not labels_dir.exists():
+                continue
+            images = {}
+            if images_dir.exists():
+                images = {p.stem: p for p in images_dir.iterdir() if p.is_file()}
+            for label_path in labels_dir.glob("*.txt"):
+                class_ids = _label_class_ids(label_path.read_text())
+                entries.append((images.get(label_path.stem), label_path, split, class_ids))
+        return entries
+
+    def _entries_from_index(self, index):
+        """Same shape as _scan(), answered by the dataset index without reading labels."""
+        entries = []
+        for name, split, class_ids in index.image_class_ids():
+            image = self.dataset_path / "images" / split / name
+            label = self.dataset_path / "labels" / split / f"{Path(name).stem}.txt"
+            entries.append((image if image.exists() else None, label, split, class_ids))
+        return entries
+
+    def rebalance(self, ratios=None, stratify=None, index=None):
+        """
+        Re-split the dataset to new ratios while moving as few files as possible.
+        Pass a DatasetIndex to skip reading every label file (it is kept in
+        sync); it is only used once it is `ready`.
+        Returns the number of images moved.
+        """
+        with self._lock:
+            return self._rebalance(ratios, stratify, index)
+
+    def _rebalance(self, ratios, stratify, index):
+        self.configure(ratios=ratios, stratify=stratify)
+        write_queue.flush()  # files are moved on disk below
+        if index is not None and not index.ready.is_set():
+            index.reconcile()
+        entries = self._entries_from_index(index) if index is not None else self._scan()
+
+        if self.stratify:
+            targets = self._stratified_targets(entries)
+        else:
+            targets = [
+                split_for_fraction(hash_fraction(label.stem, self.seed), self.ratios)
+                for image, label, _, _ in entries
+            ]
+
+        moved = 0
+        for (image, label, split, _), target in zip(entries, targets):
+            if target == split:
+                continue
+            self._move(label, self.dataset_path / "labels" / target / label.name)
+            if image is not None:
+                self._move(image, self.dataset_path / "images" / target / image.name)
+                if index is not None:
+                    index.set_split(image.name, split, target)
+            moved += 1
+
+        self.counts = {}
+        for (_, _, _, class_ids), target in zip(entries, targets):
+            for cid in class_ids:
+                per_class = self.counts.setdefault(cid, {})
+                per_class[target] = per_class.get(target, 0) + 1
+        self.save()
+        self.write_data_yaml()
+        return moved
+
+    def _stratified_targets(self, entries):
+        totals = {}
+        for _, _, _, class_ids in entries:
+            for cid in class_ids:
+                totals[cid] = totals.get(cid, 0) + 1
+
+        # Group each image under its rarest class, then fill per-group quotas,
+        # keeping images where they already are whenever the quota allows
+        groups = {}
+        for i, (image, label, _, class_ids) in enumerate(entries):
+            key = min(class_ids, key=lambda c: totals[c]) if class_ids else None
+            groups.setdefault(key, []).append(i)
+
+        weight = sum(self.ratios.values())
+        active = active_splits(self.ratios)
+        largest = max(active, key=lambda s: self.ratios[s])
+        targets = [None] * len(entries)
+        for members in groups.values():
+            members.sort(key=lambda i: hash_fraction(entries[i][1].stem, self.seed))
+            quota = {s: round(self.ratios.get(s, 0.0) / weight * len(members)) for s in SPLITS}
+            # Rounding remainder goes to the largest split, never to a disabled one
+            quota[largest] += len(members) - sum(quota.values())
+
+            overflow = []
+            for i in members:
+                current = entries[i][2]
+                if quota.get(current, 0) > 0:
+                    targets[i] = current
+                    quota[current] -= 1
+                else:
+                    overflow.append(i)
+            for i in overflow:
+                split = max(active, key=lambda s: quota[s])
+                targets[i] = split
+                quota[split] -= 1
+        return targets
+
+    @staticmethod
+    def _move(src, dst):
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        src.replace(dst)
+
+    # -----------------------------
+    def write_data_yaml(self):
+        from services.dataset_service import create_data_yaml
+        create_data_yaml(self.dataset_path)
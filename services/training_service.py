@@ -1,12 +1,246 @@
+import multiprocessing as mp
+import queue
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
 
-def train_yolo(data_yaml, base_model, output_dir):
+from core.exceptions import TrainingCancelled
+from core.logger import logger
+from core.resources import resources
+from services.cache_service import IMAGE_EXTS, TRAINING_CACHE_DIR, ImageCache
+
+
+@dataclass
+class TrainingConfig:
+    data_yaml: str
+    base_model: str
+    output_dir: str
+    epochs: int = 30
+    imgsz: int = 640
+    batch: int = 16
+    workers: int = 8
+    device: object = None     # None → resources.device_for("training") in the training process
+    name: str = "v1"
+    resume: bool = False      # continue from latest_checkpoint(output_dir)
+    shard_root: str = None    # "Training shards" export to stage and train on instead of data_yaml
+    stage_dir: str = None     # where shards are unpacked; None → <output_dir>/staged_dataset
+    image_cache: bool = False # train on model-resolution copies (ImageCache) instead of decoding JPEGs
+
+
+def latest_checkpoint(output_dir):
+    """Newest <output_dir>/<run>/weights/last.pt, or None."""
+    checkpoints = list(Path(output_dir).glob("*/weights/last.pt"))
+    if not checkpoints:
+        return None
+    return max(checkpoints, key=lambda p: p.stat().st_mtime)
+
+
+def train_yolo(data_yaml, base_model, output_dir, shard_root=None, stage_dir=None, image_cache=None,
+               epochs=30, imgsz=None, batch=16, workers=8, device=None, name="v1",
+               resume_from=None, callbacks=None):
+    """
+    Train with ultralytics. With `shard_root` (a "Training shards" export) the
+    shards are first unpacked to `stage_dir` (fast local disk) with sequential
+    reads, and that copy is trained on instead of `data_yaml`.
+
+    With `image_cache` (services.cache_service.ImageCache) the dataset is
+    cached at model resolution first and training runs on the cache's
+    ultralytics view, whose <image>.npy files are read instead of decoding
+    full-size JPEGs every epoch. The dataset folder itself is left untouched.
+
+    `resume_from` is a last.pt checkpoint; ultralytics then continues that run
+    with its original arguments. `callbacks` maps ultralytics event names to
+    functions taking the trainer.
+
+    Blocks until training finishes; the UI goes through TrainingJob instead.
+    """
     from ultralytics import YOLO
 
+    if device is None:
+        device = resources.device_for("training")
+
+    callbacks = callbacks or {}
+
+    if resume_from is not None:
+        model = YOLO(str(resume_from))
+        for event, fn in callbacks.items():
+            model.add_callback(event, fn)
+        model.train(resume=True, device=device)
+        return model
+
+    if shard_root is not None:
+        from formats.shards import stage_shards
+        data_yaml = str(stage_shards(shard_root, stage_dir or f"{output_dir}/staged_dataset"))
+
+    if image_cache is not None:
+        images = [
+            p.resolve() for p in (Path(data_yaml).parent / "images").rglob("*")
+            if p.suffix.lower() in IMAGE_EXTS
+        ]
+        image_cache.build(images)
+        data_yaml = str(image_cache.ultralytics_view(data_yaml))
+        imgsz = image_cache.size
+
     model = YOLO(base_model)
+    for event, fn in callbacks.items():
+        model.add_callback(event, fn)
     model.train(
         data=data_yaml,
-        epochs=30,
-        imgsz=640,
+        epochs=epochs,
+        imgsz=imgsz or 640,
+        batch=batch,
+        workers=workers,
+        device=device,
         project=output_dir,
-        name="v1"
+        name=name,
+        exist_ok=True,
     )
+    return model
+
+
+# ---------------- TRAINING PROCESS ----------------
+def _epoch_metrics(trainer):
+    metrics = {k: float(v) for k, v in (trainer.metrics or {}).items()}
+    if getattr(trainer, "tloss", None) is not None:
+        losses = trainer.tloss.tolist() if hasattr(trainer.tloss, "tolist") else trainer.tloss
+        losses = losses if isinstance(losses, list) else [losses]
+        for name, value in zip(trainer.loss_names, losses):
+            metrics[f"train/{name}"] = float(value)
+    return metrics
+
+
+def _train_process(config, events, cancel):
+    """
+    Child process entry point. Runs train_yolo and reports through `events`:
+
+        ("started", {"epochs": n, "device": device})
+        ("epoch",   {"epoch": i, "epochs": n, "metrics": {...}, "elapsed": s, "eta": s})
+        ("done",    {"best": path, "last": path})
+        ("cancelled", {"last": path or None})
+        ("error",   {"message": text})
+    """
+    started = time.monotonic()
+    state = {"first_epoch": None, "last": None}
+
+    def on_train_start(trainer):
+        state["first_epoch"] = trainer.start_epoch
+        events.put(("started", {"epochs": trainer.epochs, "device": str(device)}))
+
+    def on_train_batch_end(trainer):
+        if cancel.is_set():
+            raise TrainingCancelled()
+
+    def on_fit_epoch_end(trainer):
+        done = trainer.epoch + 1
+        elapsed = time.monotonic() - started
+        per_epoch = elapsed / max(1, done - state["first_epoch"])
+        state["last"] = str(trainer.last)
+        events.put(("epoch", {
+            "epoch": done,
+            "epochs": trainer.epochs,
+            "metrics": _epoch_metrics(trainer),
+            "elapsed": elapsed,
+            "eta": per_epoch * (trainer.epochs - done),
+        }))
+        if cancel.is_set():
+            raise TrainingCancelled()
+
+    def on_train_end(trainer):
+        events.put(("done", {"best": str(trainer.best), "last": str(trainer.last)}))
+
+    resume_from = latest_checkpoint(config["output_dir"]) if config["resume"] else None
+    if config["resume"] and resume_from is None:
+        events.put(("error", {"message": f"No checkpoint found in {config['output_dir']}"}))
+        return
+
+    try:
+        # Off the interactive cores, lower priority, torch/OpenCV threads capped
+        resources.configure_child_process("training")
+        device = config["device"]
+        if device is None:
+            device = resources.device_for("training")
+
+        image_cache = None
+        if config["image_cache"]:
+            # Its own directory: the GUI's scoring cache may be building at the same time
+            image_cache = ImageCache(TRAINING_CACHE_DIR, size=config["imgsz"])
+
+        train_yolo(
+            config["data_yaml"], config["base_model"], config["output_dir"],
+            shard_root=config["shard_root"], stage_dir=config["stage_dir"], image_cache=image_cache,
+            epochs=config["epochs"], imgsz=config["imgsz"], batch=config["batch"],
+            workers=min(config["workers"], resources.threads_for("training")), device=device, name=config["name"],
+            resume_from=resume_from,
+            callbacks={
+                "on_train_start": on_train_start,
+                "on_train_batch_end": on_train_batch_end,
+                "on_fit_epoch_end": on_fit_epoch_end,
+                "on_train_end": on_train_end,
+            },
+        )
+    except TrainingCancelled:
+        events.put(("cancelled", {"last": state["last"]}))
+    except Exception as e:
+        logger.exception("Training failed")
+        events.put(("error", {"message": str(e)}))
+
+
+class TrainingJob:
+    """
+    One training run in a child process. The GUI polls `poll()` (e.g. from a
+    QTimer) for the events documented on _train_process; nothing here blocks.
+
+    cancel() stops at the next batch; the last completed epoch stays in
+    last.pt, so TrainingConfig(resume=True) picks the run up from there.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._ctx = mp.get_context("spawn")   # no forked Qt / CUDA state in the child
+        self._events = self._ctx.Queue()
+        self._cancel = self._ctx.Event()
+        self._process = None
+        self.finished = False
+
+    def start(self):
+        self._process = self._ctx.Process(
+            target=_train_process,
+            args=(asdict(self.config), self._events, self._cancel),
+        )  # not a daemon: ultralytics starts its own dataloader worker processes
+        self._process.start()
+        logger.info(f"Training started (pid {self._process.pid}): {self.config}")
+
+    def is_running(self):
+        return self._process is not None and self._process.is_alive()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def kill(self, timeout=10):
+        """Cancel and, if the child does not stop within `timeout`, terminate it."""
+        self.cancel()
+        if self._process is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+
+    def poll(self):
+        """All events received since the last call (list of (kind, payload))."""
+        # Checked before draining, so events flushed right before exit are not missed
+        exited = self._process is not None and not self._process.is_alive()
+        received = []
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            received.append(event)
+            if event[0] in ("done", "cancelled", "error"):
+                self.finished = True
+
+        # Child died without reporting (OOM kill, segfault in a native lib, ...)
+        if not self.finished and exited:
+            self.finished = True
+            received.append(("error", {"message": f"Training process exited with code {self._process.exitcode}"}))
+        return received
@@ -1,5 +1,9 @@
-import cv2
 import os
+import time
+from bisect import bisect_left
+from collections import deque
+
+import cv2
 
 def extract_frames(video_path, output_dir, every_n=5):
     cap = cv2.VideoCapture(video_path)
@@ -24,3 +28,132 @@ def extract_frames(video_path, output_dir, every_n=5):
 
     cap.release()
     return frame_paths
+
+
+# What to do with the next frame, cheapest last
+INFER = "infer"        # decode, run the model, draw a fresh overlay
+DISPLAY = "display"    # decode and show; keep the previous overlay
+SKIP = "skip"          # grab() only: not decoded, not shown
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of latencies in ms; the last bucket is overflow."""
+
+    BOUNDS_MS = (5, 10, 20, 33, 50, 75, 100, 150, 250, 500, 1000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.total = 0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.total += 1
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """Upper bound (ms) of the bucket holding the p-th percentile."""
+        if not self.total:
+            return 0.0
+        target = self.total * p / 100
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return self.max
+
+    def buckets(self):
+        """[(label, count)], e.g. ("≤33ms", 120) ... (">1000ms", 2)."""
+        labels = [f"≤{b}ms" for b in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}ms"]
+        return list(zip(labels, self.counts))
+
+    def __str__(self):
+        return " | ".join(f"{label} {count}" for label, count in self.buckets() if count)
+
+
+class PlaybackClock:
+    """
+    Paces video playback to the container's native frame rate on the wall
+    clock: frame n is due at start + n / fps, whatever processing costs.
+
+    action() says how to handle the next frame given how late it is. Up to
+    `infer_slack` frames late it is processed fully; further behind,
+    inference is skipped (the overlay of an earlier frame stays up); beyond
+    `display_slack` frames the frame is not even decoded. Slow inference
+    therefore turns into a lower inference rate, not slow-motion video.
+
+    record() collects capture → display latency per shown frame, and how
+    many frames old the overlay on screen is.
+    """
+
+    def __init__(self, fps, infer_slack=1, display_slack=4):
+        # Containers without a rate (or with a bogus one) play at 30 fps
+        self.fps = fps if fps and 1 < fps < 240 else 30.0
+        self.period = 1.0 / self.fps
+        self.infer_slack = infer_slack
+        self.display_slack = display_slack
+
+        self.frame = 0                  # index of the next frame to read
+        self.start = None
+        self.overlay_frame = None       # frame the current overlay was computed on
+        self.latency = LatencyHistogram()
+        self.counts = {INFER: 0, DISPLAY: 0, SKIP: 0}
+        self._shown = deque(maxlen=30)
+
+    def restart(self, now=None):
+        """Re-anchor the schedule at the current frame (start, resume after pause)."""
+        now = time.perf_counter() if now is None else now
+        self.start = now - self.frame * self.period
+
+    def lag(self, now):
+        """Frames the next frame is behind schedule (≤ 0 when on time)."""
+        return int((now - self.start) / self.period) - self.frame
+
+    def action(self, now=None):
+        now = time.perf_counter() if now is None else now
+        if self.start is None:
+            self.restart(now)
+        lag = self.lag(now)
+        if lag > self.display_slack:
+            return SKIP
+        if lag > self.infer_slack:
+            return DISPLAY
+        return INFER
+
+    def advance(self, action, now=None):
+        """The next frame was handled with `action`."""
+        self.counts[action] += 1
+        if action == INFER:
+            self.overlay_frame = self.frame
+        if action != SKIP:
+            self._shown.append(time.perf_counter() if now is None else now)
+        self.frame += 1
+
+    def record(self, captured, displayed):
+        self.latency.add((displayed - captured) * 1000)
+
+    def overlay_age(self):
+        """Frames between the frame on screen and the frame its overlay belongs to."""
+        if self.overlay_frame is None:
+            return None
+        return self.frame - 1 - self.overlay_frame
+
+    def delay_ms(self, now=None):
+        """Milliseconds until the next frame is due."""
+        now = time.perf_counter() if now is None else now
+        due = self.start + self.frame * self.period
+        return max(0, int((due - now) * 1000))
+
+    def display_fps(self):
+        if len(self._shown) < 2:
+            return 0.0
+        return (len(self._shown) - 1) / max(self._shown[-1] - self._shown[0], 1e-6)
+
+    def summary(self):
+        return (
+            f"{self.counts[INFER]} inferred, {self.counts[DISPLAY]} shown without inference, "
+            f"{self.counts[SKIP]} skipped at {self.fps:.2f} fps; capture→display latency "
+            f"p50 {self.latency.percentile(50):.0f} ms, p95 {self.latency.percentile(95):.0f} ms "
+            f"[{self.latency}]"
+        )
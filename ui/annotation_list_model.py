@@ -0,0 +1,166 @@
+from collections import Counter
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor
+
+from ui.canvas.bbox_item import class_color
+
+LabelRole = Qt.UserRole
+RectRole = Qt.UserRole + 1
+ALL_CLASSES = None
+
+
+class AnnotationListModel(QAbstractListModel):
+    """
+    The AnnotationService's boxes as list rows. It observes the service, so
+    an insert, remove or relabel only touches the rows involved; undo, redo
+    and image changes are model resets.
+    """
+
+    def __init__(self, annotation_service, parent=None):
+        super().__init__(parent)
+        self.service = annotation_service
+        annotation_service.subscribe(self)
+
+    # -----------------------------
+    # AnnotationService observer
+    def begin_insert(self, first, last):
+        self.beginInsertRows(QModelIndex(), first, last)
+
+    def end_insert(self, first, last):
+        self.endInsertRows()
+
+    def begin_remove(self, first, last):
+        self.beginRemoveRows(QModelIndex(), first, last)
+
+    def end_remove(self, first, last):
+        self.endRemoveRows()
+        # Rows below shifted up, so their "n." prefix changed
+        if first < len(self.service.annotations):
+            self.dataChanged.emit(
+                self.index(first), self.index(len(self.service.annotations) - 1), [Qt.DisplayRole]
+            )
+
+    def relabeled(self, row, old_label):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def begin_reset(self):
+        self.beginResetModel()
+
+    def end_reset(self):
+        self.endResetModel()
+
+    # -----------------------------
+    # QAbstractListModel
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.service.annotations)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.service.annotations):
+            return None
+        label, rect = self.service.annotations[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{index.row() + 1}. {label}"
+        if role == Qt.ForegroundRole:
+            return QColor("#ffffff")
+        if role == Qt.DecorationRole:
+            return class_color(label)
+        if role == Qt.ToolTipRole:
+            return f"{label}  {rect.width():.0f}×{rect.height():.0f} at ({rect.x():.0f}, {rect.y():.0f})"
+        if role == LabelRole:
+            return label
+        if role == RectRole:
+            return rect
+        return None
+
+    def row_of(self, rect):
+        rows = self.service.rows_of(rect)
+        return rows[0] if rows else -1
+
+
+class ClassCountModel(QAbstractListModel):
+    """
+    "All (n)" followed by one "class (n)" row per class present, kept up to
+    date from the same AnnotationService events as AnnotationListModel.
+    """
+
+    def __init__(self, annotation_service, parent=None):
+        super().__init__(parent)
+        self.service = annotation_service
+        self.counts = Counter()
+        self.classes = []       # sorted, rows 1..n
+        self._removing = []
+        annotation_service.subscribe(self)
+
+    def _apply(self, deltas):
+        """Apply {label: +n/-n} and emit only the row signals it implies."""
+        for label, delta in deltas.items():
+            old = self.counts[label]
+            new = old + delta
+            if old == 0 and new > 0:
+                row = 1 + sum(1 for c in self.classes if c < label)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.counts[label] = new
+                self.classes.insert(row - 1, label)
+                self.endInsertRows()
+            elif new <= 0:
+                row = 1 + self.classes.index(label)
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.counts[label]
+                self.classes.pop(row - 1)
+                self.endRemoveRows()
+            else:
+                self.counts[label] = new
+                row = 1 + self.classes.index(label)
+                self.dataChanged.emit(self.index(row), self.index(row), [Qt.DisplayRole])
+        self.dataChanged.emit(self.index(0), self.index(0), [Qt.DisplayRole])
+
+    # -----------------------------
+    # AnnotationService observer
+    def begin_insert(self, first, last):
+        pass
+
+    def end_insert(self, first, last):
+        self._apply(Counter(label for label, _ in self.service.annotations[first:last + 1]))
+
+    def begin_remove(self, first, last):
+        self._removing = [label for label, _ in self.service.annotations[first:last + 1]]
+
+    def end_remove(self, first, last):
+        self._apply({label: -n for label, n in Counter(self._removing).items()})
+        self._removing = []
+
+    def relabeled(self, row, old_label):
+        label = self.service.annotations[row][0]
+        if label != old_label:
+            self._apply({old_label: -1, label: +1})
+
+    def begin_reset(self):
+        self.beginResetModel()
+
+    def end_reset(self):
+        self.counts = Counter(label for label, _ in self.service.annotations)
+        self.classes = sorted(self.counts)
+        self.endResetModel()
+
+    # -----------------------------
+    # QAbstractListModel
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1 + len(self.classes)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() > len(self.classes):
+            return None
+        label = self.classes[index.row() - 1] if index.row() else ALL_CLASSES
+        if role == Qt.DisplayRole:
+            if label is ALL_CLASSES:
+                return f"All ({sum(self.counts.values())})"
+            return f"{label} ({self.counts[label]})"
+        if role == Qt.ForegroundRole:
+            return QColor("#ffffff")
+        if role == Qt.DecorationRole and label is not ALL_CLASSES:
+            return class_color(label)
+        if role == LabelRole:
+            return label
+        return None
@@ -1,7 +1,10 @@
-from PyQt5.QtWidgets import QGraphicsScene, QInputDialog
-from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtWidgets import QGraphicsScene, QInputDialog, QGraphicsPixmapItem
+from PyQt5.QtCore import QRectF, Qt, pyqtSignal
 from PyQt5.QtGui import QPixmap, QImage
 from ui.canvas.bbox_item import BBoxItem
+from ui.canvas.box_batch_item import BoxBatchItem, BATCH_THRESHOLD
+from ui.canvas.tiled_image import TilePyramid, TiledImageItem, is_large_image, tiling_unsupported
+from utils.geometry import yolo_to_xywh
 from PyQt5.QtWidgets import QGraphicsTextItem
 
 from utils.colors import get_color
@@ -9,12 +12,16 @@ import os
 
 
 class AnnotationScene(QGraphicsScene):
+    # Something the user should know about the shown image (status text)
+    notice = pyqtSignal(str)
+
     def __init__(self, annotation_service):
         super().__init__()
         self.setItemIndexMethod(QGraphicsScene.NoIndex)
         self.annotation_service = annotation_service
         self.image_item = None
         self.image_path = None
+        self.batch_item = None
         self.start_pos = None
         self.temp_rect = None
 
@@ -38,6 +45,18 @@ class AnnotationScene(QGraphicsScene):
             event.accept()
             return
 
+    # Click on a batched box → take it out of the batch and edit it as a normal box
+        if self.batch_item is not None and event.button() == Qt.LeftButton:
+            index = self.batch_item.box_at(event.scenePos())
+            if index is not None:
+                label, rect = self.batch_item.take(index)
+                bbox = BBoxItem(rect, label)
+                self.addItem(bbox)
+                self.clearSelection()
+                bbox.setSelected(True)
+                event.accept()
+                return
+
     # Click empty area → start drawing new box
         if event.button() == Qt.LeftButton:
             self.clearSelection()
@@ -90,20 +109,56 @@ class AnnotationScene(QGraphicsScene):
 
     # -----------------------------
     # IMAGE MODE
-    def load_image(self, path):
-        pixmap = QPixmap(path)
+    def load_image(self, path, pixmap=None):
+        self._release_image_item()
+        self.batch_item = None
         self.clear()
-        self.image_item = self.addPixmap(pixmap)
+        large = pixmap is None and is_large_image(path)
+        unsupported = tiling_unsupported(path) if large else None
+        if large and unsupported is None:
+            # Gigapixel: tiles from a disk pyramid, scene coords stay full-res pixels
+            pyramid = TilePyramid(path)
+            pyramid.signals.failed.connect(self._on_tiling_failed)
+            self.image_item = TiledImageItem(pyramid)
+            self.addItem(self.image_item)
+            self.setSceneRect(self.image_item.boundingRect())
+        else:
+            if unsupported is not None:
+                self.notice.emit(f"{os.path.basename(path)}: {unsupported}")
+            if pixmap is None:
+                pixmap = QPixmap(path)
+            self.image_item = self.addPixmap(pixmap)
+            self.setSceneRect(QRectF(pixmap.rect()))
         self.image_path = path
-        self.setSceneRect(QRectF(pixmap.rect()))
-        self.annotation_service.clear()
+        # A new image starts a new undo history
+        self.annotation_service.load([])
+
+    def _release_image_item(self):
+        if isinstance(self.image_item, TiledImageItem):
+            try:
+                self.image_item.pyramid.signals.failed.disconnect(self._on_tiling_failed)
+            except TypeError:
+                pass
+            self.image_item.release()
+        self.image_item = None
+
+    def _on_tiling_failed(self, error):
+        self.notice.emit(f"Tiling {os.path.basename(self.image_path or '')} failed: {error}")
+
+    def image_size(self):
+        """(width, height) of the loaded image in scene (= full-resolution pixel) units."""
+        rect = self.sceneRect()
+        return rect.width(), rect.height()
 
     # -----------------------------
     # VIDEO MODE (IMPORTANT)
     def set_video_frame(self, qimage: QImage):
         pixmap = QPixmap.fromImage(qimage)
 
-        if self.image_item is None:
+        if not isinstance(self.image_item, QGraphicsPixmapItem):
+            self._release_image_item()
+            self.batch_item = None
+            self.clear()
             self.image_item = self.addPixmap(pixmap)
         else:
             self.image_item.setPixmap(pixmap)
@@ -112,26 +167,86 @@ class AnnotationScene(QGraphicsScene):
 
     # -----------------------------
     def clear_annotations(self):
-        for item in self.items():
-            if isinstance(item, BBoxItem):
-                self.removeItem(item)
+        self._remove_box_items()
         self.annotation_service.clear()
 
     # -----------------------------
+    def _prediction_rects(self, predictions):
+        """[(label, xc, yc, w, h)] normalized → [(label, QRectF)] in scene pixels."""
+        img_w, img_h = self.image_size()
+        xywh = yolo_to_xywh([p[1:] for p in predictions], img_w, img_h)
+        return [(p[0], QRectF(*row)) for p, row in zip(predictions, xywh.tolist())]
+
     def add_auto_boxes(self, predictions):
         if not self.image_item:
             return
 
-        img_w = self.image_item.pixmap().width()
-        img_h = self.image_item.pixmap().height()
+        boxes = self._prediction_rects(predictions)
+        self.annotation_service.add_many(boxes)
+        self._draw_boxes(boxes)
 
-        for label, x_center, y_center, w_norm, h_norm in predictions:
-            x = (x_center - w_norm / 2) * img_w
-            y = (y_center - h_norm / 2) * img_h
-            w = w_norm * img_w
-            h = h_norm * img_h
+    def load_boxes(self, predictions):
+        """Show saved labels as the image's starting boxes, without an undo step."""
+        if not self.image_item:
+            return
 
-            rect = QRectF(x, y, w, h)
-            bbox = BBoxItem(rect, label)
-            self.addItem(bbox)
-            self.annotation_service.add(label, rect)
+        boxes = self._prediction_rects(predictions)
+        self._remove_box_items()
+        self.annotation_service.load(boxes)
+        self._draw_boxes(boxes)
+
+    def show_annotations(self, annotations):
+        """Redraw all boxes from `annotations` [(label, QRectF)], e.g. after undo/redo."""
+        self._remove_box_items()
+        self._draw_boxes(annotations)
+
+    def _draw_boxes(self, boxes):
+        # Dense images (crowds, cells, parts) go through one array-backed item;
+        # a QGraphicsRectItem + text item per box stalls the scene at that count.
+        existing = self.batch_item.count() if self.batch_item is not None else 0
+        if existing + len(boxes) > BATCH_THRESHOLD:
+            if self.batch_item is not None:
+                live = self.batch_item.alive.nonzero()[0]
+                boxes = [(self.batch_item.labels[i], self.batch_item.rects[i]) for i in live] + list(boxes)
+                self.batch_item.set_boxes(boxes)
+                self.batch_item.update()
+            else:
+                self.batch_item = BoxBatchItem(boxes)
+                self.addItem(self.batch_item)
+            return
+        for label, rect in boxes:
+            self.addItem(BBoxItem(rect, label))
+
+    def _remove_box_items(self):
+        for item in self.items():
+            if isinstance(item, BBoxItem):
+                self.removeItem(item)
+        if self.batch_item is not None:
+            self.removeItem(self.batch_item)
+            self.batch_item = None
+
+    # -----------------------------
+    # SELECTION (synced with the right panel)
+    def selected_rect(self):
+        for item in self.selectedItems():
+            if isinstance(item, BBoxItem):
+                return item.rect()
+        return None
+
+    def select_annotation(self, rect):
+        """Select the box drawn for `rect`, taking it out of the batch if needed."""
+        target = next(
+            (i for i in self.items() if isinstance(i, BBoxItem) and i.rect() == rect), None
+        )
+        if target is None and self.batch_item is not None:
+            hits = [i for i in self.batch_item.alive.nonzero()[0] if self.batch_item.rects[i] == rect]
+            if hits:
+                label, rect = self.batch_item.take(hits[0])
+                target = BBoxItem(rect, label)
+                self.addItem(target)
+        if target is None:
+            return
+        self.clearSelection()
+        target.setSelected(True)
+        for view in self.views():
+            view.ensureVisible(target)
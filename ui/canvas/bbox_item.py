@@ -2,6 +2,40 @@ from PyQt5.QtWidgets import QGraphicsRectItem, QGraphicsTextItem
 from PyQt5.QtGui import QPen, QFont, QColor, QBrush,QPainter
 from PyQt5.QtCore import Qt
 from utils.colors import get_color
+from utils.geometry import rects_to_xywh, xywh_to_yolo
+
+# Shared by every box: one pen per class, one font, one selection pen
+_PENS = {}
+_LABEL_FONT = None
+SELECT_PEN = QPen(QColor(0, 122, 204), 3)  # Blue
+
+
+def class_color(label):
+    color = get_color(label)
+    if not isinstance(color, QColor):
+        color = QColor(255, 255, 0)  # fallback
+    return color
+
+
+def class_pen(label, cosmetic=False):
+    """Cosmetic pens stay 2 px on screen at any zoom (used by BoxBatchItem)."""
+    pen = _PENS.get((label, cosmetic))
+    if pen is None:
+        pen = QPen(class_color(label))
+        pen.setWidth(2)
+        pen.setStyle(Qt.SolidLine)
+        pen.setCosmetic(cosmetic)
+        _PENS[label, cosmetic] = pen
+    return pen
+
+
+def label_font():
+    global _LABEL_FONT
+    if _LABEL_FONT is None:
+        _LABEL_FONT = QFont()
+        _LABEL_FONT.setPointSize(10)
+        _LABEL_FONT.setBold(True)
+    return _LABEL_FONT
 
 
 class BBoxItem(QGraphicsRectItem):
@@ -10,15 +44,10 @@ class BBoxItem(QGraphicsRectItem):
         self.label = label
 
         # 🎨 Get class-based color
-        color = get_color(label)
-        if not isinstance(color, QColor):
-            color = QColor(255, 255, 0)  # fallback
+        color = class_color(label)
 
         # ✅ Border only
-        pen = QPen(color)
-        pen.setWidth(2)
-        pen.setStyle(Qt.SolidLine)
-        self.setPen(pen)
+        self.setPen(class_pen(label))
 
         # ✅ NO FILL (CORRECT WAY)
         self.setBrush(QBrush(Qt.NoBrush))
@@ -36,10 +65,7 @@ class BBoxItem(QGraphicsRectItem):
         self.text_item = QGraphicsTextItem(label, self)
         self.text_item.setDefaultTextColor(color)
 
-        font = QFont()
-        font.setPointSize(10)
-        font.setBold(True)
-        self.text_item.setFont(font)
+        self.text_item.setFont(label_font())
 
         self.text_item.setPos(rect.x(), rect.y() - 15)
 
@@ -47,10 +73,7 @@ class BBoxItem(QGraphicsRectItem):
         self.setZValue(10)
 
     def to_yolo(self, img_w, img_h, class_map=None):
-        x_center = (self.rect().x() + self.rect().width() / 2) / img_w
-        y_center = (self.rect().y() + self.rect().height() / 2) / img_h
-        w = self.rect().width() / img_w
-        h = self.rect().height() / img_h
+        x_center, y_center, w, h = xywh_to_yolo(rects_to_xywh([self.rect()]), img_w, img_h)[0].tolist()
 
         if class_map is None:
             class_map = {self.label: 0}
@@ -66,8 +89,6 @@ class BBoxItem(QGraphicsRectItem):
 
     # Highlight when selected
         if self.isSelected():
-            select_pen = QPen(QColor(0, 122, 204))  # Blue
-            select_pen.setWidth(3)
-            painter.setPen(select_pen)
+            painter.setPen(SELECT_PEN)
             painter.drawRect(self.rect())
 
@@ -0,0 +1,162 @@
+import numpy as np
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QPainter, QPixmap, QFontMetrics
+from PyQt5.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+
+from ui.canvas.bbox_item import class_pen, class_color, label_font
+from utils.geometry import rects_to_xywh, xywh_to_xyxy
+
+# Above this many boxes the scene draws them through one BoxBatchItem
+BATCH_THRESHOLD = 300
+GRID = 32                   # spatial buckets per side
+MIN_LABEL_BOX_PX = 24       # labels only on boxes at least this tall on screen
+MAX_LABELS = 1500           # ... and only while this few are visible
+
+
+class BoxBatchItem(QGraphicsItem):
+    """
+    Many boxes in one item, drawn from arrays instead of one
+    QGraphicsRectItem + QGraphicsTextItem each.
+
+    Boxes are bucketed once into a GRID x GRID grid by centre, with QRectFs
+    prebuilt per (cell, class), so paint() only touches cells intersecting
+    the exposed area and issues one drawRects() per class. Pens are the
+    shared cosmetic class pens; each class label is rendered once into a
+    pixmap (glyph cache) and blitted.
+
+    Boxes are not individually interactive: the scene takes a box out with
+    take(index) and edits it as a normal BBoxItem.
+    """
+
+    def __init__(self, boxes):
+        """boxes: [(label, QRectF)] in scene coordinates."""
+        super().__init__()
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.setZValue(10)
+        self._glyphs = {}
+        self.set_boxes(boxes)
+
+    # -----------------------------
+    # DATA
+    def set_boxes(self, boxes):
+        self.prepareGeometryChange()
+        self.labels = [label for label, _ in boxes]
+        self.rects = [rect for _, rect in boxes]
+        self.classes = sorted(set(self.labels))
+        class_index = {c: i for i, c in enumerate(self.classes)}
+
+        self.xyxy = xywh_to_xyxy(rects_to_xywh(self.rects))
+        self.cls = np.array([class_index[l] for l in self.labels], dtype=np.int32)
+        self.alive = np.ones(len(self.rects), dtype=bool)
+
+        if len(self.rects):
+            x1, y1 = self.xyxy[:, 0].min(), self.xyxy[:, 1].min()
+            x2, y2 = self.xyxy[:, 2].max(), self.xyxy[:, 3].max()
+        else:
+            x1 = y1 = x2 = y2 = 0.0
+        self._bounds = QRectF(x1, y1, x2 - x1, y2 - y1).adjusted(-2, -20, 2, 2)  # room for labels
+        self._rebuild_grid()
+
+    def _rebuild_grid(self):
+        b = self._bounds
+        self._cell_w = max(b.width() / GRID, 1.0)
+        self._cell_h = max(b.height() / GRID, 1.0)
+        live = np.flatnonzero(self.alive)
+        w = self.xyxy[live, 2] - self.xyxy[live, 0]
+        h = self.xyxy[live, 3] - self.xyxy[live, 1]
+        # Boxes are bucketed by centre, so a query must reach half the largest box further out
+        self._reach_x = float(w.max()) / 2 if len(live) else 0.0
+        self._reach_y = float(h.max()) / 2 if len(live) else 0.0
+
+        cx = (self.xyxy[live, 0] + self.xyxy[live, 2]) / 2
+        cy = (self.xyxy[live, 1] + self.xyxy[live, 3]) / 2
+        gx = np.clip(((cx - b.left()) / self._cell_w).astype(int), 0, GRID - 1)
+        gy = np.clip(((cy - b.top()) / self._cell_h).astype(int), 0, GRID - 1)
+
+        self._cells = {}    # (gy, gx) → {class idx: ([QRectF], [box idx])}
+        for i, y, x in zip(live, gy, gx):
+            per_class = self._cells.setdefault((y, x), {})
+            rects, ids = per_class.setdefault(self.cls[i], ([], []))
+            rects.append(self.rects[i])
+            ids.append(i)
+
+    def take(self, index):
+        """Remove box `index` from the batch; returns (label, QRectF)."""
+        self.alive[index] = False
+        self._rebuild_grid()
+        self.update()
+        return self.labels[index], self.rects[index]
+
+    def box_at(self, pos):
+        """Index of the smallest live box containing scene point `pos`, or None."""
+        x, y = pos.x(), pos.y()
+        hit = self.alive & (self.xyxy[:, 0] <= x) & (x <= self.xyxy[:, 2]) \
+            & (self.xyxy[:, 1] <= y) & (y <= self.xyxy[:, 3])
+        ids = np.flatnonzero(hit)
+        if not len(ids):
+            return None
+        area = (self.xyxy[ids, 2] - self.xyxy[ids, 0]) * (self.xyxy[ids, 3] - self.xyxy[ids, 1])
+        return int(ids[np.argmin(area)])
+
+    def count(self):
+        return int(self.alive.sum())
+
+    # -----------------------------
+    # GLYPH CACHE
+    def _glyph(self, label):
+        pixmap = self._glyphs.get(label)
+        if pixmap is None:
+            font = label_font()
+            metrics = QFontMetrics(font)
+            pixmap = QPixmap(metrics.horizontalAdvance(label) + 4, metrics.height())
+            pixmap.fill(Qt.transparent)
+            p = QPainter(pixmap)
+            p.setFont(font)
+            p.setPen(class_color(label))
+            p.drawText(2, metrics.ascent(), label)
+            p.end()
+            self._glyphs[label] = pixmap
+        return pixmap
+
+    # -----------------------------
+    # QGraphicsItem
+    def boundingRect(self):
+        return self._bounds
+
+    def paint(self, painter, option, widget=None):
+        exposed = option.exposedRect if isinstance(option, QStyleOptionGraphicsItem) else self._bounds
+        b = self._bounds
+        gx0 = int(max(0, (exposed.left() - self._reach_x - b.left()) // self._cell_w))
+        gx1 = int(min(GRID - 1, (exposed.right() + self._reach_x - b.left()) // self._cell_w))
+        gy0 = int(max(0, (exposed.top() - self._reach_y - b.top()) // self._cell_h))
+        gy1 = int(min(GRID - 1, (exposed.bottom() + self._reach_y - b.top()) // self._cell_h))
+
+        by_class = {}
+        for gy in range(gy0, gy1 + 1):
+            for gx in range(gx0, gx1 + 1):
+                for cls, (rects, ids) in self._cells.get((gy, gx), {}).items():
+                    entry = by_class.setdefault(cls, ([], []))
+                    entry[0].extend(rects)
+                    entry[1].extend(ids)
+
+        painter.setBrush(Qt.NoBrush)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        visible = 0
+        for cls, (rects, _) in by_class.items():
+            painter.setPen(class_pen(self.classes[cls], cosmetic=True))
+            painter.drawRects(rects)
+            visible += len(rects)
+
+        # Labels: unreadable (and the costliest part) when boxes are tiny or very many
+        scale = painter.worldTransform().m11()
+        if visible > MAX_LABELS:
+            return
+        inv = 1.0 / scale if scale > 0 else 1.0
+        for cls, (rects, ids) in by_class.items():
+            glyph = self._glyph(self.classes[cls])
+            for rect in rects:
+                if rect.height() * scale < MIN_LABEL_BOX_PX:
+                    continue
+                # Glyphs stay at screen size: draw them untransformed at the box corner
+                target = QRectF(rect.x(), rect.y() - glyph.height() * inv, glyph.width() * inv, glyph.height() * inv)
+                painter.drawPixmap(target, glyph, QRectF(glyph.rect()))
@@ -14,9 +14,9 @@ class ImageView(QGraphicsView):
         self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
         self.zoom_level = 0
 
-    def load_image(self, path):
+    def load_image(self, path, pixmap=None):
         self.image_path = path
-        self.scene.load_image(path)
+        self.scene.load_image(path, pixmap)
         self.reset_zoom()  # ✅ reset zoom when loading new image
 
     def wheelEvent(self, event):
@@ -0,0 +1,392 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QRect, QRectF, QRunnable, QSize, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageIOHandler, QImageReader, QPainter, QPixmap
+from PyQt5.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+
+from core.config import STORAGE_DIR
+from core.logger import logger
+
+TILE_DIR = STORAGE_DIR / "cache" / "tiles"
+TILE = 512
+OVERVIEW = 2048
+# Above this the image is shown through the tile pyramid instead of one QPixmap
+LARGE_IMAGE_PIXELS = 64_000_000
+LARGE_IMAGE_SIDE = 16384
+
+
+def image_size(path):
+    return QImageReader(path).size()
+
+
+def is_large_image(path):
+    size = image_size(path)
+    if not size.isValid():
+        return False
+    return size.width() * size.height() > LARGE_IMAGE_PIXELS or max(size.width(), size.height()) > LARGE_IMAGE_SIDE
+
+
+# ---------------- SOURCE READERS ----------------
+def _has_pyvips():
+    try:
+        import pyvips  # noqa: F401
+    except Exception:  # not installed, or libvips itself missing
+        return False
+    return True
+
+
+def tiling_unsupported(path):
+    """
+    Why `path` can't be read region by region (a message for the user), or
+    None if it can. Without pyvips only Qt handlers with clip-rect support
+    (JPEG) qualify; PNG, BMP and TIFF would decode the whole image per strip.
+    """
+    if _has_pyvips() or QImageReader(path).supportsOption(QImageIOHandler.ClipRect):
+        return None
+    fmt = bytes(QImageReader(path).format()).decode("ascii", "replace").upper() or "This format"
+    return f"{fmt} images this large load whole; install pyvips for tiled viewing"
+
+
+class _QtRegionReader:
+    """
+    Regions through QImageReader clip rects (JPEG decodes only the rows it
+    needs). Only for handlers supporting ClipRect, see tiling_unsupported().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        size = image_size(path)
+        self.width, self.height = size.width(), size.height()
+
+    def read(self, rect):
+        reader = QImageReader(self.path)
+        reader.setClipRect(rect)
+        return reader.read().convertToFormat(QImage.Format_RGB32)
+
+    def overview(self, max_side):
+        reader = QImageReader(self.path)
+        reader.setScaledSize(QSize(self.width, self.height).scaled(max_side, max_side, Qt.KeepAspectRatio))
+        return reader.read().convertToFormat(QImage.Format_RGB32)
+
+
+class _VipsRegionReader:
+    """Regions through pyvips when it is installed (streams any format, incl. tiled TIFF)."""
+
+    def __init__(self, path):
+        import pyvips
+
+        self.path = path
+        self.image = pyvips.Image.new_from_file(path)
+        if self.image.hasalpha():
+            self.image = self.image.flatten()
+        self.image = self.image.colourspace("srgb").cast("uchar")
+        self.width, self.height = self.image.width, self.image.height
+
+    @staticmethod
+    def _to_qimage(region):
+        data = region.write_to_memory()
+        image = QImage(data, region.width, region.height, region.width * 3, QImage.Format_RGB888)
+        return image.convertToFormat(QImage.Format_RGB32)  # copies, so `data` may go
+
+    def read(self, rect):
+        return self._to_qimage(self.image.crop(rect.x(), rect.y(), rect.width(), rect.height()))
+
+    def overview(self, max_side):
+        import pyvips
+
+        thumb = pyvips.Image.thumbnail(self.path, max_side)
+        if thumb.hasalpha():
+            thumb = thumb.flatten()
+        return self._to_qimage(thumb.colourspace("srgb").cast("uchar"))
+
+
+def _open_reader(path):
+    try:
+        return _VipsRegionReader(path)
+    except Exception:  # pyvips missing, or libvips can't open this file
+        if not QImageReader(path).supportsOption(QImageIOHandler.ClipRect):
+            raise ValueError(f"No region reader for {path}")
+        return _QtRegionReader(path)
+
+
+# ---------------- PYRAMID ----------------
+class _BuildSignals(QObject):
+    level_ready = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+
+class TilePyramid:
+    """
+    Disk cache of TILE x TILE JPEG tiles for one image at every power-of-two
+    downsampling (level 0 = full resolution), plus a small overview.
+
+        TILE_DIR/<hash of path, mtime, size>/overview.jpg
+        TILE_DIR/<...>/<level>/<row>_<col>.jpg
+        TILE_DIR/<...>/<level>/done        level complete
+
+    build() runs on a background thread: level 0 from horizontal strips of
+    the source, each further level from 2x2 tiles of the one below, so
+    memory stays at one strip regardless of image size.
+    """
+
+    def __init__(self, path, cache_root=TILE_DIR):
+        self.path = path
+        stat = os.stat(path)
+        key = hashlib.blake2b(
+            f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+        self.dir = cache_root / key
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        size = image_size(path)
+        self.width, self.height = size.width(), size.height()
+        self.levels = max(1, math.ceil(math.log2(max(self.width, self.height) / TILE)) + 1)
+
+        self.signals = _BuildSignals()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    # -----------------------------
+    # GEOMETRY
+    def level_size(self, level):
+        f = 1 << level
+        return math.ceil(self.width / f), math.ceil(self.height / f)
+
+    def grid(self, level):
+        w, h = self.level_size(level)
+        return math.ceil(h / TILE), math.ceil(w / TILE)
+
+    def tile_path(self, level, row, col):
+        return self.dir / str(level) / f"{row}_{col}.jpg"
+
+    def is_built(self, level):
+        return (self.dir / str(level) / "done").exists()
+
+    @property
+    def overview_path(self):
+        return self.dir / "overview.jpg"
+
+    # -----------------------------
+    # BUILD
+    def start_build(self):
+        if all(self.is_built(level) for level in range(self.levels)) and self.overview_path.exists():
+            return
+        self._thread = threading.Thread(target=self._build, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @staticmethod
+    def _save(image, path):
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp.jpg")
+        image.save(str(tmp), "JPG", 90)
+        os.replace(tmp, path)
+
+    def _build(self):
+        try:
+            reader = _open_reader(self.path)
+            if not self.overview_path.exists():
+                self._save(reader.overview(OVERVIEW), self.overview_path)
+                self.signals.level_ready.emit(-1)
+            for level in range(self.levels):
+                if self._cancel.is_set():
+                    return
+                if not self.is_built(level):
+                    (self.dir / str(level)).mkdir(exist_ok=True)
+                    if level == 0:
+                        self._build_base(reader)
+                    else:
+                        self._build_level(level)
+                    if self._cancel.is_set():
+                        return
+                    (self.dir / str(level) / "done").touch()
+                self.signals.level_ready.emit(level)
+        except Exception as e:
+            logger.exception(f"Tile pyramid failed for {self.path}")
+            self.signals.failed.emit(str(e))
+
+    def _build_base(self, reader):
+        rows, cols = self.grid(0)
+        for row in range(rows):
+            if self._cancel.is_set():
+                return
+            y = row * TILE
+            strip_h = min(TILE, self.height - y)
+            strip = reader.read(QRect(0, y, self.width, strip_h))
+            for col in range(cols):
+                x = col * TILE
+                self._save(strip.copy(x, 0, min(TILE, self.width - x), strip_h), self.tile_path(0, row, col))
+
+    def _build_level(self, level):
+        rows, cols = self.grid(level)
+        w, h = self.level_size(level)
+        cw_total, ch_total = self.level_size(level - 1)
+        for row in range(rows):
+            if self._cancel.is_set():
+                return
+            for col in range(cols):
+                tw, th = min(TILE, w - col * TILE), min(TILE, h - row * TILE)
+                # Area covered by the (up to) 2x2 children, exact at odd-sized edges
+                cw = min(2 * TILE, cw_total - col * 2 * TILE)
+                ch = min(2 * TILE, ch_total - row * 2 * TILE)
+                canvas = QImage(cw, ch, QImage.Format_RGB32)
+                canvas.fill(Qt.black)
+                painter = QPainter(canvas)
+                for dr in (0, 1):
+                    for dc in (0, 1):
+                        child = self.tile_path(level - 1, row * 2 + dr, col * 2 + dc)
+                        if child.exists():
+                            painter.drawImage(dc * TILE, dr * TILE, QImage(str(child)))
+                painter.end()
+                tile = canvas.scaled(tw, th, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+                self._save(tile, self.tile_path(level, row, col))
+
+
+# ---------------- RENDERING ----------------
+class _TileLoad(QRunnable):
+    # Holds the signals object, never the item: the item may be gone when this runs
+    def __init__(self, signals, key, path, generation):
+        super().__init__()
+        self.signals = signals
+        self.key = key
+        self.path = path
+        self.generation = generation
+
+    def run(self):
+        self.signals.loaded.emit(self.key, QImage(str(self.path)), self.generation)
+
+
+class _TileSignals(QObject):
+    # key, image, generation it was requested in
+    loaded = pyqtSignal(tuple, QImage, int)
+
+
+class TiledImageItem(QGraphicsItem):
+    """
+    Scene item for a TilePyramid. Its bounding rect is the full-resolution
+    image, so scene coordinates are level-0 pixels exactly as with a
+    QGraphicsPixmapItem and boxes/YOLO export are unaffected.
+
+    paint() picks the level matching the view scale, draws the overview
+    underneath and the cached tiles of that level on top; missing tiles
+    are loaded on a thread pool into a byte-bounded LRU and repainted when
+    they arrive.
+    """
+
+    def __init__(self, pyramid, memory_bytes=256 << 20):
+        super().__init__()
+        self.pyramid = pyramid
+        self.memory_bytes = memory_bytes
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+        self.generation = 0
+        self._level = None
+        self._lru = OrderedDict()   # (level, row, col) → QPixmap
+        self._lru_bytes = 0
+        self._pending = set()
+        self._overview = QPixmap()
+
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(2)
+        self.signals = _TileSignals()
+        self.signals.loaded.connect(self._on_loaded)
+
+        pyramid.signals.level_ready.connect(self._on_level_ready)
+        self._load_overview()
+        pyramid.start_build()
+
+    def boundingRect(self):
+        return QRectF(0, 0, self.pyramid.width, self.pyramid.height)
+
+    # -----------------------------
+    def _load_overview(self):
+        if self._overview.isNull() and self.pyramid.overview_path.exists():
+            self._overview = QPixmap(str(self.pyramid.overview_path))
+
+    def _on_level_ready(self, level):
+        self._load_overview()
+        self.update()
+
+    def _on_loaded(self, key, image, generation):
+        if generation != self.generation:
+            return  # zoomed or released since; the current level asks again if needed
+        self._pending.discard(key)
+        if image.isNull():
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._lru[key] = pixmap
+        self._lru_bytes += pixmap.width() * pixmap.height() * 4
+        while self._lru_bytes > self.memory_bytes and len(self._lru) > 1:
+            _, old = self._lru.popitem(last=False)
+            self._lru_bytes -= old.width() * old.height() * 4
+        self.update(self._tile_rect(*key))
+
+    def _tile_rect(self, level, row, col):
+        f = 1 << level
+        x, y = col * TILE * f, row * TILE * f
+        return QRectF(x, y, min(TILE * f, self.pyramid.width - x), min(TILE * f, self.pyramid.height - y))
+
+    def _pick_level(self, scale):
+        if scale >= 1:
+            return 0
+        level = int(math.floor(math.log2(1 / scale)))
+        return min(level, self.pyramid.levels - 1)
+
+    def paint(self, painter, option, widget=None):
+        exposed = option.exposedRect if isinstance(option, QStyleOptionGraphicsItem) else self.boundingRect()
+        exposed = exposed.intersected(self.boundingRect())
+
+        if not self._overview.isNull():
+            sx = self._overview.width() / self.pyramid.width
+            sy = self._overview.height() / self.pyramid.height
+            source = QRectF(exposed.x() * sx, exposed.y() * sy, exposed.width() * sx, exposed.height() * sy)
+            painter.drawPixmap(exposed, self._overview, source)
+
+        scale = painter.worldTransform().m11()
+        level = self._pick_level(scale)
+        if not self.pyramid.is_built(level):
+            return
+        if level != self._level:
+            # Zoom changed: queued loads for the old level are no longer useful
+            self._level = level
+            self.generation += 1
+            self._pool.clear()
+            self._pending.clear()
+
+        span = TILE * (1 << level)
+        rows, cols = self.pyramid.grid(level)
+        r0, r1 = max(0, int(exposed.top() // span)), min(rows - 1, int(exposed.bottom() // span))
+        c0, c1 = max(0, int(exposed.left() // span)), min(cols - 1, int(exposed.right() // span))
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, scale < 1)
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                key = (level, row, col)
+                pixmap = self._lru.get(key)
+                if pixmap is not None:
+                    self._lru.move_to_end(key)
+                    painter.drawPixmap(self._tile_rect(*key), pixmap, QRectF(pixmap.rect()))
+                elif key not in self._pending:
+                    self._pending.add(key)
+                    self._pool.start(_TileLoad(self.signals, key, self.pyramid.tile_path(*key), self.generation))
+
+    def release(self):
+        """
+        Stop background work (the scene is switching to another image). Tile
+        loads and the pyramid build may still finish afterwards, so their
+        signals are disconnected before the scene deletes this item.
+        """
+        self.pyramid.cancel()
+        self.generation += 1
+        self._pool.clear()
+        for signal, slot in ((self.signals.loaded, self._on_loaded),
+                             (self.pyramid.signals.level_ready, self._on_level_ready)):
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass  # already disconnected
@@ -0,0 +1,84 @@
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider, QListWidget, QListWidgetItem, QPushButton
+)
+from PyQt5.QtCore import Qt, pyqtSignal
+
+from services.detection_cache import SCORE_FLOOR
+from ui.canvas.bbox_item import class_color
+
+
+class DetectionFilter(QWidget):
+    """
+    Confidence threshold and class checklist applied to cached raw
+    detections. Changing either only re-filters arrays; the model never runs.
+    """
+
+    # conf, classes (set of labels, or None for all)
+    changed = pyqtSignal(float, object)
+    # Write the current filter to every image with cached detections
+    apply_all_requested = pyqtSignal()
+
+    def __init__(self, conf=0.25, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 8)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel("Confidence"))
+        self.conf_label = QLabel()
+        row.addWidget(self.conf_label, alignment=Qt.AlignRight)
+        layout.addLayout(row)
+
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setRange(round(SCORE_FLOOR * 100), 100)
+        self.slider.setValue(round(conf * 100))
+        self.slider.valueChanged.connect(self._emit)
+        layout.addWidget(self.slider)
+
+        self.class_list = QListWidget()
+        self.class_list.setMaximumHeight(110)
+        self.class_list.setStyleSheet("background: #2d2d2d; border: none; border-radius: 8px;")
+        self.class_list.itemChanged.connect(self._emit)
+        layout.addWidget(self.class_list)
+
+        self.apply_button = QPushButton("Apply to cached images")
+        self.apply_button.setToolTip("Re-filter and save labels for every image with cached detections")
+        self.apply_button.clicked.connect(self.apply_all_requested)
+        layout.addWidget(self.apply_button)
+
+        self._show_conf()
+
+    # -----------------------------
+    # STATE
+    def conf(self):
+        return self.slider.value() / 100
+
+    def classes(self):
+        """Checked labels, or None while every class is checked."""
+        items = [self.class_list.item(i) for i in range(self.class_list.count())]
+        checked = {item.text() for item in items if item.checkState() == Qt.Checked}
+        return None if len(checked) == len(items) else checked
+
+    def add_classes(self, labels):
+        """Offer every label seen in detections (new ones start checked)."""
+        known = {self.class_list.item(i).text() for i in range(self.class_list.count())}
+        new = sorted(set(labels) - known)
+        if not new:
+            return
+        self.class_list.blockSignals(True)
+        for label in new:
+            item = QListWidgetItem(label)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            item.setForeground(class_color(label))
+            self.class_list.addItem(item)
+        self.class_list.sortItems()
+        self.class_list.blockSignals(False)
+
+    # -----------------------------
+    def _show_conf(self):
+        self.conf_label.setText(f"≥ {self.conf():.2f}")
+
+    def _emit(self, *_):
+        self._show_conf()
+        self.changed.emit(self.conf(), self.classes())
@@ -0,0 +1,125 @@
+import os
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QIcon
+
+PathRole = Qt.UserRole
+
+
+class ImageListModel(QAbstractListModel):
+    """
+    Flat list of image paths for a QListView. Rows are exposed in chunks
+    (canFetchMore / fetchMore) and thumbnails come from a ThumbnailLoader
+    only when the view asks for a row's icon, so no per-image widget or
+    pixmap exists for rows that were never on screen.
+    """
+
+    def __init__(self, thumbnails, parent=None, fetch_chunk=2000):
+        super().__init__(parent)
+        self.thumbnails = thumbnails
+        self.fetch_chunk = fetch_chunk
+        self._paths = []
+        self._rows = {}
+        self._loaded = 0
+        thumbnails.ready.connect(self._on_thumbnail_ready)
+
+    # -----------------------------
+    # DATA
+    def set_paths(self, paths):
+        self.beginResetModel()
+        self._paths = list(paths)
+        self._rows = {p: i for i, p in enumerate(self._paths)}
+        self._loaded = min(len(self._paths), self.fetch_chunk)
+        self.endResetModel()
+
+    def append_paths(self, paths):
+        start = len(self._paths)
+        self._paths.extend(paths)
+        for i, p in enumerate(paths, start=start):
+            self._rows[p] = i
+        # Rows inside the first chunk are shown directly, the rest via fetchMore
+        end = min(len(self._paths), max(self._loaded, self.fetch_chunk))
+        if end > self._loaded:
+            self.beginInsertRows(QModelIndex(), self._loaded, end - 1)
+            self._loaded = end
+            self.endInsertRows()
+
+    def reorder(self, paths):
+        """
+        Same paths in a new order, as a layout change: persistent indexes
+        (selection, current row) follow their path. Returns False, changing
+        nothing, if `paths` is not a permutation of the current paths.
+        """
+        paths = list(paths)
+        if len(paths) != len(self._paths) or set(paths) != self._rows.keys():
+            return False
+        if paths == self._paths:
+            return True
+
+        rows = {p: i for i, p in enumerate(paths)}
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        new = []
+        for index in old:
+            row = rows[self._paths[index.row()]]
+            new.append(self.index(row) if row < self._loaded else QModelIndex())
+        self._paths = paths
+        self._rows = rows
+        self.changePersistentIndexList(old, new)
+        self.layoutChanged.emit()
+        return True
+
+    def paths(self):
+        return self._paths
+
+    def path_at(self, row):
+        return self._paths[row]
+
+    def row_of(self, path):
+        """Row of `path` (fetching up to it if needed), or -1."""
+        row = self._rows.get(path, -1)
+        if row >= self._loaded:
+            self.beginInsertRows(QModelIndex(), self._loaded, row)
+            self._loaded = row + 1
+            self.endInsertRows()
+        return row
+
+    # -----------------------------
+    # QAbstractListModel
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._paths)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        end = min(len(self._paths), self._loaded + self.fetch_chunk)
+        if end == self._loaded:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, end - 1)
+        self._loaded = end
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        path = self._paths[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.DecorationRole:
+            return QIcon(self.thumbnails.get(path) or self.thumbnails.placeholder)
+        if role == Qt.ToolTipRole:
+            return path
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == PathRole:
+            return path
+        return None
+
+    def _on_thumbnail_ready(self, path, _pixmap):
+        row = self._rows.get(path)
+        if row is not None and row < self._loaded:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
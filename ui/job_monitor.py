@@ -0,0 +1,70 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core.exceptions import JobCancelled
+
+
+class JobMonitor(QObject):
+    """
+    Qt side of utils.threading jobs. Progress and completion arrive on
+    worker threads; re-emitting them as signals delivers them queued on the
+    GUI thread, where they drive the progress bar and status line and call
+    the per-job on_done / on_error callbacks.
+    """
+
+    # job, done, total, text ("Export: 1200/5000 · 340/s · 11s left")
+    progress = pyqtSignal(object, int, int, str)
+    finished = pyqtSignal(object)
+    _completed = pyqtSignal(object)
+
+    def __init__(self, progress_bar=None, status=None, parent=None):
+        super().__init__(parent)
+        self.progress_bar = progress_bar
+        self.status = status
+        self.active = []
+        self._callbacks = {}
+        self.progress.connect(self._show_progress)
+        self._completed.connect(self._on_completed)
+
+    def watch(self, job, on_done=None, on_error=None):
+        """Show `job` in the UI; on_done(result) / on_error(exception) run on the GUI thread."""
+        self.active.append(job)
+        self._callbacks[job] = (on_done, on_error)
+        job.progress.subscribe(
+            lambda p: self.progress.emit(job, p.done, p.total, p.describe())
+        )
+        job.future.add_done_callback(lambda _f: self._completed.emit(job))
+        self._show_progress(job, 0, job.progress.total, job.name)
+        return job
+
+    def _show_progress(self, job, done, total, text):
+        if job not in self.active:
+            return
+        if self.progress_bar is not None:
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setMaximum(total)   # 0 = busy indicator
+            self.progress_bar.setValue(min(done, total))
+        if self.status is not None:
+            self.status(text)
+
+    def _on_completed(self, job):
+        if job in self.active:
+            self.active.remove(job)
+        on_done, on_error = self._callbacks.pop(job, (None, None))
+        if self.progress_bar is not None and not self.active:
+            self.progress_bar.setVisible(False)
+
+        if job.future.cancelled():
+            error = JobCancelled()
+        else:
+            error = job.future.exception()
+        if error is None:
+            if on_done is not None:
+                on_done(job.future.result())
+        elif isinstance(error, JobCancelled):
+            if self.status is not None:
+                self.status(f"{job.name} cancelled")
+        elif on_error is not None:
+            on_error(error)
+        elif self.status is not None:
+            self.status(f"{job.name} failed: {error}")
+        self.finished.emit(job)
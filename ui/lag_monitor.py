@@ -0,0 +1,74 @@
+import sys
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+from core.logger import logger
+from core.metrics import timings
+
+TICK_MS = 50            # heartbeat interval
+STALL_MS = 100          # lag worth recording as a stall
+HANG_S = 2.0            # no heartbeat this long → log where the GUI thread is stuck
+SUMMARY_S = 300         # how often p50/p95 per operation are written to the log
+
+
+class EventLoopMonitor(QObject):
+    """
+    Measures how late the Qt event loop services a TICK_MS heartbeat timer.
+    Any lateness is time the GUI could not repaint or react to input:
+    stalls over STALL_MS go into timings as "event_loop_stall".
+
+    A stall is only known once it ends, so a watchdog thread also checks
+    the heartbeat; if the loop has been blocked for HANG_S it logs the GUI
+    thread's current stack once, which is what a "the app hangs" report
+    needs. Every SUMMARY_S the latency summary of all timed operations is
+    logged.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._gui_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop = threading.Event()
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setTimerType(Qt.PreciseTimer)
+        self._heartbeat.timeout.connect(self._beat)
+
+        self._summary_timer = QTimer(self)
+        self._summary_timer.timeout.connect(timings.log_summary)
+
+        self._watchdog = threading.Thread(target=self._watch, name="gui-watchdog", daemon=True)
+
+    def start(self):
+        self._last_beat = time.perf_counter()
+        self._heartbeat.start(TICK_MS)
+        self._summary_timer.start(SUMMARY_S * 1000)
+        self._watchdog.start()
+
+    def stop(self):
+        self._heartbeat.stop()
+        self._summary_timer.stop()
+        self._stop.set()
+        timings.log_summary()
+
+    def _beat(self):
+        now = time.perf_counter()
+        lag_ms = (now - self._last_beat) * 1000 - TICK_MS
+        self._last_beat = now
+        if lag_ms >= STALL_MS:
+            timings.add("event_loop_stall", lag_ms)
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(HANG_S / 4):
+            beat = self._last_beat
+            blocked = time.perf_counter() - beat
+            if blocked < HANG_S or reported == beat:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._gui_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(unavailable)"
+            logger.warning(f"GUI event loop blocked for {blocked:.1f} s, currently in:\n{stack}")
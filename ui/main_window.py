@@ -1,30 +1,56 @@
 import os
+import time
 from pathlib import Path
-from shutil import copy2
 import cv2
 
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
     QMessageBox, QFileDialog, QProgressBar
 )
-from PyQt5.QtCore import QTimer
-from PyQt5.QtGui import QImage, QFont
+from PyQt5.QtCore import Qt, QTimer, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtGui import QImage, QFont, QKeySequence
 
 from ui.canvas.image_view import ImageView
 from ui.sidebar import Sidebar
 from ui.topbar import TopBar
-from PyQt5.QtWidgets import QInputDialog
+from PyQt5.QtWidgets import QInputDialog, QShortcut
 
 from services.annotation_service import AnnotationService
 from services.auto_annotate_service import AutoAnnotateService
-from services.dataset_service import create_data_yaml, save_classes
-from services.training_service import train_yolo
-from services.export_service import export_yolo_dataset
+from services.dataset_service import (
+    create_data_yaml, save_classes, load_classes, load_saved_labels, load_auto_labeled, save_auto_labeled
+)
+from services.io_service import write_queue
+from services.split_service import SplitEngine
+from services.import_service import ImportService
+from services.class_view_service import ClassView
+from services.index_service import DatasetIndex
+from services.training_service import TrainingJob
+from services.active_learning_service import ActiveLearningQueue, STRATEGIES
+from services.scan_service import DirectoryScanner
+from services.video_service import PlaybackClock, INFER, SKIP
+from services.export_service import export_formats, EXPORT_FORMATS
+from services.detection_cache import detection_cache, filter_detections
+from services.cache_service import ImageCache
+from utils.validators import validate_dataset
+from core.logger import logger
+from core.metrics import timings
+from core.tracing import tracer
+from utils.geometry import rects_to_xywh, xywh_to_yolo
+from utils.threading import jobs, INTERACTIVE
 from ui.themes import THEMES, get_stylesheet  # ← ADD THIS LINE
 from ui.right_panel import RightPanel
+from ui.canvas.tiled_image import image_size
+from ui.train_dialog import TrainDialog
+from ui.prefetch import ImagePrefetcher
+from ui.lag_monitor import EventLoopMonitor
+from ui.job_monitor import JobMonitor
 
 
 class MainWindow(QMainWindow):
+    # path, error: a queued write failed on the write-behind thread
+    write_failed = pyqtSignal(str, str)
+
     def __init__(self):
         super().__init__()
 
@@ -59,13 +85,35 @@ class MainWindow(QMainWindow):
         self.timer = None
         self.video_cap = None
         self.video_timer = None
-        self._last_tick = cv2.getTickCount()
-        self._fps = 0
+        self.video_clock = None
+        self._annotator = None
+        self.training_job = None
+        self.training_timer = None
+        self.al_queue = None
+        self.al_timer = None
+        self.scanner = None
+        self.scan_timer = None
+        self.folder_watcher = None
+        self.shown_detections = None   # (image path, raw detections) drawn through the filter
+        self.shown_boxes = None        # the boxes as the filter drew them; any difference is a manual edit
+        self.filter_apply_job = None
+        self.hand_saved_during_apply = set()   # names saved by hand while filter_apply_job runs
 
     # ---------------- SERVICES ----------------
         self.annotation_service = AnnotationService()
+        self.split_engine = SplitEngine("storage/datasets/default")
+        # Labels the detection filter may rewrite; hand-saved ones are never touched
+        self.auto_labeled = load_auto_labeled("storage/datasets/default")
+        self.dataset_index = DatasetIndex.for_dataset("storage/datasets/default")
+        self.class_view = ClassView("storage/datasets/default")
         self.image_view = ImageView(self.annotation_service)
 
+        # Neighbours of the current image are decoded (and their labels read) ahead of time
+        self.prefetcher = ImagePrefetcher(self)
+        self.prefetcher.add_extra(
+            "labels", lambda p: load_saved_labels("storage/datasets/default", os.path.basename(p))
+        )
+
     # ---------------- UI ----------------
         central_widget = QWidget()
         main_layout = QVBoxLayout(central_widget)
@@ -83,7 +131,26 @@ class MainWindow(QMainWindow):
         content_layout = QHBoxLayout()
         self.sidebar = Sidebar(self)
         content_layout.addWidget(self.sidebar)
-        self.right_panel = RightPanel(self)
+        # Background jobs (utils.threading) report into the progress bar and status line
+        self.job_monitor = JobMonitor(self.progress_bar, self.sidebar.set_status, self)
+        # Filters, class views and exports trust the index only once it matches the folders
+        self.job_monitor.watch(
+            jobs.submit(lambda job: self.dataset_index.reconcile(), name="Indexing dataset"),
+            on_done=self._on_index_ready,
+        )
+        self.right_panel = RightPanel(self.annotation_service, self)
+        self.right_panel.box_selected.connect(self.image_view.scene.select_annotation)
+        self.image_view.scene.selectionChanged.connect(
+            lambda: self.right_panel.select_box(self.image_view.scene.selected_rect())
+        )
+        self.image_view.scene.notice.connect(lambda text: self.sidebar.set_status(text))
+        self.right_panel.detection_filter.changed.connect(self._on_detection_filter_changed)
+        self.right_panel.detection_filter.apply_all_requested.connect(self.apply_detection_filter_to_folder)
+        # Re-thresholding redraws at once; the label file is written once the slider settles
+        self.label_write_timer = QTimer(self)
+        self.label_write_timer.setSingleShot(True)
+        self.label_write_timer.setInterval(300)
+        self.label_write_timer.timeout.connect(self._write_filtered_labels)
         content_layout.addWidget(self.right_panel)
         content_layout.addWidget(self.image_view, stretch=1)
         main_layout.addLayout(content_layout)
@@ -92,6 +159,19 @@ class MainWindow(QMainWindow):
         # ✅ NEW: Apply initial theme
         self.apply_global_theme(self.current_theme)
 
+        # Queued label/image writes can fail after the save returned: tell the user
+        self._write_warning_open = False
+        self.write_failed.connect(self._on_write_failed)
+        write_queue.subscribe_errors(lambda path, error: self.write_failed.emit(path, str(error)))
+
+        # Event-loop stalls and per-operation latency summaries go to logs/app.log
+        self.lag_monitor = EventLoopMonitor(self)
+        self.lag_monitor.start()
+
+        for keys, step in (((Qt.Key_Right, Qt.Key_D), 1), ((Qt.Key_Left, Qt.Key_A), -1)):
+            for key in keys:
+                QShortcut(QKeySequence(key), self, lambda step=step: self.step_image(step))
+
     # =========================================================
     # LOADERS
     # =========================================================
@@ -107,32 +187,70 @@ class MainWindow(QMainWindow):
         self.current_image_index = 0
 
 
+        self.shown_detections = None
         self.image_view.scene.clearSelection()
         self.annotation_service.clear()
         self.image_view.load_image(path)
         self.sidebar.set_status("Single image loaded")
         self.refresh_topbar_labels()
 
-    def load_folder(self):
+    @tracer.traced("MainWindow.load_folder")
+    def load_folder(self, recursive=False):
         folder = QFileDialog.getExistingDirectory(self, "Select Image Folder")
         if not folder:
             return
 
+        self._stop_folder_scan()
         self.input_mode = "folder"
-        self.image_paths = sorted(
-            os.path.join(folder, f)
-            for f in os.listdir(folder)
-            if f.lower().endswith((".jpg", ".jpeg", ".png", ".bmp"))
-        )
+        self.image_paths = []
+        self.current_image_index = 0
+        self.sidebar.populate_images(self.image_paths)
 
-        if not self.image_paths:
-            QMessageBox.warning(self, "Empty", "No images found")
-            return
+        # Listed on a worker thread and streamed in; see _poll_folder_scan
+        self.scanner = DirectoryScanner(folder, recursive=recursive)
+        self.scanner.start()
+        self.folder_watcher = QFileSystemWatcher(self)
+        self.folder_watcher.directoryChanged.connect(self.scanner.rescan)
 
-        self.sidebar.populate_images(self.image_paths)
-        self.load_image_from_list(self.image_paths[0])
+        self.scan_timer = QTimer(self)
+        self.scan_timer.timeout.connect(self._poll_folder_scan)
+        self.scan_timer.start(30)
+        self.sidebar.set_status("Scanning folder...")
         self.refresh_topbar_labels()
 
+    MAX_WATCHED_DIRS = 4096  # inotify watches are a per-user kernel limit
+
+    def _poll_folder_scan(self):
+        paths, dirs = self.scanner.poll()
+        room = self.MAX_WATCHED_DIRS - len(self.folder_watcher.directories())
+        if dirs and room > 0:
+            self.folder_watcher.addPaths(dirs[:room])
+
+        if paths:
+            first = not self.image_paths
+            self.image_paths.extend(paths)
+            self.sidebar.append_images(paths)
+            if first:
+                self.load_image_from_list(self.image_paths[0])
+
+        if self.scanner.walk_done and not paths:
+            if not self.image_paths:
+                self.sidebar.set_status("No images found")
+            elif self.scan_timer.interval() < 500:
+                self.sidebar.set_status(f"{len(self.image_paths)} images")
+            # Walk finished: keep polling slowly for files the watcher reports
+            self.scan_timer.setInterval(500)
+
+    def _stop_folder_scan(self):
+        if self.scan_timer is not None:
+            self.scan_timer.stop()
+        if self.folder_watcher is not None:
+            self.folder_watcher.deleteLater()
+            self.folder_watcher = None
+        if self.scanner is not None:
+            self.scanner.stop()
+            self.scanner = None
+
     def load_video(self):
         path, _ = QFileDialog.getOpenFileName(
             self, "Open Video", "", "Videos (*.mp4 *.avi *.mov *.mkv)"
@@ -140,6 +258,7 @@ class MainWindow(QMainWindow):
         if not path:
             return
 
+        self._stop_video()
         self.input_mode = "video"
         self.video_cap = cv2.VideoCapture(path)
 
@@ -147,11 +266,33 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Cannot open video")
             return
 
-        self.video_timer = QTimer()
+        # Paced to the file's own frame rate; each tick schedules the next one
+        self.video_clock = PlaybackClock(self.video_cap.get(cv2.CAP_PROP_FPS))
+        self.video_timer = QTimer(self)
+        self.video_timer.setSingleShot(True)
+        self.video_timer.setTimerType(Qt.PreciseTimer)
         self.video_timer.timeout.connect(self._play_video_frame)
-        self.video_timer.start(30)
+        self.video_timer.start(0)
+
+        self.sidebar.set_status(f"Video playing at {self.video_clock.fps:.2f} fps...")
 
-        self.sidebar.set_status("Video playing...")
+    def _stop_video(self, status=None):
+        if self.video_timer is not None:
+            self.video_timer.stop()
+            self.video_timer = None
+        if self.video_cap is not None:
+            self.video_cap.release()
+            self.video_cap = None
+        if self.video_clock is not None and self.video_clock.frame:
+            logger.info(f"Video playback: {self.video_clock.summary()}")
+        if status:
+            self.sidebar.set_status(status)
+
+    def _auto_annotate_service(self):
+        """One loaded model per model path, shared by image and video annotation."""
+        if self._annotator is None or self._annotator[0] != self.current_model_path:
+            self._annotator = (self.current_model_path, AutoAnnotateService(self.current_model_path))
+        return self._annotator[1]
 
     # =========================================================
     # VIDEO PLAYBACK + AUTO ANNOTATION
@@ -159,18 +300,25 @@ class MainWindow(QMainWindow):
     def _play_video_frame(self):
         if self.is_paused or self.video_cap is None:
             return
+        clock = self.video_clock
+        with tracer.span("video.frame", frame=clock.frame):
+            self._video_tick(clock)
 
-        # FPS
-        current_tick = cv2.getTickCount()
-        diff = (current_tick - self._last_tick) / cv2.getTickFrequency()
-        self._fps = int(1 / diff) if diff > 0 else 0
-        self._last_tick = current_tick
+    def _video_tick(self, clock):
+
+        # Too far behind: drop frames without decoding until back in range
+        action = clock.action()
+        while action == SKIP:
+            if not self.video_cap.grab():
+                self._stop_video("Video ended")
+                return
+            clock.advance(SKIP)
+            action = clock.action()
 
         ret, frame = self.video_cap.read()
+        captured = time.perf_counter()
         if not ret:
-            self.video_timer.stop()
-            self.video_cap.release()
-            self.sidebar.set_status("Video ended")
+            self._stop_video("Video ended")
             return
 
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -178,14 +326,27 @@ class MainWindow(QMainWindow):
         qimage = QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888)
 
         self.image_view.scene.set_video_frame(qimage)
-        self.image_view.scene.clear_annotations()
 
-        temp_path = "storage/temp/video_frame.jpg"
-        os.makedirs("storage/temp", exist_ok=True)
-        cv2.imwrite(temp_path, frame)
+        # Behind schedule: show the frame under the previous overlay
+        if action == INFER:
+            with tracer.span("video.annotate"):
+                self._annotate_video_frame(frame)
+
+        clock.advance(action)
+        clock.record(captured, time.perf_counter())
+        age = clock.overlay_age()
+        self.sidebar.set_status(
+            f"FPS: {clock.display_fps():.0f}/{clock.fps:.0f} · latency "
+            f"p50 {clock.latency.percentile(50):.0f} / p95 {clock.latency.percentile(95):.0f} ms"
+            + (f" · overlay +{age} frames" if age else "")
+        )
+        if self.video_timer is not None:
+            self.video_timer.start(clock.delay_ms())
+
+    def _annotate_video_frame(self, frame):
+        self.image_view.scene.clear_annotations()
 
-        service = AutoAnnotateService(self.current_model_path)
-        predictions = service.predict(temp_path, conf=0.25)
+        predictions = self._auto_annotate_service().predict(frame, conf=0.25)
 
         # Live counts
         counts = {}
@@ -202,22 +363,116 @@ class MainWindow(QMainWindow):
 
             cv2.imwrite(str(class_dir / frame_name), frame)
 
-
         self.image_view.scene.add_auto_boxes(predictions)
-        self.sidebar.set_status(f"FPS: {self._fps}")
 
     # =========================================================
     # SIDEBAR
     # =========================================================
-    def load_image_from_list(self, path):
-        if path in self.image_paths:
+    def load_image_from_list(self, path, index=None):
+        if index is not None:
+            self.current_image_index = index
+        elif path in self.image_paths:
             self.current_image_index = self.image_paths.index(path)  # ✅ FIX
 
-        self.image_view.scene.clearSelection()
-        self.annotation_service.clear()
-        self.image_view.load_image(path)
+        with timings.span("image_load"):
+            pixmap, extras = self.prefetcher.take(path)
+            # Saved labels may have been edited by hand: the filter only acts after auto-annotate
+            self.shown_detections = None
+            self.image_view.scene.clearSelection()
+            self.image_view.load_image(path, pixmap)
+            if extras.get("labels"):
+                self.image_view.scene.load_boxes(extras["labels"])
         self.sidebar.highlight_current_image(path)
 
+        self.prefetcher.prefetch(self.image_paths, self.current_image_index)
+
+    def step_image(self, step):
+        """Next / previous image in image_paths (arrow keys, A / D)."""
+        if self.input_mode != "folder" or not self.image_paths:
+            return
+        index = self.current_image_index + step
+        if 0 <= index < len(self.image_paths):
+            self.load_image_from_list(self.image_paths[index], index)
+
+
+    def browse_class(self):
+        counts = self.class_view.class_counts()
+        if not counts:
+            QMessageBox.information(self, "Browse by Class", "No annotated images yet")
+            return
+
+        choices = [f"{cls} ({n})" for cls, n in counts]
+        choice, ok = QInputDialog.getItem(self, "Browse by Class", "Class:", choices, 0, False)
+        if not ok:
+            return
+
+        cls = counts[choices.index(choice)][0]
+        paths = self.class_view.images_for(cls)
+        if not paths:
+            QMessageBox.warning(self, "Empty", f"No images found for '{cls}'")
+            return
+
+        self.input_mode = "folder"
+        self.image_paths = paths
+        self.sidebar.populate_images(self.image_paths)
+        self.sidebar.set_status(f"Class: {cls} ({len(paths)} images)")
+
+    # =========================================================
+    # ACTIVE LEARNING (most informative images first)
+    # =========================================================
+    def prioritize_images(self):
+        if self.input_mode != "folder" or not self.image_paths:
+            QMessageBox.information(self, "Prioritize", "Open a folder first")
+            return
+
+        strategy, ok = QInputDialog.getItem(
+            self, "Prioritize", "Uncertainty measure:", list(STRATEGIES), 0, False
+        )
+        if not ok:
+            return
+
+        if self.al_queue is not None:
+            self.al_queue.stop()
+        # Scoring detections are kept too, so the whole folder can be re-thresholded afterwards,
+        # and rescoring after a retrain reads model-resolution copies instead of the files
+        self.al_queue = ActiveLearningQueue(
+            self.current_model_path, strategy, detection_cache=detection_cache, image_cache=ImageCache(),
+        )
+        self.al_queue.score(self.image_paths)
+
+        if self.al_timer is None:
+            self.al_timer = QTimer(self)
+            self.al_timer.timeout.connect(self._poll_active_learning)
+        self.al_timer.start(2000)
+        self._apply_priority_order()
+
+    def _poll_active_learning(self):
+        queue = self.al_queue
+        if queue.poll():
+            self._apply_priority_order()
+        if not queue.is_running():
+            self.al_timer.stop()
+            if queue.error:
+                QMessageBox.warning(self, "Prioritize", queue.error)
+
+    def _apply_priority_order(self):
+        current = self.image_paths[self.current_image_index] if self.image_paths else None
+        skip = None
+        if self.dataset_index.ready.is_set():
+            labeled = self.dataset_index.image_names()
+            skip = lambda p: os.path.basename(p) in labeled
+        self.image_paths = self.al_queue.ranked(self.image_paths, skip=skip)
+        if current in self.image_paths:
+            self.current_image_index = self.image_paths.index(current)
+        self.sidebar.reorder_images(self.image_paths)
+
+        fresh, total = self.al_queue.progress()
+        self.sidebar.set_status(f"Prioritized: {fresh}/{total} scored")
+
+    def _on_index_ready(self, rebuilt):
+        self.sidebar.refresh_filter_options()
+        self.sidebar.apply_filter()
+        self.sidebar.set_status("Dataset index rebuilt" if rebuilt else "Ready")
 
     # =========================================================
     # TOPBAR CALLBACKS (DO NOT REMOVE)
@@ -227,11 +482,147 @@ class MainWindow(QMainWindow):
 
     def pause_resume(self):
         self.is_paused = not self.is_paused
+        if self.video_timer is not None:
+            if self.is_paused:
+                self.video_timer.stop()
+            else:
+                # Resume from the current frame instead of racing to catch up
+                self.video_clock.restart()
+                self.video_timer.start(0)
         self.sidebar.set_status("Paused" if self.is_paused else "Resumed")
 
+    def _on_auto_annotated(self, result, model_path, img_path, status):
+        service, det = result
+        if self._annotator is None or self._annotator[0] != model_path:
+            self._annotator = (model_path, service)
+        self._show_auto_annotations(det, img_path, status)
+
+    def _show_auto_annotations(self, det, img_path, status):
+        scene = self.image_view.scene
+        if scene.image_path != img_path:
+            return  # the user moved on while the model was running
+        self.shown_detections = (img_path, det)
+        self.right_panel.detection_filter.add_classes(det["labels"].tolist())
+        preds = self._filtered_predictions(det)
+        scene.clear_annotations()        # ✅ only clear boxes, do NOT reload image
+        scene.add_auto_boxes(preds)      # ✅ draw predictions
+        self.shown_boxes = list(self.annotation_service.annotations)
+
+        self._annotate_frame(preds, img_path)
+        self.sidebar.set_status(status)
+
+    # =========================================================
+    # CONFIDENCE / CLASS FILTER (cached raw detections, no inference)
+    # =========================================================
+    def _filtered_predictions(self, det):
+        detection_filter = self.right_panel.detection_filter
+        return filter_detections(det, detection_filter.conf(), detection_filter.classes())
+
+    def _current_detections(self):
+        """
+        Raw detections drawn on the current image, or None. The first manual
+        edit (a drawn, deleted or relabeled box, an undo) hands the image to
+        the user: from then on the filter neither redraws nor saves it.
+        """
+        if self.shown_detections is None or self.shown_detections[0] != self.image_view.scene.image_path:
+            return None
+        if self.annotation_service.annotations != self.shown_boxes:
+            self.shown_detections = None
+            return None
+        return self.shown_detections[1]
+
+    def _on_detection_filter_changed(self, conf, classes):
+        det = self._current_detections()
+        if det is None:
+            return
+        with timings.span("rethreshold"):
+            scene = self.image_view.scene
+            scene.clear_annotations()
+            scene.add_auto_boxes(filter_detections(det, conf, classes))
+            self.shown_boxes = list(self.annotation_service.annotations)
+        self.label_write_timer.start()
+
+    def _write_filtered_labels(self):
+        det = self._current_detections()
+        if det is not None:
+            self._annotate_frame(self._filtered_predictions(det), self.image_view.scene.image_path)
+
+    @tracer.traced("MainWindow.apply_detection_filter_to_folder")
+    def apply_detection_filter_to_folder(self):
+        """
+        Write labels at the current filter for every loaded image with cached
+        detections, as a background job. Only images without labels or whose
+        labels came from detections are written; hand-saved labels are kept.
+        """
+        if not self.image_paths:
+            return
+        if self.filter_apply_job is not None and not self.filter_apply_job.future.done():
+            self.sidebar.set_status("The filter is already being applied to the folder")
+            return
+        detection_filter = self.right_panel.detection_filter
+        conf, classes = detection_filter.conf(), detection_filter.classes()
+        answer = QMessageBox.question(
+            self, "Apply to Cached Images",
+            f"Replace the labels of every image in this folder with cached detections "
+            f"by its boxes at confidence ≥ {conf:.2f}?\n\n"
+            f"Images whose labels were saved by hand are skipped.",
+        )
+        if answer != QMessageBox.Yes:
+            return
+
+        model_path, paths = self.current_model_path, list(self.image_paths)
+        self.hand_saved_during_apply = set()
+
+        def run(job):
+            written, skipped = [], 0
+            with timings.span("rethreshold_folder"):
+                for n, path in enumerate(paths, start=1):
+                    job.check()
+                    det = detection_cache.get(model_path, path)
+                    if det is not None:
+                        name = Path(path).name
+                        # Read live: a manual save during the job protects that image too
+                        if name not in self.auto_labeled and self.split_engine.locate(name) is not None:
+                            skipped += 1
+                        else:
+                            self._write_labels(filter_detections(det, conf, classes), path, save=False)
+                            written.append(path)
+                    job.progress.update(n, "Applying filter")
+                self.split_engine.save()
+                self.dataset_index.sync_classes(load_classes("storage/datasets/default"))
+            create_data_yaml("storage/datasets/default")
+            return written, skipped
+
+        self.filter_apply_job = jobs.submit(run, name="Apply detection filter", total=len(paths))
+        self.job_monitor.watch(
+            self.filter_apply_job,
+            on_done=lambda result: self._on_filter_applied(result, conf, classes, len(paths)),
+        )
+
+    def _on_filter_applied(self, result, conf, classes, total):
+        written, skipped = result
+        for path in written:
+            self.prefetcher.invalidate(path)
+        # An image saved by hand after the job wrote it keeps the hand labels (the later
+        # write wins on disk), so it must not be tagged as auto-labeled again
+        self._mark_labeled(
+            (Path(p).name for p in written if Path(p).name not in self.hand_saved_during_apply), auto=True
+        )
+        self.hand_saved_during_apply = set()
+        self.filter_apply_job = None
+
+        # The current image follows the new filter too
+        if self._current_detections() is not None:
+            self._on_detection_filter_changed(conf, classes)
+        status = f"Confidence ≥ {conf:.2f} applied to {len(written)}/{total} images (no inference)"
+        if skipped:
+            status += f", {skipped} with hand-saved labels kept"
+        self.sidebar.set_status(status)
+
     # =========================================================
     # SAVE YOLO
     # =========================================================
+    @tracer.traced("MainWindow.save_yolo")
     def save_yolo(self):
         scene = self.image_view.scene
         if not scene.image_path:
@@ -249,33 +640,29 @@ class MainWindow(QMainWindow):
     # =========================================================
     # AUTO ANNOTATE (REQUIRED BY TOPBAR)
     # =========================================================
+    @tracer.traced("MainWindow.auto_annotate")
     def auto_annotate(self, delay=300):
-        service = AutoAnnotateService(self.current_model_path)
-
-    # ---------- SINGLE IMAGE ----------
-        if self.input_mode == "single":
+    # ---------- SINGLE IMAGE / FOLDER (ONLY CURRENT IMAGE) ----------
+        if self.input_mode in ("single", "folder"):
             img_path = self.image_paths[self.current_image_index]
-            preds = service.predict(img_path, conf=0.25)
-
-            scene = self.image_view.scene
-            scene.clear_annotations()        # ✅ only clear boxes
-            scene.add_auto_boxes(preds)      # ✅ draw predictions
-
-            self._annotate_frame(preds, img_path)
-            self.sidebar.set_status("Image auto-annotated")
-            return
-
-    # ---------- FOLDER (ONLY CURRENT IMAGE) ----------
-        if self.input_mode == "folder":
-            img_path = self.image_paths[self.current_image_index]
-            preds = service.predict(img_path, conf=0.25)
-
-            scene = self.image_view.scene
-            scene.clear_annotations()        # ✅ do NOT reload image
-            scene.add_auto_boxes(preds)
-
-            self._annotate_frame(preds, img_path)
-            self.sidebar.set_status("Current image auto-annotated")
+            status = "Image auto-annotated" if self.input_mode == "single" else "Current image auto-annotated"
+
+            # Model load + inference on the interactive job lane; the GUI keeps painting.
+            # Raw detections are cached, so a cached image and every later
+            # threshold change skip the model entirely.
+            # self._annotator is shared with video playback, so it is only
+            # replaced on the GUI thread: a model the job loads comes back in on_done.
+            model_path = self.current_model_path
+            loaded = self._annotator[1] if self._annotator and self._annotator[0] == model_path else None
+
+            def detect(job):
+                service = loaded or AutoAnnotateService(model_path)
+                return service, detection_cache.detect(service, model_path, img_path)
+
+            job = jobs.submit(detect, name="Auto-annotate", priority=INTERACTIVE)
+            self.job_monitor.watch(
+                job, on_done=lambda result: self._on_auto_annotated(result, model_path, img_path, status)
+            )
             return
 
     # ---------- VIDEO (CONTINUOUS – already handled in _play_video_frame) ----------
@@ -316,19 +703,39 @@ class MainWindow(QMainWindow):
     # =========================================================
     # CORE YOLO SAVE
     # =========================================================
-    def _annotate_frame(self, predictions, img_path):
-        split = "train"
-        labels_dir = Path(f"storage/datasets/default/labels/{split}")
-        images_dir = Path(f"storage/datasets/default/images/{split}")
-        labels_dir.mkdir(parents=True, exist_ok=True)
-        images_dir.mkdir(parents=True, exist_ok=True)
-
-        classes_file = Path("storage/datasets/default/classes.txt")
-        classes = classes_file.read_text().splitlines() if classes_file.exists() else []
-
-        img = cv2.imread(img_path)
-        h, w = img.shape[:2]
+    def _mark_labeled(self, names, auto):
+        """Record whether these images' labels now come from detections (auto) or from the user."""
+        before = len(self.auto_labeled)
+        names = set(names)
+        if auto:
+            self.auto_labeled.update(names)
+        else:
+            self.auto_labeled.difference_update(names)
+            if self.filter_apply_job is not None:  # cleared once its result is applied
+                self.hand_saved_during_apply.update(names)
+        if len(self.auto_labeled) != before:
+            save_auto_labeled("storage/datasets/default", self.auto_labeled)
+
+    def _annotate_frame(self, predictions, img_path, save=True):
+        """Write predict()-style boxes as the image's YOLO labels (GUI thread)."""
+        self._write_labels(predictions, img_path, save)
+        self.prefetcher.invalidate(img_path)
+        self._mark_labeled([Path(img_path).name], auto=True)
+
+    def _write_labels(self, predictions, img_path, save=True):
+        """
+        The label, image copy and index part of _annotate_frame; safe off the
+        GUI thread. Bulk callers pass save=False and save the split state and
+        classes once at the end.
+        """
+        classes = load_classes("storage/datasets/default")
+
+        # Header only: the pixels are not needed to write labels
+        size = image_size(img_path)
+        w, h = size.width(), size.height()
         lines = []
+        boxes = []
+        class_ids = set()
 
         for cls, x_center, y_center, w_norm, h_norm in predictions:
             if cls not in classes:
@@ -344,38 +751,41 @@ class MainWindow(QMainWindow):
 
             if bw > 0 and bh > 0:
                 lines.append(f"{cid} {xc:.6f} {yc:.6f} {bw:.6f} {bh:.6f}")
+                boxes.append((cid, xc, yc, bw, bh))
+                class_ids.add(cid)
 
-        (labels_dir / f"{Path(img_path).stem}.txt").write_text("\n".join(lines))
-        copy2(img_path, images_dir / Path(img_path).name)
-        # ---------------- SAVE IMAGES PER CLASS ----------------
-        for cls, *_ in predictions:
-            class_img_dir = Path(f"storage/datasets/default/images_by_class/{cls}")
-            class_img_dir.mkdir(parents=True, exist_ok=True)
+        split = self.split_engine.assign(Path(img_path).name, class_ids, save=save)
+        labels_dir = Path(f"storage/datasets/default/labels/{split}")
+        images_dir = Path(f"storage/datasets/default/images/{split}")
+        labels_dir.mkdir(parents=True, exist_ok=True)
+        images_dir.mkdir(parents=True, exist_ok=True)
 
-            copy2(img_path, class_img_dir / Path(img_path).name)
+        # Queued: atomic, coalesced and written off the GUI thread
+        write_queue.write_text(labels_dir / f"{Path(img_path).stem}.txt", "\n".join(lines))
+        write_queue.copy_file(img_path, images_dir / Path(img_path).name)
+        # ---------------- INDEX (per-class views come from here, no copies) ----------------
+        self.dataset_index.update_image(Path(img_path).name, split, w, h, boxes)
 
-        save_classes("storage/datasets/default", classes)
+        if save:
+            save_classes("storage/datasets/default", classes)
+            self.dataset_index.sync_classes(classes)
 
+    @timings.timed("save")
     def _save_manual_annotations(self, annotations, img_path):
         dataset_root = Path("storage/datasets/default")
 
-        labels_dir = dataset_root / "labels" / "train"
-        images_dir = dataset_root / "images" / "train"
-        labels_dir.mkdir(parents=True, exist_ok=True)
-        images_dir.mkdir(parents=True, exist_ok=True)
-
-        classes_file = dataset_root / "classes.txt"
-        classes = classes_file.read_text().splitlines() if classes_file.exists() else []
+        classes = load_classes(dataset_root)
 
-        img = cv2.imread(img_path)
-        img_h, img_w = img.shape[:2]
+        # Boxes are in scene pixels; the scene also covers tiled gigapixel images
+        img_w, img_h = self.image_view.scene.image_size()
 
-        lines = []
+        class_index = {c: i for i, c in enumerate(classes)}
+        cls_ids, rects = [], []
 
         for label, rect in annotations:
             label = label.strip().lower()
 
-            if label not in classes:
+            if label not in class_index:
                 QMessageBox.warning(
         self,
         "Invalid Label",
@@ -384,29 +794,35 @@ class MainWindow(QMainWindow):
                 continue
                 # classes.append(label)
 
-            cls_id = classes.index(label)
+            cls_ids.append(class_index[label])
+            rects.append(rect)
 
-            x = rect.x()
-            y = rect.y()
-            w = rect.width()
-            h = rect.height()
-
-            xc = (x + w / 2) / img_w
-            yc = (y + h / 2) / img_h
-            bw = w / img_w
-            bh = h / img_h
+        yolo = xywh_to_yolo(rects_to_xywh(rects), img_w, img_h)
+        valid = (yolo[:, 2] > 0) & (yolo[:, 3] > 0)
+        boxes = [
+            (cls_id, *row) for cls_id, row, ok in zip(cls_ids, yolo.tolist(), valid) if ok
+        ]
+        lines = [f"{cls_id} {xc:.6f} {yc:.6f} {bw:.6f} {bh:.6f}" for cls_id, xc, yc, bw, bh in boxes]
+        class_ids = {box[0] for box in boxes}
 
-            if bw > 0 and bh > 0:
-                lines.append(f"{cls_id} {xc:.6f} {yc:.6f} {bw:.6f} {bh:.6f}")
+        split = self.split_engine.assign(Path(img_path).name, class_ids)
+        labels_dir = dataset_root / "labels" / split
+        images_dir = dataset_root / "images" / split
+        labels_dir.mkdir(parents=True, exist_ok=True)
+        images_dir.mkdir(parents=True, exist_ok=True)
 
-    # Save label file
-        (labels_dir / f"{Path(img_path).stem}.txt").write_text("\n".join(lines))
+    # Save label file (queued, see services.io_service)
+        write_queue.write_text(labels_dir / f"{Path(img_path).stem}.txt", "\n".join(lines))
 
     # Copy image
-        copy2(img_path, images_dir / Path(img_path).name)
+        write_queue.copy_file(img_path, images_dir / Path(img_path).name)
+        self.dataset_index.update_image(Path(img_path).name, split, img_w, img_h, boxes)
+        self._mark_labeled([Path(img_path).name], auto=False)
+        self.prefetcher.invalidate(img_path)
 
     # Save updated classes
         save_classes(dataset_root, classes)
+        self.dataset_index.sync_classes(classes)
 
 
     # def _save_manual_annotations(self, annotations, img_path):
@@ -450,14 +866,172 @@ class MainWindow(QMainWindow):
     # TRAIN / EXPORT
     # =========================================================
     def train_model(self):
-        train_yolo(
+        if self.training_job is not None and not self.training_job.finished:
+            answer = QMessageBox.question(self, "Training", "Training is running. Cancel it?")
+            if answer == QMessageBox.Yes:
+                self.training_job.cancel()
+                self.sidebar.set_status("Cancelling training...")
+            return
+
+        dialog = TrainDialog(
+            self,
             "storage/datasets/default/data.yaml",
             self.current_model_path,
-            "models/trained/default"
+            "models/trained/default",
+        )
+        if not dialog.exec_():
+            return
+
+        if not self._flush_writes("training"):
+            return
+        self.training_job = TrainingJob(dialog.config())
+        self.training_job.start()
+
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setMaximum(0)  # busy until the first epoch reports
+        self.sidebar.set_status("Training: starting...")
+
+        self.training_timer = QTimer(self)
+        self.training_timer.timeout.connect(self._poll_training)
+        self.training_timer.start(500)
+
+    def _poll_training(self):
+        job = self.training_job
+        for kind, data in job.poll():
+            if kind == "started":
+                self.progress_bar.setMaximum(data["epochs"])
+                self.sidebar.set_status(f"Training on {data['device']}...")
+            elif kind == "epoch":
+                self.progress_bar.setMaximum(data["epochs"])
+                self.progress_bar.setValue(data["epoch"])
+                m = data["metrics"]
+                eta_min = int(data["eta"] // 60)
+                self.sidebar.set_status(
+                    f"Epoch {data['epoch']}/{data['epochs']}  "
+                    f"mAP50 {m.get('metrics/mAP50(B)', 0):.3f}  "
+                    f"ETA {eta_min // 60}h{eta_min % 60:02d}m"
+                )
+            elif kind == "done":
+                self.sidebar.set_status("Training complete")
+                if self.al_queue is not None:
+                    # Rescore with the new weights; old scores order the queue meanwhile
+                    self.al_queue.set_model(data["best"])
+                    self.al_timer.start(2000)
+                QMessageBox.information(self, "Training", f"Best weights:\n{data['best']}")
+            elif kind == "cancelled":
+                self.sidebar.set_status("Training cancelled (resume available)" if data["last"] else "Training cancelled")
+            elif kind == "error":
+                self.sidebar.set_status("Training failed")
+                QMessageBox.warning(self, "Training Failed", data["message"])
+
+        if job.finished:
+            self.training_timer.stop()
+            self.progress_bar.setVisible(False)
+
+    def validate_dataset(self):
+        self._flush_writes("validation")
+        self.sidebar.set_status("Validating dataset...")
+        job = jobs.submit(
+            lambda job: validate_dataset("storage/datasets/default", check=job.check), name="Validate dataset"
+        )
+        self.job_monitor.watch(job, on_done=self._show_validation_report)
+
+    def _show_validation_report(self, report):
+        text = report.summary()
+        if report.issues:
+            examples = "\n".join(
+                f"{i.kind}: {Path(i.path).name}" + (f":{i.line}" if i.line > 0 else "") + (f" ({i.detail})" if i.detail else "")
+                for i in report.issues[:15]
+            )
+            text += f"\n\nExamples:\n{examples}"
+
+        self.sidebar.set_status("Dataset OK" if report.ok else "Dataset has problems")
+        QMessageBox.information(self, "Dataset Validation", text)
+
+    def import_dataset(self):
+        fmt, ok = QInputDialog.getItem(
+            self, "Import Dataset", "Dataset format:", ["YOLO", "COCO JSON", "Pascal VOC"], 0, False
+        )
+        if not ok:
+            return
+
+        if fmt == "COCO JSON":
+            json_path, _ = QFileDialog.getOpenFileName(self, "COCO Annotations", "", "JSON (*.json)")
+            if not json_path:
+                return
+            images_dir = QFileDialog.getExistingDirectory(self, "COCO Images Folder")
+            if not images_dir:
+                return
+        else:
+            src = QFileDialog.getExistingDirectory(self, f"{fmt} Dataset Folder")
+            if not src:
+                return
+
+        def run_import(job):
+            def progress(n):
+                job.check()  # lets cancel / closing the window stop the import here
+                job.progress.update(n, "Imported images")
+
+            service = ImportService("default", progress=progress)
+            if fmt == "YOLO":
+                return service.import_yolo(src)
+            if fmt == "Pascal VOC":
+                return service.import_voc(src)
+            return service.import_coco(json_path, images_dir)
+
+        job = jobs.submit(run_import, name=f"{fmt} import")
+        self.job_monitor.watch(job, on_done=self._show_import_report, on_error=self._import_failed)
+
+    def _import_failed(self, error):
+        self.split_engine.reload()
+        QMessageBox.warning(self, "Import Failed", str(error))
+
+    def _show_import_report(self, report):
+        # The import assigned splits through its own SplitEngine and saved split.json:
+        # pick up its counts so the next save does not overwrite them
+        self.split_engine.reload()
+        self.refresh_topbar_labels()
+        QMessageBox.information(
+            self,
+            "Import Complete",
+            f"Images: {report['images']}\n"
+            f"Boxes: {report['boxes']}\n"
+            f"Dropped (invalid geometry): {report['dropped_boxes']}\n"
+            f"Unknown classes: {report['unknown_classes']}\n"
+            f"Missing images: {report['missing_images']}\n"
+            f"Skipped images (no size): {report['skipped_images']}\n"
+            f"New classes: {', '.join(report['new_classes']) or '—'}"
         )
 
     def export_dataset(self):
-        export_yolo_dataset(self, "storage/datasets/default")
+        choices = list(EXPORT_FORMATS) + ["All formats"]
+        choice, ok = QInputDialog.getItem(
+            self, "Export", "Export format:", choices, 0, False
+        )
+        if not ok:
+            return
+
+        names = list(EXPORT_FORMATS) if choice == "All formats" else [choice]
+        job = export_formats(self, "storage/datasets/default", names)
+        if job is not None:
+            self.job_monitor.watch(
+                job,
+                on_done=lambda report: self._show_export_report(report, names),
+                on_error=lambda e: QMessageBox.warning(self, "Export Failed", str(e)),
+            )
+
+    def _show_export_report(self, report, names):
+        message = f"{report.count} images exported ({', '.join(names)})"
+        if report.skipped:
+            lines = [f"{Path(s.image_path).name}: {s.reason}" for s in report.skipped[:20]]
+            more = f"\n… and {len(report.skipped) - 20} more" if len(report.skipped) > 20 else ""
+            QMessageBox.warning(
+                self, "Export Complete",
+                f"{message}\n\n{len(report.skipped)} skipped:\n" + "\n".join(lines) + more,
+            )
+        else:
+            QMessageBox.information(self, "Export Complete", message)
+        self.sidebar.set_status(message)
 
     def apply_label_to_selected_box(self, new_label):
         scene = self.image_view.scene
@@ -473,20 +1047,12 @@ class MainWindow(QMainWindow):
         item.label = new_label
         item.text_item.setPlainText(new_label)
 
-        updated = []
-        for lbl, rect in self.annotation_service.annotations:
-            if rect == item.rect():
-                updated.append((new_label, rect))
-            else:
-                updated.append((lbl, rect))
-
-        self.annotation_service.annotations = updated
+        self.annotation_service.relabel(item.rect(), new_label)
         self.sidebar.set_status(f"{old_label} → {new_label}")
 
     def refresh_topbar_labels(self):
-        classes_file = Path("storage/datasets/default/classes.txt")
-        if classes_file.exists():
-            labels = classes_file.read_text().splitlines()
+        labels = load_classes("storage/datasets/default")
+        if labels:
             self.topbar.refresh_label_actions(labels)
 
 
@@ -515,14 +1081,7 @@ class MainWindow(QMainWindow):
         item.text_item.setPlainText(new_label)
 
     # Update annotation service
-        updated = []
-        for lbl, rect in self.annotation_service.annotations:
-            if rect == item.rect():
-                updated.append((new_label, rect))
-            else:
-                updated.append((lbl, rect))
-
-        self.annotation_service.annotations = updated
+        self.annotation_service.relabel(item.rect(), new_label)
         self.sidebar.set_status(f"{old_label} → {new_label}")
         self.refresh_topbar_labels()
         # 🔹 Deselect after edit
@@ -544,11 +1103,7 @@ class MainWindow(QMainWindow):
         scene.removeItem(item)
 
     # Remove from annotation service
-        self.annotation_service.annotations = [
-            (lbl, rect)
-            for lbl, rect in self.annotation_service.annotations
-            if rect != item.rect()
-        ]
+        self.annotation_service.remove(item.rect())
 
         self.sidebar.set_status("Box deleted")
 
@@ -583,24 +1138,60 @@ class MainWindow(QMainWindow):
 
     def undo_action(self):
         self.annotation_service.undo()
-        self.image_view.scene.clear()
-        self.image_view.scene.load_image(self.image_view.image_path)
-        for label, rect in self.annotation_service.annotations:
-            self.image_view.scene.addItem(BBoxItem(rect, label))
+        self.image_view.scene.show_annotations(self.annotation_service.annotations)
 
     def redo_action(self):
         self.annotation_service.redo()
-        self.image_view.scene.clear()
-        self.image_view.scene.load_image(self.image_view.image_path)
-        for label, rect in self.annotation_service.annotations:
-            self.image_view.scene.addItem(BBoxItem(rect, label))
+        self.image_view.scene.show_annotations(self.annotation_service.annotations)
+
+    # =========================================================
+    # WRITE FAILURES
+    # =========================================================
+    def _on_write_failed(self, path, error):
+        self.sidebar.set_status(f"Save failed: {os.path.basename(path)}")
+        if self._write_warning_open:
+            return  # one dialog at a time; the rest are in logs/app.log
+        self._write_warning_open = True
+        try:
+            QMessageBox.warning(self, "Save Failed", f"Could not write {path}:\n{error}")
+        finally:
+            self._write_warning_open = False
+
+    def _flush_writes(self, action):
+        """write_queue.flush(), showing a failure instead of raising; False if a write failed."""
+        try:
+            write_queue.flush()
+        except OSError as e:
+            QMessageBox.warning(self, "Save Failed", f"Some files could not be written before {action}:\n{e}")
+            return False
+        return True
+
+    def closeEvent(self, event):
+        # Make every queued label/classes write durable before exiting
+        try:
+            write_queue.flush()
+        except OSError as e:
+            answer = QMessageBox.question(
+                self, "Save Failed",
+                f"Some files could not be written:\n{e}\n\nClose anyway? Those changes will be lost.",
+            )
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
+        if self.training_job is not None and not self.training_job.finished:
+            self.training_job.kill()
+        if self.al_queue is not None:
+            self.al_queue.stop()
+        self._stop_folder_scan()
+        self.prefetcher.shutdown()
+        self._stop_video()
+        # A job stuck outside job.check() must not keep the window from closing
+        jobs.shutdown(cancel=True, timeout=5)
+        self.lag_monitor.stop()
+        super().closeEvent(event)
 
     def apply_global_theme_by_name(self, name):
         key = next(k for k, v in THEMES.items() if v["name"] == name)
         self.apply_global_theme(key)
 
-# Update right panel on annotations
-    def refresh_objects(self):
-        self.right_panel.update_objects(self.annotation_service.annotations)
-# Call this after any annotation change
 
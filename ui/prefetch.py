@@ -0,0 +1,172 @@
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+from core.logger import logger
+from ui.canvas.tiled_image import is_large_image
+
+
+def decode_image(path):
+    """Full-resolution decode in the format QPixmap uses natively (no conversion later)."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    image = reader.read()
+    if image.isNull():
+        return image
+    return image.convertToFormat(QImage.Format_RGB32)
+
+
+class _PrefetchJob(QRunnable):
+    def __init__(self, prefetcher, path, generation, stamp):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.path = path
+        self.generation = generation
+        self.stamp = stamp  # path's invalidation count when queued
+
+    def run(self):
+        prefetcher = self.prefetcher
+        if self.generation != prefetcher.generation:
+            prefetcher._signals.skipped.emit(self.path)
+            return
+        # Gigapixel images are shown through tiles, never decoded whole
+        image = QImage() if is_large_image(self.path) else decode_image(self.path)
+        extras = prefetcher._load_extras(self.path)
+        prefetcher._signals.decoded.emit(self.path, image, extras, self.stamp)
+
+
+class _Signals(QObject):
+    # path, image, extras, invalidation count the job was queued with
+    decoded = pyqtSignal(str, QImage, dict, int)
+    skipped = pyqtSignal(str)
+
+
+class ImagePrefetcher(QObject):
+    """
+    Decodes the `k` images on either side of the current one on background
+    threads, so next/previous only swaps a ready QPixmap into the scene.
+
+    Decoded images sit in an LRU bounded by `memory_bytes`. Besides the
+    pixels, every registered extra loader (name → fn(path)) runs on the
+    same worker, e.g. saved labels; take() returns them together.
+    """
+
+    def __init__(self, parent=None, k=3, memory_bytes=768 << 20, threads=2):
+        super().__init__(parent)
+        self.k = k
+        self.memory_bytes = memory_bytes
+        self.generation = 0
+        self.extra_loaders = {}
+
+        self._lru = OrderedDict()   # path → (mtime, QPixmap, extras)
+        self._lru_bytes = 0
+        self._pending = set()
+        self._invalidations = {}    # path → invalidate() calls, so in-flight results can be dropped
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(threads)
+        self._signals = _Signals()
+        self._signals.decoded.connect(self._on_decoded)
+        self._signals.skipped.connect(self._pending.discard)
+
+    # -----------------------------
+    # EXTRAS
+    def add_extra(self, name, loader):
+        self.extra_loaders[name] = loader
+
+    def _load_extras(self, path):
+        extras = {}
+        for name, loader in self.extra_loaders.items():
+            try:
+                extras[name] = loader(path)
+            except Exception:
+                logger.exception(f"Prefetch '{name}' failed for {path}")
+                extras[name] = None
+        return extras
+
+    # -----------------------------
+    # LRU
+    @staticmethod
+    def _bytes(pixmap):
+        return pixmap.width() * pixmap.height() * 4
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _remember(self, path, entry):
+        self._forget(path)
+        self._lru[path] = entry
+        self._lru_bytes += self._bytes(entry[1])
+        while self._lru_bytes > self.memory_bytes and len(self._lru) > 1:
+            _, (_, pixmap, _) = self._lru.popitem(last=False)
+            self._lru_bytes -= self._bytes(pixmap)
+
+    def _forget(self, path):
+        old = self._lru.pop(path, None)
+        if old is not None:
+            self._lru_bytes -= self._bytes(old[1])
+
+    def invalidate(self, path):
+        """Drop a cached entry (e.g. its labels were just saved), including a decode in flight."""
+        self._forget(path)
+        self._invalidations[path] = self._invalidations.get(path, 0) + 1
+
+    def _on_decoded(self, path, image, extras, stamp):
+        self._pending.discard(path)
+        if image.isNull() or stamp != self._invalidations.get(path, 0):
+            return  # its extras (e.g. saved labels) were read before the last save
+        # Converting here, while the user is still looking at another image,
+        # keeps QPixmap creation off the navigation path.
+        self._remember(path, (self._mtime(path), QPixmap.fromImage(image), extras))
+
+    # -----------------------------
+    # API
+    def take(self, path):
+        """
+        (QPixmap, extras) for `path`: from the LRU if it is there and the
+        file is unchanged, otherwise decoded synchronously. The pixmap is
+        None for images too large to decode whole (the scene tiles those).
+        """
+        entry = self._lru.get(path)
+        if entry is not None and entry[0] == self._mtime(path):
+            self._lru.move_to_end(path)
+            return entry[1], entry[2]
+
+        extras = self._load_extras(path)
+        if is_large_image(path):
+            return None, extras
+        pixmap = QPixmap.fromImage(decode_image(path))
+        if not pixmap.isNull():
+            self._remember(path, (self._mtime(path), pixmap, extras))
+        return pixmap, extras
+
+    def prefetch(self, paths, index):
+        """Queue paths[index ± 1..k], nearest first, forward before backward."""
+        self.generation += 1
+        self._pool.clear()
+        self._pending.clear()
+
+        order = []
+        for step in range(1, self.k + 1):
+            for i in (index + step, index - step):
+                if 0 <= i < len(paths):
+                    order.append(paths[i])
+
+        for path in order:
+            if path in self._lru or path in self._pending:
+                if path in self._lru:
+                    self._lru.move_to_end(path)  # keep neighbours over older entries
+                continue
+            self._pending.add(path)
+            self._pool.start(_PrefetchJob(self, path, self.generation, self._invalidations.get(path, 0)))
+
+    def shutdown(self):
+        self.generation += 1
+        self._pool.clear()
+        self._pool.waitForDone()
@@ -1,32 +1,103 @@
-# ui/right_panel.py
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget, QListWidgetItem
-from PyQt5.QtGui import QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QListView, QCheckBox, QAbstractItemView
+from PyQt5.QtCore import Qt, QRegExp, QSortFilterProxyModel, pyqtSignal
+
+from ui.detection_filter import DetectionFilter
+from ui.annotation_list_model import AnnotationListModel, ClassCountModel, LabelRole, RectRole
+
 
 class RightPanel(QWidget):
-    def __init__(self, parent=None):
+    # A box was picked in the list: its rect, so the canvas can select it
+    box_selected = pyqtSignal(object)
+
+    def __init__(self, annotation_service, parent=None):
         super().__init__(parent)
         self.setFixedWidth(320)
         self.setStyleSheet("background: #252525; border-left: 1px solid #333;")
+        self._syncing = False
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(12, 12, 12, 12)
 
+        title_style = "font-size: 18px; font-weight: bold; color: #ff6200; padding-bottom: 8px;"
+
+        # Threshold / class filter over the cached raw detections of the current image
+        title = QLabel("Detections")
+        title.setStyleSheet(title_style)
+        layout.addWidget(title)
+        self.detection_filter = DetectionFilter(parent=self)
+        layout.addWidget(self.detection_filter)
+
         title = QLabel("Objects")
-        title.setStyleSheet("font-size: 18px; font-weight: bold; color: #ff6200; padding-bottom: 8px;")
+        title.setStyleSheet(title_style)
         layout.addWidget(title)
 
-        self.objects_list = QListWidget()
-        self.objects_list.setStyleSheet("""
-            background: #2d2d2d; 
-            border: none; 
+        list_style = """
+            background: #2d2d2d;
+            border: none;
             border-radius: 8px;
-        """)
+        """
+
+        # Per-class counts; clicking one filters the object list to that class
+        self.class_model = ClassCountModel(annotation_service, self)
+        self.class_list = QListView()
+        self.class_list.setModel(self.class_model)
+        self.class_list.setUniformItemSizes(True)
+        self.class_list.setMaximumHeight(140)
+        self.class_list.setStyleSheet(list_style)
+        self.class_list.clicked.connect(self._on_class_clicked)
+        layout.addWidget(self.class_list)
+
+        self.group_check = QCheckBox("Group by class")
+        self.group_check.toggled.connect(self.set_grouped)
+        layout.addWidget(self.group_check)
+
+        # Object rows come straight from the annotation store; the proxy
+        # groups/filters incrementally as rows are inserted or removed.
+        self.model = AnnotationListModel(annotation_service, self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(LabelRole)
+        self.proxy.setFilterRole(LabelRole)
+        self.proxy.setDynamicSortFilter(True)
+
+        self.objects_list = QListView()
+        self.objects_list.setModel(self.proxy)
+        self.objects_list.setUniformItemSizes(True)
+        self.objects_list.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.objects_list.setStyleSheet(list_style)
+        self.objects_list.selectionModel().currentChanged.connect(self._on_current_changed)
         layout.addWidget(self.objects_list)
 
-    def update_objects(self, annotations):
-        self.objects_list.clear()
-        for i, (label, rect) in enumerate(annotations):
-            item = QListWidgetItem(f"{i+1}. {label}")
-            item.setForeground(QColor("#ffffff"))
-            self.objects_list.addItem(item)
\ No newline at end of file
+    # -----------------------------
+    # GROUPING / FILTER
+    def set_grouped(self, grouped):
+        # Column -1 restores the store's (drawing) order
+        self.proxy.sort(0 if grouped else -1)
+
+    def _on_class_clicked(self, index):
+        label = index.data(LabelRole)
+        if label is None:
+            self.proxy.setFilterRegExp(QRegExp())
+        else:
+            self.proxy.setFilterRegExp(QRegExp(f"^{QRegExp.escape(label)}$"))
+
+    # -----------------------------
+    # SELECTION SYNC
+    def _on_current_changed(self, current, _previous):
+        if self._syncing or not current.isValid():
+            return
+        self.box_selected.emit(current.data(RectRole))
+
+    def select_box(self, rect):
+        """Follow a selection made on the canvas (rect=None clears it)."""
+        self._syncing = True
+        try:
+            row = self.model.row_of(rect) if rect is not None else -1
+            index = self.proxy.mapFromSource(self.model.index(row)) if row >= 0 else None
+            if index is None or not index.isValid():
+                self.objects_list.clearSelection()
+                return
+            self.objects_list.setCurrentIndex(index)
+            self.objects_list.scrollTo(index)
+        finally:
+            self._syncing = False
@@ -1,14 +1,20 @@
 # sidebar.py (updated)
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QListWidget, QListWidgetItem,
-    QHBoxLayout, QPushButton
+    QWidget, QVBoxLayout, QLabel, QListView, QComboBox
 )
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QPixmap, QIcon, QFont
+from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtGui import QFont
 import os
-import math
 
 from ui.themes import THEMES  # Correct import since themes.py is in ui/
+from ui.thumbnail_loader import ThumbnailLoader
+from ui.image_list_model import ImageListModel, PathRole
+
+FILTER_ALL = "All images"
+FILTER_UNANNOTATED = "Unannotated"
+FILTER_ANNOTATED = "Annotated"
+CLASS_FILTER_PREFIX = "Class: "
+
 
 class Sidebar(QWidget):
     def __init__(self, parent=None):
@@ -32,36 +38,41 @@ class Sidebar(QWidget):
         self.count_label.setAlignment(Qt.AlignLeft)
         layout.addWidget(self.count_label)
 
+        # Filter (annotation status / class, answered by the dataset index)
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItems([FILTER_ALL, FILTER_UNANNOTATED, FILTER_ANNOTATED])
+        self.filter_combo.currentTextChanged.connect(self.apply_filter)
+        layout.addWidget(self.filter_combo)
+
         # Detected object counts
         self.detect_label = QLabel("Detected:\n—")
         self.detect_label.setAlignment(Qt.AlignLeft)
         self.detect_label.setStyleSheet("background-color: transparent; padding: 12px 0;")
         layout.addWidget(self.detect_label)
 
-        # Thumbnail list
-        self.image_list = QListWidget()
+        # Thumbnail list: virtualized, rows and thumbnails are produced on demand
+        self.thumbnails = ThumbnailLoader(self)
+        self.model = ImageListModel(self.thumbnails, self)
+
+        self.image_list = QListView()
+        self.image_list.setModel(self.model)
         self.image_list.setIconSize(QSize(280, 158))
-        self.image_list.setViewMode(QListWidget.ListMode)
-        self.image_list.setResizeMode(QListWidget.Adjust)
-        self.image_list.setMovement(QListWidget.Static)
+        self.image_list.setViewMode(QListView.ListMode)
+        self.image_list.setResizeMode(QListView.Adjust)
+        self.image_list.setMovement(QListView.Static)
+        self.image_list.setUniformItemSizes(True)
+        self.image_list.setVerticalScrollMode(QListView.ScrollPerPixel)
         self.image_list.setSpacing(6)
 
-        self.image_list.itemClicked.connect(self.on_image_clicked)
+        self.image_list.clicked.connect(self.on_image_clicked)
         layout.addWidget(self.image_list)
 
-        # Pagination
-        pag_layout = QHBoxLayout()
-        self.prev_btn = QPushButton("◀ Previous")
-        self.next_btn = QPushButton("Next ▶")
-        self.page_label = QLabel("1 / 1")
-        self.prev_btn.clicked.connect(self.prev_page)
-        self.next_btn.clicked.connect(self.next_page)
-        pag_layout.addWidget(self.prev_btn)
-        pag_layout.addStretch()
-        pag_layout.addWidget(self.page_label)
-        pag_layout.addStretch()
-        pag_layout.addWidget(self.next_btn)
-        layout.addLayout(pag_layout)
+        # Only decode thumbnails for rows that stay on screen
+        self._visible_timer = QTimer(self)
+        self._visible_timer.setSingleShot(True)
+        self._visible_timer.setInterval(50)
+        self._visible_timer.timeout.connect(self._request_visible_thumbnails)
+        self.image_list.verticalScrollBar().valueChanged.connect(self._visible_timer.start)
 
         # Bottom status
         self.status_label = QLabel("Ready")
@@ -71,9 +82,6 @@ class Sidebar(QWidget):
 
         # State
         self.all_image_paths = []
-        self.current_page = 0
-        self.items_per_page = 6
-        self.path_to_item = {}
 
         self.apply_theme(self.current_theme)
 
@@ -83,9 +91,10 @@ class Sidebar(QWidget):
         self.setStyleSheet(f"""
             QWidget {{ background-color: {t['bg']}; }}
             QLabel {{ color: {t['text_secondary']}; }}
-            QListWidget {{ background-color: {t['surface']}; border: 1px solid {t['border']}; }}
-            QListWidget::item:selected {{ background-color: {t['selected']}; }}
-            QListWidget::item:hover {{ background-color: {t['surface2']}; }}
+            QListView {{ background-color: {t['surface']}; border: 1px solid {t['border']}; }}
+            QListView::item:selected {{ background-color: {t['selected']}; }}
+            QListView::item:hover {{ background-color: {t['surface2']}; }}
+            QComboBox {{ background-color: {t['surface']}; color: {t['text']}; border: 1px solid {t['border']}; }}
             QPushButton {{ background-color: {t['surface']}; color: {t['text']}; }}
             QPushButton:hover {{ background-color: {t['surface2']}; }}
             QPushButton:disabled {{ color: #666; }}
@@ -95,73 +104,109 @@ class Sidebar(QWidget):
         self.status_label.style().unpolish(self.status_label)
         self.status_label.style().polish(self.status_label)
 
-    # Rest of methods unchanged...
-    # (populate_images, update_page, etc. remain the same)
-
     def populate_images(self, image_paths):
-        self.all_image_paths = image_paths
-        self.path_to_item.clear()
-        self.current_page = 0
-        self.count_label.setText(f"{len(image_paths)} images")
-        self.update_page()
+        self.all_image_paths = list(image_paths)
+        self.refresh_filter_options()
+        self.apply_filter()
 
         if image_paths:
             self.parent.load_image_from_list(image_paths[0])
 
-    def update_page(self):
-        self.image_list.clear()
-        self.path_to_item.clear()
-
-        total_pages = max(1, math.ceil(len(self.all_image_paths) / self.items_per_page))
-        self.page_label.setText(f"{self.current_page + 1} / {total_pages}")
-
-        start = self.current_page * self.items_per_page
-        end = start + self.items_per_page
-        page_paths = self.all_image_paths[start:end]
-
-        for path in page_paths:
-            filename = os.path.basename(path)
-            pixmap = QPixmap(path)
-            if pixmap.isNull():
-                continue
-
-            thumb = pixmap.scaled(280, 158, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            if thumb.width() > 280 or thumb.height() > 158:
-                thumb = thumb.copy((thumb.width()-280)//2, (thumb.height()-158)//2, 280, 158)
-
-            icon = QIcon(thumb)
-            item = QListWidgetItem(icon, filename)
-            item.setData(Qt.UserRole, path)
-            item.setTextAlignment(Qt.AlignCenter)
-
-            self.image_list.addItem(item)
-            self.path_to_item[path] = item
-
-        self.prev_btn.setEnabled(self.current_page > 0)
-        self.next_btn.setEnabled(end < len(self.all_image_paths))
-
-    def prev_page(self):
-        if self.current_page > 0:
-            self.current_page -= 1
-            self.update_page()
-
-    def next_page(self):
-        if (self.current_page + 1) * self.items_per_page < len(self.all_image_paths):
-            self.current_page += 1
-            self.update_page()
-
-    def on_image_clicked(self, item):
-        path = item.data(Qt.UserRole)
+    def reorder_images(self, image_paths):
+        """
+        Same images in a new order (e.g. by priority). Rows are moved in
+        place, so selection, current row and scroll position survive.
+        """
+        scroll = self.image_list.verticalScrollBar().value()
+        self.all_image_paths = list(image_paths)
+        paths, _indexing = self._filtered_paths()
+        if self.model.reorder(paths):
+            self._visible_timer.start()
+        else:
+            self.apply_filter()
+        self.image_list.verticalScrollBar().setValue(scroll)
+
+    def append_images(self, image_paths):
+        """More images of the same folder (streamed scan, new files on disk)."""
+        self.all_image_paths.extend(image_paths)
+        if self.filter_combo.currentText() == FILTER_ALL:
+            self.model.append_paths(image_paths)
+            self.count_label.setText(f"{len(self.all_image_paths)} images")
+        else:
+            self.apply_filter()
+        self._visible_timer.start()
+
+    # -----------------------------
+    # FILTER
+    def refresh_filter_options(self):
+        current = self.filter_combo.currentText()
+        self.filter_combo.blockSignals(True)
+        self.filter_combo.clear()
+        self.filter_combo.addItems([FILTER_ALL, FILTER_UNANNOTATED, FILTER_ANNOTATED])
+        self.filter_combo.addItems(
+            CLASS_FILTER_PREFIX + name for name, _ in self.parent.dataset_index.class_image_counts()
+        )
+        index = self.filter_combo.findText(current)
+        self.filter_combo.setCurrentIndex(max(0, index))
+        self.filter_combo.blockSignals(False)
+
+    def _filtered_paths(self):
+        """(paths the current filter shows, whether the index is still catching up)."""
+        choice = self.filter_combo.currentText()
+        paths = self.all_image_paths
+
+        index = self.parent.dataset_index
+        indexing = choice != FILTER_ALL and not index.ready.is_set()
+        if choice != FILTER_ALL and paths and not indexing:
+            if choice.startswith(CLASS_FILTER_PREFIX):
+                names = {
+                    os.path.basename(p)
+                    for p in index.images_with_class(choice[len(CLASS_FILTER_PREFIX):])
+                }
+                paths = [p for p in paths if os.path.basename(p) in names]
+            else:
+                annotated = index.image_names()
+                want = choice == FILTER_ANNOTATED
+                paths = [p for p in paths if (os.path.basename(p) in annotated) == want]
+        return paths, indexing
+
+    def apply_filter(self, *_):
+        paths, indexing = self._filtered_paths()
+        self.model.set_paths(paths)
+        if indexing:
+            # Filtered again once the index matches the dataset folders
+            self.count_label.setText(f"{len(paths)} images (indexing dataset…)")
+        elif len(paths) == len(self.all_image_paths):
+            self.count_label.setText(f"{len(paths)} images")
+        else:
+            self.count_label.setText(f"{len(paths)} of {len(self.all_image_paths)} images")
+        self._visible_timer.start()
+
+    def _request_visible_thumbnails(self):
+        viewport = self.image_list.viewport().rect()
+        first = self.image_list.indexAt(viewport.topLeft())
+        last = self.image_list.indexAt(viewport.bottomLeft())
+        if not first.isValid():
+            return
+        end = last.row() if last.isValid() else self.model.rowCount() - 1
+        # One screen of look-ahead so scrolling on rarely shows placeholders
+        end = min(self.model.rowCount() - 1, end + (end - first.row() + 1))
+        self.thumbnails.request([self.model.path_at(r) for r in range(first.row(), end + 1)])
+
+    # -----------------------------
+    def on_image_clicked(self, index):
+        path = index.data(PathRole)
         self.parent.load_image_from_list(path)
 
     def set_status(self, text):
         self.status_label.setText(text)
 
     def highlight_current_image(self, current_path):
-        if current_path in self.path_to_item:
-            item = self.path_to_item[current_path]
-            self.image_list.setCurrentItem(item)
-            self.image_list.scrollToItem(item)
+        row = self.model.row_of(current_path)
+        if row >= 0:
+            index = self.model.index(row)
+            self.image_list.setCurrentIndex(index)
+            self.image_list.scrollTo(index)
 
     def update_detection_counts(self, counts: dict):
         """
@@ -180,4 +225,4 @@ class Sidebar(QWidget):
         for cls, num in sorted(counts.items()):
             text += f"• {cls}: {num}\n"
 
-        self.detect_label.setText(text.strip())
\ No newline at end of file
+        self.detect_label.setText(text.strip())
@@ -0,0 +1,171 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QSize, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap, QColor
+
+from core.config import STORAGE_DIR
+from core.metrics import timings
+from core.resources import resources
+
+THUMB_DIR = STORAGE_DIR / "cache" / "thumbnails"
+THUMB_SIZE = QSize(280, 158)
+
+
+def thumbnail_key(path, size=THUMB_SIZE):
+    """Disk cache key: path + mtime + file size + thumbnail size."""
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size.width()}x{size.height()}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def decode_thumbnail(path, size=THUMB_SIZE):
+    """
+    Center-cropped thumbnail. QImageReader.setScaledSize lets the JPEG
+    decoder downscale while decoding (DCT scaling), so a 20 MP photo is
+    never fully decoded.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    full = reader.size()
+    if not full.isValid():
+        image = reader.read()
+    else:
+        if reader.transformation() & QImageReader.TransformationRotate90:
+            full.transpose()
+        scaled = full.scaled(size, Qt.KeepAspectRatioByExpanding)
+        reader.setScaledSize(scaled)
+        image = reader.read()
+    if image.isNull():
+        return image
+    if image.width() < size.width() or image.height() < size.height() or not full.isValid():
+        image = image.scaled(size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    x = (image.width() - size.width()) // 2
+    y = (image.height() - size.height()) // 2
+    return image.copy(QRect(x, y, size.width(), size.height()))
+
+
+class _ThumbnailJob(QRunnable):
+    def __init__(self, loader, path, generation):
+        super().__init__()
+        self.loader = loader
+        self.path = path
+        self.generation = generation
+
+    def run(self):
+        loader = self.loader
+        if self.generation != loader.generation:
+            loader._signals.skipped.emit(self.path)
+            return
+        try:
+            key = thumbnail_key(self.path, loader.size)
+        except OSError:
+            loader._signals.skipped.emit(self.path)
+            return
+
+        cached = loader.cache_dir / f"{key}.jpg"
+        image = QImage(str(cached)) if cached.exists() else QImage()
+        if image.isNull():
+            with timings.span("thumbnail"):
+                image = decode_thumbnail(self.path, loader.size)
+            if not image.isNull():
+                tmp = cached.with_name(f".{key}.{os.getpid()}.tmp.jpg")
+                if image.save(str(tmp), "JPG", 85):
+                    os.replace(tmp, cached)
+        loader._signals.decoded.emit(self.path, image)
+
+
+class _Signals(QObject):
+    decoded = pyqtSignal(str, QImage)
+    skipped = pyqtSignal(str)
+
+
+class ThumbnailLoader(QObject):
+    """
+    Thumbnails off the GUI thread, with two cache tiers:
+
+    - memory: LRU of QPixmaps, bounded by `memory_bytes`
+    - disk: THUMB_DIR/<hash of path, mtime, size>.jpg, so an edited file
+      gets a new thumbnail and revisiting a folder costs one small JPEG read
+
+    get() answers from memory or returns None and queues a decode; `ready`
+    fires on the GUI thread once it is available. request() with a new
+    batch drops queued work for images no longer on screen.
+    """
+
+    ready = pyqtSignal(str, QPixmap)
+
+    def __init__(self, parent=None, size=THUMB_SIZE, memory_bytes=64 << 20, cache_dir=THUMB_DIR):
+        super().__init__(parent)
+        self.size = size
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_bytes = memory_bytes
+        self.generation = 0
+
+        self._lru = OrderedDict()   # path → QPixmap
+        self._lru_bytes = 0
+        self._pending = set()
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(2, resources.threads_for("interactive")))
+
+        self._signals = _Signals()
+        self._signals.decoded.connect(self._on_decoded)
+        self._signals.skipped.connect(self._pending.discard)
+
+        self.placeholder = QPixmap(size)
+        self.placeholder.fill(QColor("#2A2A2A"))
+
+    # -----------------------------
+    # MEMORY LRU
+    @staticmethod
+    def _pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+    def _remember(self, path, pixmap):
+        old = self._lru.pop(path, None)
+        if old is not None:
+            self._lru_bytes -= self._pixmap_bytes(old)
+        self._lru[path] = pixmap
+        self._lru_bytes += self._pixmap_bytes(pixmap)
+        while self._lru_bytes > self.memory_bytes and len(self._lru) > 1:
+            _, evicted = self._lru.popitem(last=False)
+            self._lru_bytes -= self._pixmap_bytes(evicted)
+
+    # -----------------------------
+    # API
+    def get(self, path):
+        pixmap = self._lru.get(path)
+        if pixmap is not None:
+            self._lru.move_to_end(path)
+            return pixmap
+        self._enqueue(path)
+        return None
+
+    def request(self, paths):
+        """New visible set: forget queued jobs for other images, queue these."""
+        self.generation += 1
+        self._pool.clear()
+        self._pending.clear()
+        return {p: self.get(p) for p in paths}
+
+    def _enqueue(self, path):
+        if path in self._pending:
+            return
+        self._pending.add(path)
+        self._pool.start(_ThumbnailJob(self, path, self.generation))
+
+    def _on_decoded(self, path, image):
+        self._pending.discard(path)
+        if image.isNull():
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._remember(path, pixmap)
+        self.ready.emit(path, pixmap)
+
+    def shutdown(self):
+        self.generation += 1
+        self._pool.clear()
+        self._pool.waitForDone()
@@ -21,7 +21,10 @@ class TopBar(QWidget):
         file_menu = QMenu()
         file_menu.addAction("📄 Open Image", parent.load_image)
         file_menu.addAction("📁 Open Folder", parent.load_folder)
+        file_menu.addAction("🗂 Open Folder (with subfolders)", lambda: parent.load_folder(recursive=True))
         file_menu.addAction("🎥 Open Video", parent.load_video)
+        file_menu.addSeparator()
+        file_menu.addAction("📥 Import Dataset", parent.import_dataset)
         file_btn = QToolButton()
         file_btn.setText("File")
         file_btn.setMenu(file_menu)
@@ -37,6 +40,10 @@ class TopBar(QWidget):
         view_menu.addSeparator()
         view_menu.addAction("↶ Undo", parent.undo_action)
         view_menu.addAction("↷ Redo", parent.redo_action)
+        view_menu.addSeparator()
+        view_menu.addAction("🏷 Browse by Class", parent.browse_class)
+        view_menu.addAction("✅ Validate Dataset", parent.validate_dataset)
+        view_menu.addAction("🎯 Prioritize Unlabeled", parent.prioritize_images)
         view_btn = QToolButton()
         view_btn.setText("View")
         view_btn.setMenu(view_menu)
@@ -0,0 +1,91 @@
+from PyQt5.QtWidgets import (
+    QDialog, QFormLayout, QSpinBox, QCheckBox, QDialogButtonBox, QHBoxLayout, QLineEdit, QPushButton,
+    QFileDialog
+)
+
+from services.training_service import TrainingConfig, latest_checkpoint
+
+
+class TrainDialog(QDialog):
+    """
+    Epochs / image size / batch / workers, optional shard source and image
+    cache, plus resume from the last checkpoint.
+    """
+
+    def __init__(self, parent, data_yaml, base_model, output_dir):
+        super().__init__(parent)
+        self.setWindowTitle("Train Model")
+        self.data_yaml = data_yaml
+        self.base_model = base_model
+        self.output_dir = output_dir
+
+        layout = QFormLayout(self)
+
+        self.epochs = QSpinBox()
+        self.epochs.setRange(1, 10000)
+        self.epochs.setValue(30)
+        layout.addRow("Epochs:", self.epochs)
+
+        self.imgsz = QSpinBox()
+        self.imgsz.setRange(32, 4096)
+        self.imgsz.setSingleStep(32)
+        self.imgsz.setValue(640)
+        layout.addRow("Image size:", self.imgsz)
+
+        self.batch = QSpinBox()
+        self.batch.setRange(-1, 1024)   # -1 = ultralytics auto-batch
+        self.batch.setValue(16)
+        layout.addRow("Batch size:", self.batch)
+
+        self.workers = QSpinBox()
+        self.workers.setRange(0, 64)
+        self.workers.setValue(8)
+        layout.addRow("Dataloader workers:", self.workers)
+
+        shards_row = QHBoxLayout()
+        self.shard_root = QLineEdit()
+        self.shard_root.setPlaceholderText("Train on the dataset folder")
+        shards_row.addWidget(self.shard_root)
+        self.shard_browse = QPushButton("Browse…")
+        self.shard_browse.clicked.connect(self._browse_shards)
+        shards_row.addWidget(self.shard_browse)
+        layout.addRow("Training shards:", shards_row)
+
+        self.image_cache = QCheckBox("Cache images at training resolution")
+        self.image_cache.setToolTip("Decode and resize every image once instead of every epoch")
+        layout.addRow(self.image_cache)
+
+        self.resume = QCheckBox("Resume from last checkpoint")
+        self.resume.setEnabled(latest_checkpoint(output_dir) is not None)
+        self.resume.toggled.connect(self._on_resume_toggled)
+        layout.addRow(self.resume)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def _on_resume_toggled(self, checked):
+        # A resumed run keeps the arguments stored in its checkpoint
+        for box in (self.epochs, self.imgsz, self.batch, self.workers,
+                    self.shard_root, self.shard_browse, self.image_cache):
+            box.setEnabled(not checked)
+
+    def _browse_shards(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Training Shards Export")
+        if folder:
+            self.shard_root.setText(folder)
+
+    def config(self):
+        return TrainingConfig(
+            data_yaml=self.data_yaml,
+            base_model=self.base_model,
+            output_dir=self.output_dir,
+            epochs=self.epochs.value(),
+            imgsz=self.imgsz.value(),
+            batch=self.batch.value(),
+            workers=self.workers.value(),
+            resume=self.resume.isChecked(),
+            shard_root=self.shard_root.text().strip() or None,
+            image_cache=self.image_cache.isChecked(),
+        )
@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_BODY = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+_DECODER = json.JSONDecoder()
+
+
+class _JSONStream:
+    """Minimal forward-only JSON tokenizer over a text file, read in chunks."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (not consumed)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next complete value (one array element, one key...)."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+                # A number may be cut at the chunk boundary
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                pass
+            if not self._fill():
+                value, self.pos = _DECODER.raw_decode(self.buf, self.pos)
+                return value
+
+    def skip(self):
+        """Skip the next value without building it."""
+        first = self.peek()
+        if first not in "[{":
+            self.decode()
+            return
+
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON")
+                continue
+
+            char = match.group()
+            self.pos = match.end()
+            if char == '"':
+                while True:
+                    body = _STRING_BODY.match(self.buf, self.pos)
+                    if body:
+                        self.pos = body.end()
+                        break
+                    if not self._fill():
+                        raise ValueError("Unterminated string in JSON")
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+
+def iter_json_array(path, key, chunk_size=1 << 20):
+    """
+    Yield the elements of the top-level array `key` of a JSON object file,
+    one at a time. Other top-level values are skipped without being decoded,
+    so memory depends on the largest element, not the file size.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JSONStream(f, chunk_size)
+        stream.expect("{")
+
+        while True:
+            char = stream.peek()
+            if char == "}":
+                return
+            if char == ",":
+                stream.pos += 1
+                continue
+
+            name = stream.decode()
+            stream.expect(":")
+
+            if name != key:
+                stream.skip()
+                continue
+
+            stream.expect("[")
+            while True:
+                char = stream.peek()
+                if char == "]":
+                    return
+                if char == ",":
+                    stream.pos += 1
+                    continue
+                yield stream.decode()
+
+
+# ---------------- ATOMIC WRITES ----------------
+# Read once at import: os.umask() can only be queried by setting it, which is not thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _new_file_mode(path):
+    """Mode a plain open(path, "w") would leave: the existing file's, else 0666 minus the umask."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def fsync_dir(path):
+    """Persist a rename inside `path` (no-op where directories can't be opened)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path, data, sync_dir=True):
+    """Write through a temp file in the same folder, fsync, then rename over `path`."""
+    path = os.fspath(path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; keep the permissions a normal write would have
+        os.chmod(tmp, _new_file_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if sync_dir:
+        fsync_dir(os.path.dirname(path) or ".")
+
+
+def atomic_copy(src, dst, sync_dir=True):
+    dst = os.fspath(dst)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as out, open(src, "rb") as inp:
+            shutil.copyfileobj(inp, out, length=1 << 20)
+            out.flush()
+            os.fsync(out.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if sync_dir:
+        fsync_dir(os.path.dirname(dst) or ".")
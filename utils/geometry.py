@@ -0,0 +1,236 @@
+"""
+Box math on (n, 4) numpy arrays.
+
+Formats:
+    xyxy   x1, y1, x2, y2                   corners, pixels
+    xywh   x, y, w, h                       top-left + size, pixels (QRectF)
+    cxcywh xc, yc, w, h                     centre + size, pixels
+    yolo   xc, yc, w, h / image size        centre + size, normalized 0..1
+
+Every function takes anything np.asarray accepts and returns float64
+arrays. Only the greedy steps of nms() and weighted_box_fusion() are
+Python loops, and each step is vectorized over the remaining boxes.
+`python -m utils.geometry` benchmarks against the scalar code this replaces.
+"""
+import numpy as np
+
+
+def as_boxes(boxes):
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def rects_to_xywh(rects):
+    """QRectF-like objects (x(), y(), width(), height()) → xywh."""
+    return as_boxes([(r.x(), r.y(), r.width(), r.height()) for r in rects])
+
+
+# ---------------- CONVERSIONS ----------------
+def xyxy_to_xywh(xyxy):
+    b = as_boxes(xyxy)
+    return np.column_stack([b[:, 0], b[:, 1], b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]])
+
+
+def xywh_to_xyxy(xywh):
+    b = as_boxes(xywh)
+    return np.column_stack([b[:, 0], b[:, 1], b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]])
+
+
+def xyxy_to_cxcywh(xyxy):
+    b = as_boxes(xyxy)
+    w, h = b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]
+    return np.column_stack([b[:, 0] + w / 2, b[:, 1] + h / 2, w, h])
+
+
+def cxcywh_to_xyxy(cxcywh):
+    b = as_boxes(cxcywh)
+    half_w, half_h = b[:, 2] / 2, b[:, 3] / 2
+    return np.column_stack([b[:, 0] - half_w, b[:, 1] - half_h, b[:, 0] + half_w, b[:, 1] + half_h])
+
+
+def xyxy_to_yolo(xyxy, img_w, img_h):
+    return xyxy_to_cxcywh(xyxy) / np.array([img_w, img_h, img_w, img_h], dtype=np.float64)
+
+
+def yolo_to_xyxy(yolo, img_w, img_h):
+    return cxcywh_to_xyxy(as_boxes(yolo) * np.array([img_w, img_h, img_w, img_h], dtype=np.float64))
+
+
+def xywh_to_yolo(xywh, img_w, img_h):
+    b = as_boxes(xywh)
+    scale = np.array([img_w, img_h, img_w, img_h], dtype=np.float64)
+    return np.column_stack([b[:, 0] + b[:, 2] / 2, b[:, 1] + b[:, 3] / 2, b[:, 2], b[:, 3]]) / scale
+
+
+def yolo_to_xywh(yolo, img_w, img_h):
+    b = as_boxes(yolo) * np.array([img_w, img_h, img_w, img_h], dtype=np.float64)
+    return np.column_stack([b[:, 0] - b[:, 2] / 2, b[:, 1] - b[:, 3] / 2, b[:, 2], b[:, 3]])
+
+
+# ---------------- BOUNDS ----------------
+def clip_xyxy(xyxy, img_w, img_h):
+    b = as_boxes(xyxy).copy()
+    b[:, [0, 2]] = np.clip(b[:, [0, 2]], 0, img_w)
+    b[:, [1, 3]] = np.clip(b[:, [1, 3]], 0, img_h)
+    return b
+
+
+def area(xyxy):
+    b = as_boxes(xyxy)
+    return np.clip(b[:, 2] - b[:, 0], 0, None) * np.clip(b[:, 3] - b[:, 1], 0, None)
+
+
+# ---------------- OVERLAP ----------------
+def iou_matrix(a, b=None):
+    """Pairwise IoU, shape (len(a), len(b)); b defaults to a. Empty unions give 0."""
+    a = as_boxes(a)
+    b = a if b is None else as_boxes(b)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = area(a)[:, None] + area(b)[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-12), 0.0)
+
+
+def _iou_one(box, box_area, others, others_area):
+    """IoU of one xyxy box with each row of `others` (the hot loop of nms / WBF)."""
+    ix = np.minimum(others[:, 2], box[2]) - np.maximum(others[:, 0], box[0])
+    iy = np.minimum(others[:, 3], box[3]) - np.maximum(others[:, 1], box[1])
+    inter = np.clip(ix, 0, None) * np.clip(iy, 0, None)
+    union = others_area + box_area - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-12), 0.0)
+
+
+def nms(xyxy, scores, iou_threshold=0.5, classes=None):
+    """
+    Greedy non-maximum suppression; indices of kept boxes, best first.
+    With `classes`, boxes only suppress boxes of their own class.
+
+    Each step compares the best remaining box with the rest (one row of
+    IoU), so memory stays O(n) rather than the full n x n matrix.
+    """
+    b = as_boxes(xyxy)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    if classes is not None and len(b):
+        # Shift each class to its own region so different classes never overlap
+        offset = (np.asarray(classes, dtype=np.float64) * (b.max() + 1))[:, None]
+        b = b + offset
+    order = np.argsort(-scores, kind="stable")
+    b = b[order]
+    areas = area(b)
+    alive = np.ones(len(b), dtype=bool)
+    for i in range(len(b) - 1):
+        if alive[i]:
+            # Suppressed boxes are compared too: cheaper than gathering the live ones
+            alive[i + 1:] &= _iou_one(b[i], areas[i], b[i + 1:], areas[i + 1:]) <= iou_threshold
+    return order[alive].astype(np.int64)
+
+
+def weighted_box_fusion(xyxy, scores, classes=None, iou_threshold=0.55, skip_threshold=0.0):
+    """
+    Weighted box fusion (Solovyev et al.) for one set of boxes, e.g. the
+    concatenated predictions of several models or TTA passes.
+
+    Boxes are visited best first; each joins the first cluster of its class
+    whose fused box it overlaps by more than `iou_threshold`, otherwise it
+    starts a cluster. A cluster's box is the score-weighted mean of its
+    members and its score their mean score.
+
+    Returns (xyxy, scores, classes) of the fused boxes.
+    """
+    b = as_boxes(xyxy)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    classes = np.zeros(len(b), dtype=np.int64) if classes is None else np.asarray(classes).reshape(-1)
+    keep = scores >= skip_threshold
+    b, scores, classes = b[keep], scores[keep], classes[keep]
+
+    fused_boxes, fused_scores, fused_classes = [], [], []
+    for cls in np.unique(classes):
+        idx = np.flatnonzero(classes == cls)
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        sums = np.zeros((len(idx), 4))   # score-weighted coordinate sums per cluster
+        weights = np.zeros(len(idx))
+        counts = np.zeros(len(idx), dtype=np.int64)
+        fused = np.zeros((len(idx), 4))  # current fused box per cluster
+        fused_area = np.zeros(len(idx))
+        n = 0
+        for i in idx:
+            j = n
+            if n:
+                iou = _iou_one(b[i], area(b[i])[0], fused[:n], fused_area[:n])
+                best = int(np.argmax(iou))
+                if iou[best] > iou_threshold:
+                    j = best
+            if j == n:
+                n += 1
+            sums[j] += b[i] * scores[i]
+            weights[j] += scores[i]
+            counts[j] += 1
+            fused[j] = sums[j] / weights[j]
+            fused_area[j] = area(fused[j])[0]
+        fused_boxes.append(fused[:n])
+        fused_scores.append(weights[:n] / counts[:n])
+        fused_classes.append(np.full(n, cls))
+
+    if not fused_boxes:
+        return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=classes.dtype)
+    return np.concatenate(fused_boxes), np.concatenate(fused_scores), np.concatenate(fused_classes)
+
+
+# ---------------- BENCHMARK ----------------
+def _benchmark(n=10_000, repeat=5):
+    import timeit
+
+    rng = np.random.default_rng(0)
+    img_w, img_h = 1920, 1080
+    xy = rng.uniform(0, [img_w - 50, img_h - 50], size=(n, 2))
+    wh = rng.uniform(5, 50, size=(n, 2))
+    xywh = np.hstack([xy, wh])
+    rows = [tuple(r) for r in xywh]
+    scores = rng.uniform(size=n)
+    xyxy = xywh_to_xyxy(xywh)
+
+    def scalar_to_yolo():
+        return [((x + w / 2) / img_w, (y + h / 2) / img_h, w / img_w, h / img_h) for x, y, w, h in rows]
+
+    def scalar_iou(a, b):
+        ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+        iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+        inter = ix * iy
+        union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+        return inter / union if union > 0 else 0.0
+
+    m = 1_000  # pairwise cases are n², keep the Python side bearable
+    xyxy_rows = [tuple(r) for r in xyxy[:m]]
+
+    def scalar_iou_matrix():
+        return [[scalar_iou(a, b) for b in xyxy_rows] for a in xyxy_rows]
+
+    def scalar_nms():
+        order = sorted(range(m), key=lambda i: -scores[i])
+        keep = []
+        for i in order:
+            if all(scalar_iou(xyxy_rows[i], xyxy_rows[k]) <= 0.5 for k in keep):
+                keep.append(i)
+        return keep
+
+    cases = [
+        (f"xywh → yolo ({n})", scalar_to_yolo, lambda: xywh_to_yolo(xywh, img_w, img_h)),
+        (f"IoU matrix ({m}²)", scalar_iou_matrix, lambda: iou_matrix(xyxy[:m])),
+        (f"NMS ({m})", scalar_nms, lambda: nms(xyxy[:m], scores[:m])),
+        (f"NMS ({n}, numpy only)", None, lambda: nms(xyxy, scores)),
+        (f"WBF ({n}, numpy only)", None, lambda: weighted_box_fusion(xyxy, scores, rng.integers(0, 10, n))),
+    ]
+    print(f"{'case':<28}{'python':>12}{'numpy':>12}{'speedup':>10}")
+    for name, scalar, vector in cases:
+        t_vec = min(timeit.repeat(vector, number=1, repeat=repeat))
+        if scalar is None:
+            print(f"{name:<28}{'-':>12}{t_vec * 1000:>10.2f}ms{'-':>10}")
+            continue
+        t_py = min(timeit.repeat(scalar, number=1, repeat=max(1, repeat // 2)))
+        print(f"{name:<28}{t_py * 1000:>10.2f}ms{t_vec * 1000:>10.2f}ms{t_py / t_vec:>9.1f}x")
+
+
+if __name__ == "__main__":
+    _benchmark()
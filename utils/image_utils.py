@@ -0,0 +1,34 @@
+import cv2
+import numpy as np
+
+from utils.geometry import as_boxes
+
+PAD_VALUE = 114  # same grey ultralytics pads with
+
+
+def letterbox(image, size=640, pad_value=PAD_VALUE):
+    """
+    Resize keeping aspect ratio so the long side is `size`, then pad to
+    size x size (centered).
+
+    Returns (square image, scale, (pad_x, pad_y)).
+    """
+    h, w = image.shape[:2]
+    scale = size / max(h, w)
+    new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+
+    interp = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(image, (new_w, new_h), interpolation=interp)
+
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    out = np.full((size, size, image.shape[2] if image.ndim == 3 else 1), pad_value, dtype=image.dtype)
+    out[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized.reshape(new_h, new_w, -1)
+    return out, scale, (pad_x, pad_y)
+
+
+def unletterbox_xyxy(xyxy, scale, pad, orig_w, orig_h):
+    """Map xyxy boxes from letterboxed pixels back to normalized original-image coordinates."""
+    xyxy = as_boxes(xyxy).copy()
+    xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad[0]) / scale / orig_w
+    xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad[1]) / scale / orig_h
+    return np.clip(xyxy, 0.0, 1.0)
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from core.exceptions import JobCancelled
+
+
+class CancellationToken:
+    """Cooperative cancellation: the job checks it between units of work."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+class Progress:
+    """
+    done / total for one job, with throughput and ETA.
+
+    Updated from the worker thread; listeners (fn(progress)) are called on
+    that thread at most every `min_interval` seconds (and on the last
+    step), so a UI bridge is not flooded by per-item updates.
+    """
+
+    def __init__(self, total=0, message="", min_interval=0.1, window=5.0):
+        self.total = total
+        self.done = 0
+        self.message = message
+        self.min_interval = min_interval
+        self.window = window            # seconds of history used for the rate
+        self.started = time.perf_counter()
+        self._history = [(self.started, 0)]
+        self._last_emit = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def set_total(self, total):
+        self.total = total
+        self._emit(force=True)
+
+    def set_message(self, message):
+        self.message = message
+        self._emit(force=True)
+
+    def advance(self, n=1, message=None):
+        self.update(self.done + n, message)
+
+    def update(self, done, message=None):
+        """Set the absolute count (for callbacks that report running totals)."""
+        with self._lock:
+            self.done = done
+            if message is not None:
+                self.message = message
+            now = time.perf_counter()
+            self._history.append((now, self.done))
+            while len(self._history) > 2 and now - self._history[1][0] > self.window:
+                self._history.pop(0)
+        self._emit(force=bool(self.total) and self.done >= self.total)
+
+    def _emit(self, force=False):
+        now = time.perf_counter()
+        if not force and now - self._last_emit < self.min_interval:
+            return
+        self._last_emit = now
+        for listener in self._listeners:
+            listener(self)
+
+    @property
+    def fraction(self):
+        return min(1.0, self.done / self.total) if self.total else 0.0
+
+    def rate(self):
+        """Items per second over the last `window` seconds."""
+        with self._lock:
+            (t0, d0), (t1, d1) = self._history[0], self._history[-1]
+        return (d1 - d0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def eta(self):
+        """Seconds left, or None while unknown."""
+        rate = self.rate()
+        if not self.total or rate <= 0:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+
+    def describe(self):
+        """e.g. "Export: 1200/5000 · 340/s · 11s left"."""
+        parts = [f"{self.done}/{self.total}" if self.total else str(self.done)]
+        rate = self.rate()
+        if rate > 0:
+            parts.append(f"{rate:.0f}/s" if rate >= 10 else f"{rate:.1f}/s")
+        eta = self.eta()
+        if eta is not None:
+            parts.append(f"{format_duration(eta)} left")
+        text = " · ".join(parts)
+        return f"{self.message}: {text}" if self.message else text
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
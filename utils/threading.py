@@ -0,0 +1,193 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from core.exceptions import JobCancelled
+from core.logger import logger
+from core.metrics import timings
+from core.resources import resources
+from utils.progress import CancellationToken, Progress
+
+# Priority classes, served in this order
+INTERACTIVE = 0     # someone is waiting on the result (predict current image)
+BACKGROUND = 1      # batch work (export, import, caching, scoring)
+
+
+class Job:
+    """
+    A unit of work submitted to the JobScheduler.
+
+    The function is called as fn(job, *args, **kwargs) on a worker thread:
+    it reports through job.progress and calls job.check() between units of
+    work so cancel() can stop it. Its result (or exception) lands in
+    job.future, a concurrent.futures.Future.
+    """
+
+    def __init__(self, fn, args, kwargs, name, priority, total=0):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name or getattr(fn, "__name__", "job")
+        self.priority = priority
+        self.token = CancellationToken()
+        self.progress = Progress(total, message=self.name)
+        self.future = Future()
+
+    def check(self):
+        """Raise JobCancelled if the job was cancelled (call between units of work)."""
+        self.token.raise_if_cancelled()
+
+    def cancel(self):
+        self.token.cancel()
+        # Still queued: never starts
+        self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+
+    def run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            self.check()
+            with timings.span(f"job.{self.name}"):
+                result = self.fn(self, *self.args, **self.kwargs)
+        except JobCancelled as e:
+            self.future.set_exception(e)
+        except BaseException as e:
+            logger.exception(f"Job '{self.name}' failed")
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class JobScheduler:
+    """
+    Shared priority scheduler for long operations, so services can run
+    work off the GUI thread without knowing anything about the UI.
+
+    Interactive jobs have their own thread(s) and run inside
+    resources.interactive(), which pauses background threads at their
+    next resources.yield_to_interactive(); background jobs share a pool
+    sized by the resource manager's background budget. Both are bounded:
+    submit() only queues. CPU-bound steps inside a job can go to the
+    bounded `processes` pool (pinned, lower priority workers).
+    """
+
+    def __init__(self, interactive_threads=1, background_threads=None):
+        self.interactive_threads = interactive_threads
+        self.background_threads = background_threads or min(4, resources.workers("background"))
+        self._queues = {INTERACTIVE: [], BACKGROUND: []}
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = set()
+        self._processes = None
+        self._closed = False
+
+    # -----------------------------
+    # API
+    def submit(self, fn, *args, name=None, priority=BACKGROUND, total=0, **kwargs):
+        """Queue fn(job, *args, **kwargs); returns the Job."""
+        job = Job(fn, args, kwargs, name, priority, total)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("JobScheduler is shut down")
+            self._start_threads()
+            heapq.heappush(self._queues[priority], (next(self._order), job))
+            self._cond.notify_all()
+        return job
+
+    @property
+    def processes(self):
+        """Bounded process pool for CPU-bound steps of background jobs."""
+        with self._cond:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(**resources.pool_kwargs("background"))
+            return self._processes
+
+    def pending(self):
+        with self._cond:
+            return [job for queue in self._queues.values() for _, job in sorted(queue)]
+
+    def running(self):
+        with self._cond:
+            return list(self._running)
+
+    def shutdown(self, cancel=True, wait=True, timeout=None):
+        """
+        Stop accepting jobs; with `cancel`, cancel queued and running ones.
+        With `wait`, join the workers for at most `timeout` seconds in total:
+        they are daemon threads, so a job that never calls check() is left
+        behind (and logged) instead of blocking the caller.
+        """
+        with self._cond:
+            self._closed = True
+            if cancel:
+                for queue in self._queues.values():
+                    for _, job in queue:
+                        job.cancel()
+                    queue.clear()
+                for job in self._running:
+                    job.cancel()
+            self._cond.notify_all()
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for thread in self._threads:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            stuck = [job.name for job in self.running()]
+            if stuck:
+                logger.warning(f"Jobs still running at shutdown: {', '.join(stuck)}")
+                wait = False
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait, cancel_futures=cancel)
+
+    # -----------------------------
+    # WORKERS
+    def _start_threads(self):
+        if self._threads:
+            return
+        lanes = [(INTERACTIVE, (INTERACTIVE,))] * self.interactive_threads
+        # Background threads also take interactive jobs when the interactive lane is busy
+        lanes += [(BACKGROUND, (INTERACTIVE, BACKGROUND))] * self.background_threads
+        for i, (lane, priorities) in enumerate(lanes):
+            thread = threading.Thread(
+                target=self._worker, args=(priorities,), daemon=True,
+                name=f"jobs-{'interactive' if lane == INTERACTIVE else 'background'}-{i}",
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self, priorities):
+        with self._cond:
+            while True:
+                for priority in priorities:
+                    if self._queues[priority]:
+                        job = heapq.heappop(self._queues[priority])[1]
+                        self._running.add(job)
+                        return job
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _worker(self, priorities):
+        while True:
+            job = self._next(priorities)
+            if job is None:
+                return
+            try:
+                if job.priority == INTERACTIVE:
+                    with resources.interactive():
+                        job.run()
+                else:
+                    resources.yield_to_interactive()
+                    job.run()
+            finally:
+                with self._cond:
+                    self._running.discard(job)
+
+
+jobs = JobScheduler()
@@ -0,0 +1,263 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from core.resources import resources
+from utils.geometry import cxcywh_to_xyxy, iou_matrix
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Issue kinds
+MALFORMED = "malformed_line"
+OUT_OF_RANGE = "out_of_range"
+ZERO_AREA = "zero_area"
+UNKNOWN_CLASS = "unknown_class"
+DUPLICATE = "duplicate_box"
+ORPHAN_LABEL = "orphan_label"
+MISSING_LABEL = "image_without_label"
+
+
+@dataclass
+class Issue:
+    kind: str
+    path: str
+    line: int = -1       # 1-based line in the label file, -1 for file-level issues
+    detail: str = ""
+
+
+@dataclass
+class ValidationReport:
+    images: int = 0
+    label_files: int = 0
+    boxes: int = 0
+    counts: Counter = field(default_factory=Counter)
+    issues: list = field(default_factory=list)   # capped per kind, see max_issues_per_kind
+    max_issues_per_kind: int = 1000
+    _kept: Counter = field(default_factory=Counter, repr=False)
+
+    @property
+    def ok(self):
+        return not self.counts
+
+    def _keep(self, issue):
+        if self._kept[issue.kind] < self.max_issues_per_kind:
+            self._kept[issue.kind] += 1
+            self.issues.append(issue)
+
+    def add(self, issue):
+        self.counts[issue.kind] += 1
+        self._keep(issue)
+
+    def merge(self, counts, issues):
+        """Fold in a worker's result (full counts, issues already capped)."""
+        self.counts.update(counts)
+        for issue in issues:
+            self._keep(issue)
+
+    def summary(self):
+        lines = [
+            f"Images: {self.images}",
+            f"Label files: {self.label_files}",
+            f"Boxes: {self.boxes}",
+        ]
+        if self.ok:
+            lines.append("No problems found")
+        for kind, n in sorted(self.counts.items()):
+            lines.append(f"{kind}: {n}")
+        return "\n".join(lines)
+
+
+# ---------------- NUMPY CHECKS ----------------
+def _parse_chunk(label_paths):
+    """
+    Parse a chunk of label files into one (N, 5) array plus the file index
+    and line number of every row. Malformed lines, and files that cannot be
+    read or decoded, are reported, not parsed.
+    """
+    arrays, file_idx, line_no, issues = [], [], [], []
+    for i, path in enumerate(label_paths):
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            issues.append(Issue(MALFORMED, path, -1, f"unreadable: {e}"))
+            continue
+        lines = text.splitlines()
+        fields = [len(line.split()) for line in lines]
+        filled = [n for n, count in enumerate(fields, start=1) if count]
+
+        # Fast path: every non-empty line has exactly 5 fields → one numpy
+        # conversion (the total alone would let a short + a long line pass)
+        if all(count in (0, 5) for count in fields):
+            try:
+                arrays.append(np.asarray(text.split(), dtype=np.float64).reshape(-1, 5))
+                file_idx.extend([i] * len(filled))
+                line_no.extend(filled)
+                continue
+            except ValueError:
+                pass
+
+        rows = []
+        for n, line in enumerate(lines, start=1):
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) != 5:
+                issues.append(Issue(MALFORMED, path, n, f"{len(parts)} fields"))
+                continue
+            try:
+                rows.append([float(p) for p in parts])
+            except ValueError:
+                issues.append(Issue(MALFORMED, path, n, "non-numeric value"))
+                continue
+            file_idx.append(i)
+            line_no.append(n)
+        arrays.append(np.asarray(rows, dtype=np.float64).reshape(-1, 5))
+
+    boxes = np.concatenate(arrays) if arrays else np.empty((0, 5))
+    return boxes, np.asarray(file_idx, dtype=np.int64), np.asarray(line_no, dtype=np.int64), issues
+
+
+def _validate_chunk(args):
+    """Worker: validate a list of label files, return (n_boxes, Counter, [Issue])."""
+    label_paths, num_classes, iou_threshold, eps, max_issues = args
+    boxes, file_idx, line_no, issues = _parse_chunk(label_paths)
+
+    def report(mask, kind, detail):
+        for k in np.flatnonzero(mask):
+            issues.append(Issue(kind, label_paths[file_idx[k]], int(line_no[k]), detail(k)))
+
+    # NaN / inf pass every comparison below, so they are reported and dropped first
+    finite = np.isfinite(boxes).all(axis=1)
+    report(~finite, MALFORMED, lambda k: "non-finite value")
+    boxes, file_idx, line_no = boxes[finite], file_idx[finite], line_no[finite]
+
+    if len(boxes):
+        cls, xc, yc, w, h = boxes.T
+        xyxy = cxcywh_to_xyxy(boxes[:, 1:])
+        x1, y1, x2, y2 = xyxy.T
+
+        bad_cls = (cls != np.round(cls)) | (cls < 0)
+        if num_classes is not None:
+            bad_cls |= cls >= num_classes
+        report(bad_cls, UNKNOWN_CLASS, lambda k: f"class {boxes[k, 0]:g}")
+
+        zero = (w <= 0) | (h <= 0)
+        report(zero, ZERO_AREA, lambda k: f"w={w[k]:g} h={h[k]:g}")
+
+        out = ~zero & (
+            (x1 < -eps) | (y1 < -eps) | (x2 > 1 + eps) | (y2 > 1 + eps)
+            | (xc < 0) | (xc > 1) | (yc < 0) | (yc > 1)
+        )
+        report(out, OUT_OF_RANGE, lambda k: f"xyxy=({x1[k]:.3f}, {y1[k]:.3f}, {x2[k]:.3f}, {y2[k]:.3f})")
+
+        # Duplicates: same file + same class, IoU above threshold
+        valid = ~zero & ~bad_cls
+        group = file_idx * (int(cls.max(initial=0)) + 1) + cls.astype(np.int64)
+        order = np.argsort(group, kind="stable")
+        order = order[valid[order]]
+        if len(order):
+            starts = np.flatnonzero(np.r_[True, np.diff(group[order]) != 0])
+            ends = np.r_[starts[1:], len(order)]
+            for s, e in zip(starts, ends):
+                if e - s < 2:
+                    continue
+                members = order[s:e]
+                iou = np.triu(iou_matrix(xyxy[members]), k=1)
+                for a, b in zip(*np.nonzero(iou > iou_threshold)):
+                    k = members[b]
+                    issues.append(Issue(
+                        DUPLICATE, label_paths[file_idx[k]], int(line_no[k]),
+                        f"IoU {iou[a, b]:.2f} with line {int(line_no[members[a]])}",
+                    ))
+
+    counts = Counter(i.kind for i in issues)
+    kept, capped = Counter(), []
+    for issue in issues:
+        kept[issue.kind] += 1
+        if kept[issue.kind] <= max_issues:
+            capped.append(issue)
+    return len(boxes), counts, capped
+
+
+# ---------------- DATASET SCAN ----------------
+def _split_dirs(dataset_path):
+    images_root = os.path.join(dataset_path, "images")
+    if not os.path.isdir(images_root):
+        return []
+    return sorted(e.name for e in os.scandir(images_root) if e.is_dir())
+
+
+def validate_dataset(dataset_path, num_classes=None, iou_threshold=0.9, workers=None,
+                     chunk_size=2048, eps=1e-4, max_issues_per_kind=1000, check=None):
+    """
+    Validate every label file of a YOLO dataset (images/<split>, labels/<split>).
+
+    Label files are checked in chunks on a process pool with numpy:
+    malformed lines, unknown class ids, zero-area and out-of-range boxes,
+    same-class duplicates above `iou_threshold`, plus orphan labels and
+    images without a label file. Returns a ValidationReport.
+
+    `check` (e.g. Job.check) is called between splits and chunks and may
+    raise to stop; chunks not yet started are then dropped.
+    """
+    dataset_path = os.fspath(dataset_path)
+    if num_classes is None:
+        classes_file = os.path.join(dataset_path, "classes.txt")
+        if os.path.exists(classes_file):
+            with open(classes_file, encoding="utf-8") as f:
+                num_classes = len(f.read().splitlines())
+
+    report = ValidationReport(max_issues_per_kind=max_issues_per_kind)
+    label_files = []
+
+    splits = set(_split_dirs(dataset_path))
+    labels_root = os.path.join(dataset_path, "labels")
+    if os.path.isdir(labels_root):
+        splits |= {e.name for e in os.scandir(labels_root) if e.is_dir()}
+
+    for split in sorted(splits):
+        if check is not None:
+            check()
+        images_dir = os.path.join(dataset_path, "images", split)
+        labels_dir = os.path.join(labels_root, split)
+
+        image_stems = {}
+        if os.path.isdir(images_dir):
+            for e in os.scandir(images_dir):
+                if e.name.lower().endswith(IMAGE_EXTS):
+                    image_stems[os.path.splitext(e.name)[0]] = e.path
+        label_stems = {}
+        if os.path.isdir(labels_dir):
+            for e in os.scandir(labels_dir):
+                if e.name.endswith(".txt"):
+                    label_stems[os.path.splitext(e.name)[0]] = e.path
+
+        report.images += len(image_stems)
+        report.label_files += len(label_stems)
+        label_files.extend(label_stems.values())
+
+        for stem in label_stems.keys() - image_stems.keys():
+            report.add(Issue(ORPHAN_LABEL, label_stems[stem]))
+        for stem in image_stems.keys() - label_stems.keys():
+            report.add(Issue(MISSING_LABEL, image_stems[stem]))
+
+    chunks = [
+        (label_files[i:i + chunk_size], num_classes, iou_threshold, eps, max_issues_per_kind)
+        for i in range(0, len(label_files), chunk_size)
+    ]
+    with ProcessPoolExecutor(**resources.pool_kwargs("background", workers)) as pool:
+        for n_boxes, counts, issues in pool.map(_validate_chunk, chunks):
+            report.boxes += n_boxes
+            report.merge(counts, issues)
+            if check is not None:
+                try:
+                    check()
+                except BaseException:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+    return report